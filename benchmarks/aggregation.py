@@ -0,0 +1,64 @@
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.sentiment import (aggregate_by_bank_and_rating,
+                           aggregate_by_bank_and_rating_masked)
+
+SIZES = [10_000, 100_000, 1_000_000]
+N_BANKS = 30
+
+
+def make_scored_reviews(n_rows, n_banks=N_BANKS, seed=42):
+    """Random scored reviews with the columns the aggregation reads"""
+    rng = np.random.default_rng(seed)
+    scores = rng.uniform(-1.0, 1.0, n_rows)
+    labels = np.where(scores > 0.1, 'positive',
+                      np.where(scores < -0.1, 'negative', 'neutral'))
+    return pd.DataFrame({
+        'bank': rng.choice([f"Bank {i}" for i in range(n_banks)], n_rows),
+        'rating': rng.integers(1, 6, n_rows),
+        'sentiment_score': scores,
+        'sentiment_label': labels,
+    })
+
+
+def time_call(func, df):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(df)
+        elapsed = time.perf_counter() - start
+    return result, elapsed
+
+
+def run_benchmark(sizes=SIZES, n_banks=N_BANKS):
+    """Time the masked and grouped aggregations and check they agree"""
+    rows = []
+    for n_rows in sizes:
+        df = make_scored_reviews(n_rows, n_banks)
+        masked, masked_time = time_call(aggregate_by_bank_and_rating_masked, df)
+        grouped, grouped_time = time_call(aggregate_by_bank_and_rating, df)
+        pd.testing.assert_frame_equal(grouped, masked)
+
+        rows.append({
+            'rows': n_rows,
+            'banks': n_banks,
+            'masked_sec': round(masked_time, 4),
+            'grouped_sec': round(grouped_time, 4),
+            'speedup': round(masked_time / grouped_time, 1),
+        })
+        print(f"{n_rows:>9} rows: masked {masked_time:.3f}s, "
+              f"grouped {grouped_time:.3f}s")
+
+    results = pd.DataFrame(rows)
+    print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+    run_benchmark(sizes)
@@ -0,0 +1,67 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.storage import make_reviews
+from src.anomaly import ALERT_COLUMNS, AnomalyDetector, replay_csv
+
+N_ROWS = 1_000_000
+SPIKE_BANK = 'Dashen Bank'
+SPIKE_SHARE = 0.5
+
+
+def make_history(n_rows, onset=0.8, seed=0):
+    """Resampled reviews over a year with a negative spike for SPIKE_BANK.
+
+    From the `onset` fraction of the timeline on, SPIKE_SHARE of the
+    bank's reviews are relabelled negative. Returns the reviews in date
+    order and the position of the first spiked review.
+    """
+    df = make_reviews(n_rows)
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp('2025-01-01') + pd.to_timedelta(
+        np.sort(rng.integers(0, 365, n_rows)), unit='D')
+    df['date'] = days.strftime('%Y-%m-%d')
+
+    spiked = (df['bank'] == SPIKE_BANK) & (np.arange(n_rows) >= int(n_rows * onset))
+    flip = spiked & (rng.random(n_rows) < SPIKE_SHARE)
+    df.loc[flip, 'sentiment_label'] = 'negative'
+    return df, int(np.flatnonzero(spiked)[0])
+
+
+def run_benchmark(n_rows=N_ROWS):
+    """Replay throughput and detection latency of an injected spike"""
+    df, onset = make_history(n_rows)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'replay.csv')
+        df.to_csv(path, index=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            detector, summary = replay_csv(path, AnomalyDetector())
+
+    alerts = pd.DataFrame(detector.alerts, columns=ALERT_COLUMNS)
+    bank_alerts = alerts[(alerts['bank'] == SPIKE_BANK) & alerts['theme'].isna()]
+    detected = bank_alerts[bank_alerts['review_index'] >= onset]
+    before = alerts[alerts['review_index'] < onset]
+
+    print(f"{n_rows} reviews, {len(detector.series)} series")
+    print(f"throughput: {summary['reviews_per_sec']:.0f} reviews/sec")
+    print(f"alerts before the spike: {len(before)}")
+    if len(detected):
+        first = detected.iloc[0]
+        bank_reviews = ((df['bank'] == SPIKE_BANK).iloc[onset:first['review_index'] + 1]).sum()
+        delay = pd.Timestamp(first['date']) - pd.Timestamp(df['date'].iloc[onset])
+        print(f"spike detected after {bank_reviews} {SPIKE_BANK} reviews "
+              f"({delay.days} days of history)")
+    else:
+        print("spike not detected")
+    return summary
+
+
+if __name__ == "__main__":
+    run_benchmark(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.storage import make_reviews
+from src.embedded_db import get_backend
+
+N_ROWS = 100_000
+QUERY_REPEATS = 20
+
+
+def time_queries(db):
+    timings = {}
+    for name in ('query_bank_rating_summary', 'query_bank_comparison'):
+        query = getattr(db, name)
+        start = time.perf_counter()
+        for _ in range(QUERY_REPEATS):
+            query()
+        timings[name] = (time.perf_counter() - start) / QUERY_REPEATS * 1000
+    return timings
+
+
+def run_benchmark(n_rows=N_ROWS, backends=('sqlite', 'duckdb', 'postgres')):
+    """Load n_rows synthetic reviews into each backend and time queries.
+
+    postgres is skipped unless DB_BACKEND=postgres and a server is
+    reachable; duckdb is skipped when it is not installed.
+    """
+    df = make_reviews(n_rows)
+    rows = []
+
+    with tempfile.TemporaryDirectory() as folder:
+        for name in backends:
+            if name == 'postgres' and os.getenv('DB_BACKEND') != 'postgres':
+                continue
+            try:
+                db = get_backend(name, os.path.join(folder, f"bench.{name}"))
+                db.setup_database()
+            except Exception as e:
+                print(f"Skipping {name}: {e}")
+                continue
+
+            start = time.perf_counter()
+            db.bulk_insert_reviews(df)
+            load_time = time.perf_counter() - start
+            queries = time_queries(db)
+
+            rows.append({
+                'backend': name,
+                'load_sec': round(load_time, 3),
+                'rows_per_sec': round(n_rows / load_time),
+                'summary_ms': round(queries['query_bank_rating_summary'], 2),
+                'comparison_ms': round(queries['query_bank_comparison'], 2),
+            })
+            if hasattr(db, 'close'):
+                db.close()
+
+    results = pd.DataFrame(rows)
+    print(f"\n{n_rows} reviews")
+    print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark(*[int(arg) for arg in sys.argv[1:]])
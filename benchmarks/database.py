@@ -0,0 +1,37 @@
+import sys
+import time
+
+from benchmarks.storage import make_reviews
+from src.database import (bulk_insert_reviews, close_pool, insert_reviews,
+                          setup_database, verify_data)
+
+N_ROWS = 100_000
+
+
+def run_benchmark(n_rows=N_ROWS):
+    """Load synthetic reviews with execute_values and with COPY.
+
+    Needs a reachable PostgreSQL server configured through the DB_*
+    environment variables (see .env.example).
+    """
+    setup_database()
+    results = {}
+
+    for name, loader in [('execute_values', insert_reviews),
+                         ('copy', bulk_insert_reviews)]:
+        df = make_reviews(n_rows)
+        df['review_id'] = name + '-' + df['review_id']
+        start = time.perf_counter()
+        loader(df)
+        elapsed = time.perf_counter() - start
+        results[name] = n_rows / elapsed
+        print(f"{name}: {n_rows} rows in {elapsed:.2f}s "
+              f"({results[name]:.0f} rows/sec)")
+
+    verify_data()
+    close_pool()
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark(*[int(arg) for arg in sys.argv[1:]])
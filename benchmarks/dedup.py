@@ -0,0 +1,92 @@
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.text import normalize_text
+from src.dedup import MIN_CHARS, SHINGLE_SIZE, SIMILARITY, near_duplicate_clusters
+
+SOURCE_CSV = 'data/processed/cleaned_reviews.csv'
+NAIVE_SIZES = [1000, 2000, 4000]
+LSH_SIZES = [4000, 100_000, 1_000_000]
+DUPLICATE_SHARE = 0.1
+
+
+def make_texts(n_texts, source=SOURCE_CSV, seed=0):
+    """Synthetic reviews with DUPLICATE_SHARE lightly edited copies.
+
+    Originals are random word sequences drawn from the real vocabulary
+    with real review lengths, so they are almost never similar; copies
+    of earlier texts get one word replaced.
+    """
+    reviews = pd.read_csv(source)['review'].dropna().astype(str)
+    words = np.array(' '.join(reviews).split())
+    lengths = reviews.str.split().str.len().to_numpy()
+    rng = np.random.default_rng(seed)
+
+    texts = []
+    for i in range(n_texts):
+        if i > 10 and rng.random() < DUPLICATE_SHARE:
+            copy = texts[rng.integers(0, i)].split()
+            copy[rng.integers(0, len(copy))] = rng.choice(words)
+            texts.append(' '.join(copy))
+        else:
+            texts.append(' '.join(rng.choice(words, max(rng.choice(lengths), 8))))
+    return texts
+
+
+def shingle_set(text, k=SHINGLE_SIZE):
+    text = normalize_text(text)
+    return {text[i:i + k] for i in range(max(len(text) - k + 1, 1))}
+
+
+def naive_pairs(texts, similarity=SIMILARITY):
+    """Exact reference for recall: Jaccard similarity of every pair of
+    texts long enough to be clustered (MIN_CHARS), O(n^2)"""
+    sets = [shingle_set(text) for text in texts]
+    eligible = [len(normalize_text(text)) >= MIN_CHARS for text in texts]
+    pairs = set()
+    for i in range(len(sets)):
+        if not eligible[i]:
+            continue
+        for j in range(i + 1, len(sets)):
+            if not eligible[j]:
+                continue
+            union = len(sets[i] | sets[j])
+            if union and len(sets[i] & sets[j]) / union >= similarity:
+                pairs.add((i, j))
+    return pairs
+
+
+def timed(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - start
+
+
+def run_benchmark(naive_sizes=NAIVE_SIZES, lsh_sizes=LSH_SIZES):
+    """Naive pairwise comparison against MinHash/LSH clustering"""
+    rows = []
+    for n in sorted(set(naive_sizes) | set(lsh_sizes)):
+        texts = make_texts(n)
+        clusters, lsh = timed(near_duplicate_clusters, texts)
+        row = {'texts': n, 'lsh_sec': round(lsh, 2),
+               'clustered': int((np.bincount(clusters)[clusters] > 1).sum())}
+        if n in naive_sizes:
+            pairs, naive = timed(naive_pairs, texts)
+            found = sum(clusters[i] == clusters[j] for i, j in pairs)
+            row.update({'naive_sec': round(naive, 2), 'naive_pairs': len(pairs),
+                        'recall': round(found / len(pairs), 3) if pairs else None})
+        rows.append(row)
+        print(row)
+
+    results = pd.DataFrame(rows)
+    print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark()
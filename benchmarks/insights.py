@@ -0,0 +1,89 @@
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.storage import make_reviews
+from src.bank_stats import BankStats
+from src.insights import INSIGHT_TAXONOMIES
+from src.matcher import load_taxonomy
+
+N_ROWS = 200_000
+BANK_COUNTS = [3, 10, 30, 100]
+
+
+def per_bank_scans(df):
+    """The previous report: filter and join the corpus per bank and section"""
+    taxonomy = load_taxonomy()
+
+    def labels_in(reviews, name):
+        text = ' '.join(reviews['review'].astype(str).str.lower())
+        return [group for group, keywords in taxonomy[name].items()
+                if any(keyword in text for keyword in keywords)]
+
+    report = {}
+    for bank in df['bank'].unique():  # identify_drivers_pain_points
+        bank_df = df[df['bank'] == bank]
+        report[bank] = [len(bank_df[bank_df['sentiment_label'] == 'positive'])]
+    for bank in df['bank'].unique():  # drivers and pain points
+        bank_df = df[df['bank'] == bank]
+        report[bank].append(
+            labels_in(bank_df[bank_df['sentiment_label'] == 'positive'], 'drivers')
+            + labels_in(bank_df[bank_df['sentiment_label'] == 'negative'], 'pain_points'))
+    for bank in df['bank'].unique():  # comparison
+        bank_df = df[df['bank'] == bank]
+        report[bank].append(bank_df['rating'].mean())
+    for bank in df['bank'].unique():  # data-driven adjustments
+        bank_df = df[df['bank'] == bank]
+        report[bank][1] += labels_in(
+            bank_df[bank_df['sentiment_label'] == 'negative'],
+            'recommendation_triggers')
+    return report
+
+
+def precomputed(df):
+    stats = BankStats(df, taxonomies=INSIGHT_TAXONOMIES, tokens=False)
+    report = {}
+    for bank in stats.banks:
+        found = (stats.labels_hit('drivers', bank, 'positive')
+                 + stats.labels_hit('pain_points', bank, 'negative')
+                 + stats.labels_hit('recommendation_triggers', bank, 'negative'))
+        report[bank] = [stats.count(bank, 'positive'), found,
+                        stats.summary.loc[bank, 'rating']]
+    return report
+
+
+def timed(func, df):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(df)
+        return result, time.perf_counter() - start
+
+
+def run_benchmark(n_rows=N_ROWS, bank_counts=BANK_COUNTS):
+    """Insight report time as the number of banks grows"""
+    df = make_reviews(n_rows)
+    rng = np.random.default_rng(0)
+    rows = []
+
+    for n_banks in bank_counts:
+        df['bank'] = rng.choice([f"Bank {i}" for i in range(n_banks)], n_rows)
+        expected, scans = timed(per_bank_scans, df)
+        report, cube = timed(precomputed, df)
+        assert [r[:2] for r in report.values()] == [r[:2] for r in expected.values()]
+        rows.append({'banks': n_banks, 'per_bank_scans_sec': round(scans, 2),
+                     'stats_cube_sec': round(cube, 2),
+                     'speedup': round(scans / cube, 1)})
+        print(f"{n_banks} banks: scans {scans:.2f}s, cube {cube:.2f}s")
+
+    results = pd.DataFrame(rows)
+    print(f"\n{n_rows} reviews")
+    print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark(*[int(arg) for arg in sys.argv[1:]])
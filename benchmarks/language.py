@@ -0,0 +1,61 @@
+import contextlib
+import io
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import ReviewProfile
+from src.language import detect_languages
+from src.sentiment import SCORED_LANGUAGES, score_texts
+
+SOURCE_CSV = 'data/processed/cleaned_reviews.csv'
+SIZES = [100_000, 1_000_000]
+# TextBlob is timed on at most this many reviews and extrapolated
+SENTIMENT_ROWS = 20_000
+
+
+def timed(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - start
+
+
+def measure(name, texts):
+    """Detection throughput, and TextBlob time on all reviews against
+    only the ones routed to it"""
+    languages, detect = timed(detect_languages, texts)
+    sample = texts[:SENTIMENT_ROWS]
+    routed = [text for text, language in zip(sample, languages)
+              if language in SCORED_LANGUAGES]
+    _, everything = timed(score_texts, sample)
+    _, english = timed(score_texts, routed)
+    scale = len(texts) / len(sample)
+    row = {
+        'corpus': name, 'reviews': len(texts),
+        'detect_sec': round(detect, 2),
+        'detect_per_sec': round(len(texts) / detect),
+        'unscored_share': round(1 - float(pd.Series(languages).isin(SCORED_LANGUAGES).mean()), 4),
+        'textblob_all_sec': round(everything * scale, 2),
+        'textblob_routed_sec': round((english + detect * len(sample) / len(texts)) * scale, 2),
+    }
+    print(row)
+    print(pd.Series(languages).value_counts().to_string())
+    return row
+
+
+def run_benchmark(sizes=SIZES):
+    """Language detection over the real corpus and synthetic reviews"""
+    timed(score_texts, ['warm up the TextBlob lexicon'])
+    rows = [measure('real', pd.read_csv(SOURCE_CSV)['review'].astype(str).tolist())]
+    profile = ReviewProfile()
+    for n in sizes:
+        rows.append(measure('synthetic', profile.sample(n)['review'].tolist()))
+
+    results = pd.DataFrame(rows)
+    print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark()
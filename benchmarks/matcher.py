@@ -0,0 +1,55 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.storage import make_reviews
+from src.matcher import KeywordMatcher, load_taxonomy
+
+N_ROWS = 1_000_000
+
+
+def naive_masks(groups, texts):
+    """The previous approach: any(keyword in text) per group per review"""
+    keyword_lists = list(groups.values())
+    masks = np.zeros(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        text = str(text).lower()
+        for bit, keywords in enumerate(keyword_lists):
+            if any(keyword in text for keyword in keywords):
+                masks[i] |= 1 << bit
+    return masks
+
+
+def run_benchmark(n_rows=N_ROWS):
+    """Keyword-to-group matching time for every taxonomy dictionary"""
+    texts = make_reviews(n_rows)['review'].fillna('').astype(str).tolist()
+    rows = []
+
+    for name, groups in load_taxonomy().items():
+        matcher = KeywordMatcher(groups)
+
+        start = time.perf_counter()
+        expected = naive_masks(groups, texts)
+        naive = time.perf_counter() - start
+
+        start = time.perf_counter()
+        masks = matcher.mask_many(texts)
+        compiled = time.perf_counter() - start
+
+        assert np.array_equal(expected, masks), f"{name}: masks differ"
+        rows.append({'taxonomy': name, 'groups': len(groups),
+                     'naive_sec': round(naive, 2),
+                     'compiled_sec': round(compiled, 2),
+                     'speedup': round(naive / compiled, 1)})
+        print(f"{name}: naive {naive:.2f}s, compiled {compiled:.2f}s")
+
+    results = pd.DataFrame(rows)
+    print(f"\n{n_rows} reviews")
+    print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,250 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from benchmarks.synthetic import ReviewProfile, make_raw_reviews
+from src.insights import generate_recommendations
+from src.instrument import current_rss_mb
+from src.language import add_language_column
+from src.preprocess import preprocess_reviews
+from src.scraper import PAGE_SIZE, TARGET_PER_BANK, scrape_bank_reviews
+from src.sentiment import DEFAULT_BACKEND, perform_sentiment_analysis
+from src.streaming import peak_memory_mb
+from src.themes import analyze_themes_by_bank
+
+N_ROWS = 10_000
+# Scraping is network bound in practice; its machinery is timed on at most
+# this many rows, the later stages run on all n_rows
+SCRAPE_ROWS = 20_000
+RESULTS_PATH = 'benchmarks/results/pipeline.json'
+# Runs compared against: the median of the last BASELINE_RUNS comparable runs
+BASELINE_RUNS = 5
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.20
+# Absolute slack so millisecond stages and allocator noise are not flagged
+MIN_TIME_DELTA = 0.05
+MIN_MEMORY_DELTA = 20.0
+SAMPLE_INTERVAL = 0.005
+
+
+class RssSampler:
+    """Background thread recording the peak RSS while a stage runs.
+
+    Falls back to the process-wide peak (ru_maxrss) where /proc is not
+    available, which is only an upper bound for later stages.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_mb = current_rss_mb()
+        self.peak_mb = self.start_mb
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.done.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        if self.start_mb is not None:
+            self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start_mb is None:
+            self.peak_mb = peak_memory_mb()
+            return
+        self.done.set()
+        self.thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+class SyntheticPlayStore:
+    """Zero-latency stand-in for google_play_scraper.reviews serving
+    pre-generated synthetic reviews, PAGE_SIZE per page"""
+
+    def __init__(self, raw):
+        self.raw = raw.dropna(subset=['review']).drop_duplicates('review_id')
+        self.now = datetime(2025, 12, 1)
+
+    def __call__(self, app_id, lang='en', country='et', sort=None,
+                 count=PAGE_SIZE, continuation_token=None):
+        app = int(app_id.rsplit('.', 1)[1][3:])
+        page = continuation_token or 0
+        start = (app * TARGET_PER_BANK + page * count) % max(len(self.raw) - count, 1)
+        rows = self.raw.iloc[start:start + count]
+        result = [{
+            'reviewId': f"{app_id}-{review_id}",
+            'content': review,
+            'score': rating,
+            'at': self.now - timedelta(minutes=page * count + i),
+        } for i, (review_id, review, rating) in enumerate(zip(
+            rows['review_id'], rows['review'], rows['rating']))]
+        return result, page + 1
+
+
+def scrape_stage(raw, n_rows):
+    apps = {f"Bank {i}": f"com.example.app{i}"
+            for i in range(math.ceil(n_rows / TARGET_PER_BANK))}
+    return scrape_bank_reviews(apps, rate=1e9, fetch=SyntheticPlayStore(raw))
+
+
+def measure(name, func, rows_in):
+    """Run one stage quietly, returning its output and measurements"""
+    with RssSampler() as memory, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+
+    rows_out = len(result) if hasattr(result, '__len__') else None
+    stage = {
+        'stage': name,
+        'rows_in': rows_in,
+        'rows_out': rows_out,
+        'wall_sec': round(elapsed, 4),
+        'rows_per_sec': round(rows_in / elapsed, 1) if elapsed > 0 else None,
+        'peak_rss_mb': round(memory.peak_mb, 1) if memory.peak_mb is not None else None,
+        'rss_growth_mb': (round(memory.peak_mb - memory.start_mb, 1)
+                          if memory.start_mb is not None else None),
+    }
+    print(f"{name:<12} {elapsed:8.2f}s {stage['rows_per_sec'] or 0:12.0f} rows/sec "
+          f"peak RSS {stage['peak_rss_mb'] or 0:8.1f} MB")
+    return result, stage
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(),
+            'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def run_pipeline(n_rows=N_ROWS, backend=DEFAULT_BACKEND, workers=1, seed=0):
+    """Generate n_rows synthetic reviews and time every pipeline stage"""
+    profile = ReviewProfile()
+    raw, generate = measure('generate', lambda: make_raw_reviews(n_rows, profile, seed),
+                            n_rows)
+    scrape_rows = min(n_rows, SCRAPE_ROWS)
+    _, scrape = measure('scrape', lambda: scrape_stage(raw, scrape_rows), scrape_rows)
+    cleaned, preprocess = measure('preprocess', lambda: preprocess_reviews(raw), len(raw))
+    del raw
+    cleaned, language = measure('language', lambda: add_language_column(cleaned),
+                                len(cleaned))
+    scored, sentiment = measure(
+        'sentiment', lambda: perform_sentiment_analysis(
+            cleaned, workers=workers, backend=backend), len(cleaned))
+    themes, theme_stage = measure(
+        'themes', lambda: analyze_themes_by_bank(scored), len(scored))
+    _, insights = measure('insights', lambda: generate_recommendations(scored, themes),
+                          len(scored))
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'rows': n_rows,
+        'backend': backend,
+        'workers': workers,
+        'seed': seed,
+        'environment': environment(),
+        'total_sec': round(sum(stage['wall_sec'] for stage in
+                               [scrape, preprocess, language, sentiment,
+                                theme_stage, insights]), 4),
+        'process_peak_rss_mb': peak_memory_mb(),
+        'stages': [generate, scrape, preprocess, language, sentiment, theme_stage,
+                   insights],
+    }
+
+
+def comparable(run, other):
+    return all(run[key] == other[key] for key in ('rows', 'backend', 'workers'))
+
+
+def find_regressions(run, history, baseline_runs=BASELINE_RUNS):
+    """Stages slower or hungrier than the median of recent comparable runs"""
+    previous = [past for past in history if comparable(run, past)][-baseline_runs:]
+    if not previous:
+        return []
+
+    regressions = []
+    checks = [('wall_sec', TIME_TOLERANCE, MIN_TIME_DELTA),
+              ('peak_rss_mb', MEMORY_TOLERANCE, MIN_MEMORY_DELTA)]
+    for stage in run['stages']:
+        for metric, tolerance, min_delta in checks:
+            values = [past_stage[metric] for past in previous
+                      for past_stage in past['stages']
+                      if past_stage['stage'] == stage['stage']
+                      and past_stage[metric] is not None]
+            if not values or stage[metric] is None:
+                continue
+            baseline = float(np.median(values))
+            if (stage[metric] > baseline * (1 + tolerance)
+                    and stage[metric] - baseline > min_delta):
+                regressions.append({
+                    'stage': stage['stage'], 'metric': metric,
+                    'baseline': round(baseline, 4), 'value': stage[metric],
+                    'change': round(stage[metric] / baseline - 1, 3),
+                })
+    return regressions
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['runs']
+
+
+def save_run(run, history, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'runs': history + [run]}, f, indent=2)
+
+
+def run_benchmark(n_rows=N_ROWS, backend=DEFAULT_BACKEND, workers=1,
+                  results_path=RESULTS_PATH, save=True):
+    """Time the pipeline, flag regressions against earlier runs and record the run"""
+    print(f"Pipeline benchmark: {n_rows} rows, {backend} backend, {workers} workers")
+    run = run_pipeline(n_rows, backend, workers)
+    history = load_history(results_path)
+    run['regressions'] = find_regressions(run, history)
+
+    print(f"total (excluding generation): {run['total_sec']:.2f}s")
+    for regression in run['regressions']:
+        print(f"REGRESSION {regression['stage']} {regression['metric']}: "
+              f"{regression['value']} vs baseline {regression['baseline']} "
+              f"({regression['change']:+.0%})")
+    if not run['regressions']:
+        baseline = any(comparable(run, past) for past in history)
+        print("no regressions" if baseline else "no comparable earlier runs")
+    if save:
+        save_run(run, history, results_path)
+        print(f"Saved results to {results_path}")
+    return run
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time every pipeline stage on synthetic reviews")
+    parser.add_argument('rows', nargs='?', type=int, default=N_ROWS)
+    parser.add_argument('--backend', default=DEFAULT_BACKEND,
+                        choices=['textblob', 'lexicon'])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--results', default=RESULTS_PATH)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+    run = run_benchmark(args.rows, args.backend, args.workers, args.results,
+                        save=not args.no_save)
+    sys.exit(1 if run['regressions'] else 0)
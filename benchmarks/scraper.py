@@ -0,0 +1,63 @@
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from src.scraper import BANK_APPS, scrape_bank_reviews
+
+
+class FakePlayStore:
+    """Offline stand-in for google_play_scraper.reviews.
+
+    Serves `pages` pages per app with simulated latency and a fixed
+    share of transient errors. Continuation tokens are page numbers.
+    """
+
+    def __init__(self, pages=3, latency=0.2, error_rate=0.2, seed=0):
+        self.pages = pages
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.now = datetime(2025, 12, 1)
+
+    def __call__(self, app_id, lang='en', country='et', sort=None,
+                 count=200, continuation_token=None):
+        with self.lock:
+            fail = self.random.random() < self.error_rate
+        time.sleep(self.latency)
+        if fail:
+            raise ConnectionError("simulated timeout")
+
+        page = continuation_token or 0
+        result = [{
+            'reviewId': f"{app_id}-{page}-{i}",
+            'content': f"review {i} on page {page}",
+            'score': 1 + (i % 5),
+            'at': self.now - timedelta(minutes=page * count + i),
+        } for i in range(count)]
+        next_token = page + 1 if page + 1 < self.pages else None
+        return result, next_token
+
+
+def run_benchmark(n_apps=12, workers=4, rate=50.0):
+    """Compare sequential and concurrent scraping against FakePlayStore"""
+    apps = {f"Bank {i}": f"com.example.bank{i}" for i in range(n_apps)}
+    apps.update(BANK_APPS)
+
+    timings = {}
+    for label, n_workers in [('sequential', 1), ('concurrent', workers)]:
+        start = time.perf_counter()
+        df = scrape_bank_reviews(apps, workers=n_workers, rate=rate,
+                                 backoff=0.01, fetch=FakePlayStore())
+        timings[label] = time.perf_counter() - start
+        assert df['review_id'].is_unique
+
+    print(f"\nSequential: {timings['sequential']:.2f}s, "
+          f"concurrent ({workers} workers): {timings['concurrent']:.2f}s")
+    return timings
+
+
+if __name__ == "__main__":
+    run_benchmark(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from src.storage import dataset_size, read_reviews_parquet, write_reviews_parquet
+
+SOURCE_CSV = 'data/processed/reviews_with_sentiment.csv'
+N_ROWS = 200_000
+
+
+def make_reviews(n_rows, source=SOURCE_CSV, seed=42):
+    """Resample the processed reviews to n_rows with unique review_ids"""
+    df = pd.read_csv(source).sample(n_rows, replace=True, random_state=seed)
+    df['review_id'] = [f"synthetic-{i}" for i in range(n_rows)]
+    return df.reset_index(drop=True)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_benchmark(n_rows=N_ROWS):
+    """Compare file size and load time of CSV and partitioned Parquet"""
+    df = make_reviews(n_rows)
+    bank = df['bank'].iloc[0]
+    columns = ['bank', 'rating', 'sentiment_label', 'sentiment_score']
+
+    with tempfile.TemporaryDirectory() as folder:
+        csv_path = os.path.join(folder, 'reviews.csv')
+        parquet_root = os.path.join(folder, 'reviews.parquet')
+        df.to_csv(csv_path, index=False)
+        write_reviews_parquet(df, parquet_root)
+
+        cases = {
+            'full load': (
+                lambda: pd.read_csv(csv_path),
+                lambda: read_reviews_parquet(parquet_root)),
+            '4 columns': (
+                lambda: pd.read_csv(csv_path, usecols=columns),
+                lambda: read_reviews_parquet(parquet_root, columns=columns)),
+            'one bank, 4 columns': (
+                lambda: (lambda d: d[d['bank'] == bank])(
+                    pd.read_csv(csv_path, usecols=columns)),
+                lambda: read_reviews_parquet(parquet_root, columns=columns,
+                                             banks=[bank])),
+        }
+
+        rows = [{
+            'case': 'size (MB)',
+            'csv': round(dataset_size(csv_path) / 1024 ** 2, 2),
+            'parquet': round(dataset_size(parquet_root) / 1024 ** 2, 2),
+        }]
+        for name, (read_csv, read_parquet) in cases.items():
+            csv_df, csv_time = timed(read_csv)
+            parquet_df, parquet_time = timed(read_parquet)
+            assert len(csv_df) == len(parquet_df)
+            rows.append({'case': f"{name} (s)", 'csv': round(csv_time, 3),
+                         'parquet': round(parquet_time, 3)})
+
+    results = pd.DataFrame(rows)
+    print(f"{n_rows} reviews")
+    print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark(*[int(arg) for arg in sys.argv[1:]])
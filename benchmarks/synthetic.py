@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+SOURCE_CSV = 'data/processed/cleaned_reviews.csv'
+CHUNK_SIZE = 500_000
+# Ratings sharing a word and length distribution
+RATING_GROUPS = {1: 'negative', 2: 'negative', 3: 'neutral', 4: 'positive', 5: 'positive'}
+# Ge'ez (Ethiopic) block, used to tell Amharic reviews apart
+GEEZ_PATTERN = '[ሀ-፿]'
+# Raw scrapes contain some repeated and empty reviews for preprocessing to drop
+DUPLICATE_SHARE = 0.01
+MISSING_SHARE = 0.005
+
+
+class ReviewProfile:
+    """Distributions of the real reviews, used to generate synthetic ones.
+
+    Calibrated on a cleaned reviews CSV: bank shares, the rating mix per
+    bank, the date spread, and per rating group (negative / neutral /
+    positive) the share of Amharic reviews, the review length in words
+    and the word frequencies, separately for Amharic and other reviews.
+    """
+
+    def __init__(self, source=SOURCE_CSV):
+        df = pd.read_csv(source).dropna(subset=['review'])
+        df['review'] = df['review'].astype(str)
+        self.source = source
+
+        bank_counts = df['bank'].value_counts()
+        self.banks = bank_counts.index.to_numpy()
+        self.bank_p = (bank_counts / bank_counts.sum()).to_numpy()
+        ratings = pd.crosstab(df['bank'], df['rating'], normalize='index')
+        self.ratings = ratings.columns.to_numpy()
+        self.rating_p = ratings.loc[self.banks].to_numpy()
+        self.dates = df['date'].to_numpy()
+
+        df['group'] = df['rating'].map(RATING_GROUPS)
+        df['amharic'] = df['review'].str.contains(GEEZ_PATTERN)
+        self.amharic_share = df.groupby('group')['amharic'].mean().to_dict()
+        self.lengths = {}
+        self.vocabulary = {}
+        for (group, amharic), reviews in df.groupby(['group', 'amharic'])['review']:
+            words = reviews.str.split()
+            self.lengths[group, amharic] = words.str.len().clip(lower=1).to_numpy()
+            counts = pd.Series([w for ws in words for w in ws]).value_counts()
+            self.vocabulary[group, amharic] = (counts.index.to_numpy(dtype=object),
+                                               (counts / counts.sum()).to_numpy())
+
+    def _texts(self, rng, group, amharic, n):
+        key = (group, amharic)
+        if key not in self.vocabulary:
+            key = (group, not amharic)
+        words, p = self.vocabulary[key]
+        lengths = rng.choice(self.lengths[key], n)
+        drawn = words[rng.choice(len(words), lengths.sum(), p=p)]
+        ends = np.cumsum(lengths)
+        return [' '.join(drawn[end - length:end]) for end, length in zip(ends, lengths)]
+
+    def sample(self, n_rows, seed=0, offset=0):
+        """n_rows raw-looking reviews with ids synthetic-{offset}... onwards"""
+        rng = np.random.default_rng(seed)
+        bank = rng.choice(len(self.banks), n_rows, p=self.bank_p)
+        # Inverse-CDF draw of each review's rating from its bank's mix
+        cdf = np.cumsum(self.rating_p, axis=1)[bank]
+        rating = self.ratings[(rng.random((n_rows, 1)) > cdf).sum(axis=1)]
+        group = pd.Series(rating).map(RATING_GROUPS).to_numpy()
+
+        reviews = np.empty(n_rows, dtype=object)
+        for name, share in self.amharic_share.items():
+            in_group = group == name
+            amharic = rng.random(n_rows) < share
+            for flag in (False, True):
+                rows = np.flatnonzero(in_group & (amharic == flag))
+                if len(rows):
+                    reviews[rows] = self._texts(rng, name, flag, len(rows))
+
+        df = pd.DataFrame({
+            'review_id': [f"synthetic-{i}" for i in range(offset, offset + n_rows)],
+            'review': reviews,
+            'rating': rating,
+            'date': rng.choice(self.dates, n_rows),
+            'bank': self.banks[bank],
+            'source': 'Google Play',
+        })
+        # Some rows repeat the nearest earlier original row, review_id included
+        repeat = rng.random(n_rows) < DUPLICATE_SHARE
+        repeat[0] = False
+        originals = np.flatnonzero(~repeat)
+        source = np.arange(n_rows)
+        source[repeat] = originals[np.searchsorted(originals, source[repeat]) - 1]
+        df = df.iloc[source].reset_index(drop=True)
+        df.loc[rng.random(n_rows) < MISSING_SHARE, 'review'] = None
+        return df
+
+
+def generate_reviews(n_rows, profile=None, seed=0, chunk_size=CHUNK_SIZE):
+    """Yield synthetic raw reviews in chunks of up to chunk_size rows"""
+    profile = profile or ReviewProfile()
+    for chunk, offset in enumerate(range(0, n_rows, chunk_size)):
+        yield profile.sample(min(chunk_size, n_rows - offset),
+                             seed=seed + chunk, offset=offset)
+
+
+def make_raw_reviews(n_rows, profile=None, seed=0):
+    """All n_rows synthetic raw reviews in one DataFrame"""
+    return pd.concat(generate_reviews(n_rows, profile, seed), ignore_index=True)
+
+
+def write_raw_reviews(path, n_rows, profile=None, seed=0):
+    """Stream n_rows synthetic raw reviews to a CSV without holding them all"""
+    start = time.perf_counter()
+    if os.path.exists(path):
+        os.remove(path)
+    for chunk in generate_reviews(n_rows, profile, seed):
+        chunk.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+    print(f"Wrote {n_rows} synthetic reviews to {path} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    write_raw_reviews(sys.argv[1], int(sys.argv[2]))
@@ -0,0 +1,61 @@
+import contextlib
+import io
+import time
+
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+
+from benchmarks.synthetic import ReviewProfile
+from src.text import TokenizedCorpus
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def clean_texts(reviews):
+    """The cleaning the themes and bank stats stages each did before"""
+    return (pd.Series(reviews, dtype=object).fillna("").astype(str)
+            .str.lower().str.replace(r'[^\w\s]', ' ', regex=True))
+
+
+def per_stage(texts):
+    """The previous approach: every stage cleans and tokenizes on its own"""
+    themes = CountVectorizer(stop_words='english', ngram_range=(1, 2))
+    themes.fit_transform(clean_texts(texts))
+    stats = CountVectorizer(stop_words='english')
+    return stats.fit_transform(clean_texts(texts))
+
+
+def shared(texts):
+    """Tokenize once, then derive both stages' term matrices from the ids"""
+    corpus = TokenizedCorpus.build(texts)
+    corpus.term_matrix(ngram_range=(1, 2))
+    return corpus.term_matrix()[0]
+
+
+def timed(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - start
+
+
+def run_benchmark(sizes=SIZES):
+    """Per-stage cleaning + CountVectorizer against one shared token array"""
+    profile = ReviewProfile()
+    rows = []
+    for n in sizes:
+        texts = profile.sample(n)['review'].tolist()
+        _, before = timed(per_stage, texts)
+        _, after = timed(shared, texts)
+        row = {'reviews': n, 'per_stage_sec': round(before, 2),
+               'shared_sec': round(after, 2), 'speedup': round(before / after, 2)}
+        rows.append(row)
+        print(row)
+
+    results = pd.DataFrame(rows)
+    print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark()
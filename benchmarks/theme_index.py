@@ -0,0 +1,57 @@
+import contextlib
+import io
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.storage import make_reviews
+from src.matcher import get_matchers
+from src.theme_index import ThemeIndex
+
+N_ROWS = 1_000_000
+QUERY = {'theme': 'Login & Account Access', 'bank': 'Dashen Bank',
+         'sentiment': 'negative', 'month': '2025-03'}
+N_RESULTS = 10
+
+
+def scan_lookup(df, n, theme, bank, sentiment, month):
+    """The previous approach: filter and substring-scan the DataFrame"""
+    matcher = get_matchers()['themes']
+    bit = 1 << matcher.labels.index(theme)
+    theme_keywords = [k for k, bits in matcher.keyword_bits.items() if bits & bit]
+    month_of = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m')
+    rows = df[(df['bank'] == bank) & (df['sentiment_label'] == sentiment)
+              & (month_of == month)]
+    text = rows['review'].astype(str).str.lower()
+    hits = text.apply(lambda review: any(k in review for k in theme_keywords))
+    return rows.loc[hits, 'review_id'].head(n).tolist()
+
+
+def run_benchmark(n_rows=N_ROWS):
+    """Index build time, and one filtered theme lookup by scan and by index"""
+    df = make_reviews(n_rows)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        index = ThemeIndex.build(df)
+        build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = scan_lookup(df, N_RESULTS, **QUERY)
+    scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = index.lookup(N_RESULTS, **QUERY)
+    lookup = time.perf_counter() - start
+
+    assert found == expected, "index and scan disagree"
+    print(f"{n_rows} reviews, query {QUERY}")
+    print(f"index build: {build:.2f}s (once)")
+    print(f"scan:        {scan * 1000:.1f} ms")
+    print(f"index:       {lookup * 1000:.2f} ms ({scan / lookup:.0f}x faster)")
+    return {'build_sec': build, 'scan_sec': scan, 'lookup_sec': lookup}
+
+
+if __name__ == "__main__":
+    run_benchmark(*[int(arg) for arg in sys.argv[1:]])
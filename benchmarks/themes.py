@@ -0,0 +1,51 @@
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.storage import make_reviews
+from src.themes import extract_keywords, extract_keywords_by_bank
+
+N_ROWS = 50_000
+BANK_COUNTS = [3, 10, 30, 100]
+
+
+def per_bank_refit(df):
+    """The previous approach: a new vectorizer fitted for every bank"""
+    return {bank: extract_keywords(df[df['bank'] == bank]['review'].tolist())
+            for bank in df['bank'].unique()}
+
+
+def timed(func, df):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func(df)
+        return time.perf_counter() - start
+
+
+def run_benchmark(n_rows=N_ROWS, bank_counts=BANK_COUNTS):
+    """Keyword extraction time as the number of banks grows"""
+    df = make_reviews(n_rows)
+    rng = np.random.default_rng(0)
+    rows = []
+
+    for n_banks in bank_counts:
+        df['bank'] = rng.choice([f"Bank {i}" for i in range(n_banks)], n_rows)
+        refit = timed(per_bank_refit, df)
+        shared = timed(extract_keywords_by_bank, df)
+        rows.append({'banks': n_banks, 'per_bank_refit_sec': round(refit, 3),
+                     'shared_matrix_sec': round(shared, 3),
+                     'speedup': round(refit / shared, 1)})
+        print(f"{n_banks} banks: refit {refit:.2f}s, shared {shared:.2f}s")
+
+    results = pd.DataFrame(rows)
+    print(f"\n{n_rows} reviews")
+    print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,70 @@
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.storage import make_reviews
+from src.aggregate_store import AggregateStore
+from src.trends import TrendStore
+
+N_ROWS = 1_000_000
+YEARS = 5
+
+
+def per_bank_loop(df, windows):
+    """The straightforward approach: filter, resample and roll each bank"""
+    df = df.assign(day=pd.to_datetime(df['date']),
+                   negative=(df['sentiment_label'] == 'negative').astype(int))
+    results = []
+    for bank in df['bank'].unique():
+        series = df[df['bank'] == bank].set_index('day').sort_index()
+        for freq, sizes in windows.items():
+            resampled = series.resample(freq).agg(
+                {'sentiment_score': ['sum', 'count'], 'negative': 'sum'})
+            for window in sizes:
+                results.append(resampled.rolling(window, min_periods=1).sum())
+    return results
+
+
+def timed(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func(*args)
+        return time.perf_counter() - start
+
+
+def run_benchmark(n_rows=N_ROWS, years=YEARS):
+    """Full trend computation and a one-day incremental update over years of history"""
+    df = make_reviews(n_rows)
+    rng = np.random.default_rng(0)
+    end = pd.Timestamp('2025-12-01')
+    days = end - pd.to_timedelta(rng.integers(1, 365 * years, n_rows), unit='D')
+    df['date'] = days.strftime('%Y-%m-%d')
+
+    trends = TrendStore(AggregateStore())
+    windows = trends.windows
+    load = timed(trends.store.add_reviews, df)
+    full = timed(trends.update)
+
+    new_day = make_reviews(5_000, seed=1)
+    new_day['review_id'] = [f"new-{i}" for i in range(len(new_day))]
+    new_day['date'] = end.strftime('%Y-%m-%d')
+    incremental = timed(trends.add_reviews, new_day)
+    refresh = timed(trends.update, end)
+    loop = timed(per_bank_loop, df, windows)
+
+    print(f"{n_rows} reviews over {years} years, windows {windows}")
+    print(f"daily aggregate load:        {load:.2f}s (once)")
+    print(f"per-bank resample loop:      {loop:.2f}s")
+    print(f"full trend update:           {full:.2f}s")
+    print(f"append one day (5k reviews): {incremental:.2f}s")
+    print(f"  of which trend refresh:    {refresh:.3f}s")
+    return {'load_sec': load, 'loop_sec': loop, 'full_sec': full,
+            'incremental_sec': incremental, 'refresh_sec': refresh}
+
+
+if __name__ == "__main__":
+    run_benchmark(*[int(arg) for arg in sys.argv[1:]])
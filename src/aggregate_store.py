@@ -0,0 +1,164 @@
+import sqlite3
+
+import pandas as pd
+
+from src.instrument import instrumented
+
+RATINGS = [1, 2, 3, 4, 5]
+STAT_COLUMNS = ['score_sum', 'score_count', 'positive_count',
+                'neutral_count', 'negative_count', 'unscored_count',
+                'total_reviews']
+UNKNOWN_DAY = 'unknown'
+# sentiment_label of reviews src.sentiment does not score
+UNSCORED_LABEL = 'unscored'
+
+
+def _upsert_sql(table, keys):
+    columns = keys + STAT_COLUMNS
+    updates = ', '.join(f"{c} = {c} + excluded.{c}" for c in STAT_COLUMNS)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}")
+
+
+class AggregateStore:
+    """Running bank x rating x day sentiment statistics in SQLite.
+
+    add_reviews merges only review_ids the store has not seen before, so
+    re-sending a batch or a late duplicate never double-counts. Per-day
+    rows are kept for time-based queries, and a bank x rating rollup is
+    updated alongside them so to_dataframe reads a table whose size
+    depends on banks and ratings, not on history length.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        stats = ', '.join(f"{c} {'REAL' if c == 'score_sum' else 'INTEGER'} "
+                          f"NOT NULL DEFAULT 0" for c in STAT_COLUMNS)
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS seen_reviews (
+                review_id TEXT PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS bank_order (
+                position INTEGER PRIMARY KEY AUTOINCREMENT,
+                bank TEXT UNIQUE NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS daily_sentiment (
+                bank TEXT NOT NULL,
+                rating INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                {stats},
+                PRIMARY KEY (bank, rating, day)
+            );
+            CREATE TABLE IF NOT EXISTS bank_rating_sentiment (
+                bank TEXT NOT NULL,
+                rating INTEGER NOT NULL,
+                {stats},
+                PRIMARY KEY (bank, rating)
+            );
+        """)
+        # Stores created before a stat column existed get it with zeros
+        for table in ('daily_sentiment', 'bank_rating_sentiment'):
+            existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            for column in STAT_COLUMNS:
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} "
+                                      f"INTEGER NOT NULL DEFAULT 0")
+        self.conn.commit()
+
+    def _new_reviews(self, df):
+        """Rows of df whose review_id is neither repeated nor already stored"""
+        batch = df.drop_duplicates(subset=['review_id'])
+        batch = batch[batch['review_id'].notna()]
+        ids = batch['review_id'].astype(str)
+
+        self.conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS batch_ids (review_id TEXT)")
+        self.conn.execute("DELETE FROM batch_ids")
+        self.conn.executemany("INSERT INTO batch_ids VALUES (?)",
+                              ((i,) for i in ids))
+        seen = {row[0] for row in self.conn.execute(
+            "SELECT b.review_id FROM batch_ids b "
+            "JOIN seen_reviews s ON s.review_id = b.review_id")}
+        self.conn.execute("DELETE FROM batch_ids")
+
+        return batch[~ids.isin(seen)]
+
+    @instrumented
+    def add_reviews(self, df):
+        """Merge a batch of scored reviews, returns the number of new reviews"""
+        new = self._new_reviews(df)
+
+        self.conn.executemany(
+            "INSERT INTO seen_reviews VALUES (?)",
+            ((str(i),) for i in new['review_id']))
+
+        new = new[new['bank'].notna() & new['rating'].isin(RATINGS)]
+        labels = new['sentiment_label']
+        day = pd.to_datetime(new['date'], errors='coerce').dt.strftime('%Y-%m-%d')
+        frame = pd.DataFrame({
+            'bank': new['bank'].astype(str),
+            'rating': new['rating'].astype('int64'),
+            'day': day.fillna(UNKNOWN_DAY),
+            'score_sum': new['sentiment_score'].fillna(0.0),
+            'score_count': new['sentiment_score'].notna().astype('int64'),
+            'positive_count': (labels == 'positive').astype('int64'),
+            'neutral_count': (labels == 'neutral').astype('int64'),
+            'negative_count': (labels == 'negative').astype('int64'),
+            'unscored_count': (labels == UNSCORED_LABEL).astype('int64'),
+            'total_reviews': 1,
+        })
+
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO bank_order (bank) VALUES (?)",
+            ((bank,) for bank in frame['bank'].unique()))
+
+        daily = frame.groupby(['bank', 'rating', 'day'], sort=False)[
+            STAT_COLUMNS].sum().reset_index()
+        totals = frame.groupby(['bank', 'rating'], sort=False)[
+            STAT_COLUMNS].sum().reset_index()
+
+        self.conn.executemany(
+            _upsert_sql('daily_sentiment', ['bank', 'rating', 'day']),
+            daily.itertuples(index=False, name=None))
+        self.conn.executemany(
+            _upsert_sql('bank_rating_sentiment', ['bank', 'rating']),
+            totals.itertuples(index=False, name=None))
+        self.conn.commit()
+
+        print(f"Merged {len(new)} new reviews "
+              f"({len(df) - len(new)} duplicates or skipped rows)")
+        return len(new)
+
+    def to_dataframe(self):
+        """Same columns and row order as aggregate_by_bank_and_rating"""
+        df = pd.read_sql_query("""
+            SELECT t.bank, t.rating,
+                   t.score_sum / NULLIF(t.score_count, 0) AS avg_sentiment_score,
+                   t.positive_count, t.neutral_count, t.negative_count,
+                   t.unscored_count, t.total_reviews
+            FROM bank_rating_sentiment t
+            JOIN bank_order o ON o.bank = t.bank
+            WHERE t.total_reviews > 0
+            ORDER BY o.position, t.rating
+        """, self.conn)
+        df['avg_sentiment_score'] = df['avg_sentiment_score'].astype(float).round(3)
+        return df
+
+    def to_csv(self, path):
+        self.to_dataframe().to_csv(path, index=False)
+        print(f"Saved aggregated sentiment to {path}")
+
+    def daily_stats(self, bank=None):
+        """Per-day rows, optionally for one bank"""
+        query = "SELECT * FROM daily_sentiment"
+        params = ()
+        if bank is not None:
+            query += " WHERE bank = ?"
+            params = (bank,)
+        return pd.read_sql_query(query + " ORDER BY bank, day, rating",
+                                 self.conn, params=params)
+
+    def close(self):
+        self.conn.close()
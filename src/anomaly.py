@@ -0,0 +1,175 @@
+import math
+import time
+
+import pandas as pd
+
+from src.aggregate_store import UNSCORED_LABEL
+from src.instrument import instrumented
+from src.matcher import get_matchers
+
+FAST_ALPHA = 0.02
+SLOW_ALPHA = 0.005
+Z_THRESHOLD = 5.0
+MIN_SHARE = 0.25
+WARMUP = 50
+# Floor on the baseline variance, so a spotless history cannot turn one
+# negative review into an alert
+MIN_VARIANCE = 0.01
+ALERT_COLUMNS = ['bank', 'theme', 'review_index', 'review_id', 'date',
+                 'negative_share', 'baseline', 'z']
+
+
+class EWMA:
+    """Exponentially weighted mean and variance in constant memory"""
+
+    __slots__ = ('alpha', 'mean', 'var', 'count')
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def update(self, value):
+        if self.count == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = self.alpha * diff
+            self.mean += increment
+            self.var = (1 - self.alpha) * (self.var + diff * increment)
+        self.count += 1
+
+
+class SeriesState:
+    """Fast and slow EWMA of one negative-indicator stream"""
+
+    __slots__ = ('fast', 'slow', 'alerting')
+
+    def __init__(self, fast_alpha, slow_alpha):
+        self.fast = EWMA(fast_alpha)
+        self.slow = EWMA(slow_alpha)
+        self.alerting = False
+
+
+class AnomalyDetector:
+    """Online detector for jumps in negative share per bank and theme.
+
+    Every scored review updates, for its bank and for each theme it
+    mentions, a fast and a slow exponentially weighted mean of "is
+    negative". A series alerts when the fast mean rises Z_THRESHOLD
+    standard errors above the slow baseline (after WARMUP reviews and at
+    least MIN_SHARE negative), and re-arms once it falls back below half
+    the threshold. State per series is a handful of floats, so memory
+    depends on banks x themes only.
+    """
+
+    def __init__(self, fast_alpha=FAST_ALPHA, slow_alpha=SLOW_ALPHA,
+                 threshold=Z_THRESHOLD, min_share=MIN_SHARE, warmup=WARMUP,
+                 themes=True, on_alert=None):
+        self.fast_alpha = fast_alpha
+        self.slow_alpha = slow_alpha
+        self.threshold = threshold
+        self.min_share = min_share
+        self.warmup = warmup
+        self.matcher = get_matchers()['themes'] if themes else None
+        self.on_alert = on_alert
+        self.noise = math.sqrt(fast_alpha / (2 - fast_alpha))
+        self.series = {}
+        self.alerts = []
+        self.processed = 0
+
+    def _update(self, key, negative, review):
+        state = self.series.get(key)
+        if state is None:
+            state = self.series[key] = SeriesState(self.fast_alpha, self.slow_alpha)
+        # Score against the baseline before this review joins it
+        fast, slow = state.fast, state.slow
+        fast.update(negative)
+        z = ((fast.mean - slow.mean)
+             / (math.sqrt(max(slow.var, MIN_VARIANCE)) * self.noise))
+        slow.update(negative)
+
+        if state.alerting:
+            if z < self.threshold / 2:
+                state.alerting = False
+        elif (slow.count > self.warmup and z >= self.threshold
+              and fast.mean >= self.min_share):
+            state.alerting = True
+            bank, theme = key
+            alert = {'bank': bank, 'theme': theme, 'review_index': self.processed,
+                     'review_id': review[0], 'date': review[1],
+                     'negative_share': round(fast.mean, 3),
+                     'baseline': round(slow.mean, 3), 'z': round(z, 2)}
+            self.alerts.append(alert)
+            if self.on_alert is not None:
+                self.on_alert(alert)
+
+    @instrumented
+    def process(self, df):
+        """Consume a batch of scored reviews in order; returns its alerts"""
+        first_alert = len(self.alerts)
+        if self.matcher is not None:
+            masks = self.matcher.mask_many(df['review'].tolist()).tolist()
+        else:
+            masks = [0] * len(df)
+        labels = self.matcher.labels if self.matcher is not None else []
+
+        rows = zip(df['bank'].tolist(), df['sentiment_label'].tolist(),
+                   df['review_id'].tolist(), df['date'].tolist(), masks)
+        for bank, label, review_id, date, mask in rows:
+            # Unscored reviews have no sentiment to add to the shares
+            if label == UNSCORED_LABEL:
+                self.processed += 1
+                continue
+            value = 1.0 if label == 'negative' else 0.0
+            review = (review_id, date)
+            self._update((bank, None), value, review)
+            while mask:
+                bit = (mask & -mask).bit_length() - 1
+                self._update((bank, labels[bit]), value, review)
+                mask &= mask - 1
+            self.processed += 1
+        return self.alerts[first_alert:]
+
+    def snapshot(self):
+        """Current fast / slow negative share of every series"""
+        return pd.DataFrame([
+            {'bank': bank, 'theme': theme, 'reviews': state.slow.count,
+             'negative_share': state.fast.mean, 'baseline': state.slow.mean,
+             'alerting': state.alerting}
+            for (bank, theme), state in self.series.items()])
+
+
+def print_alert(alert):
+    scope = alert['bank'] if alert['theme'] is None else f"{alert['bank']} / {alert['theme']}"
+    print(f"🚨 {alert['date']} {scope}: negative share {alert['negative_share']:.0%} "
+          f"vs baseline {alert['baseline']:.0%} (z={alert['z']})")
+
+
+@instrumented
+def replay_csv(path, detector=None, chunk_size=10000):
+    """Feed a scored reviews CSV to a detector in date order.
+
+    Returns the detector and a summary with throughput (reviews/sec,
+    excluding file parsing) and the number of alerts raised.
+    """
+    if detector is None:
+        detector = AnomalyDetector(on_alert=print_alert)
+    df = pd.read_csv(path)
+    df = df.sort_values('date', kind='stable', ignore_index=True)
+
+    start = time.perf_counter()
+    for offset in range(0, len(df), chunk_size):
+        detector.process(df.iloc[offset:offset + chunk_size])
+    elapsed = time.perf_counter() - start
+
+    rate = len(df) / elapsed if elapsed > 0 else 0.0
+    print(f"Replayed {len(df)} reviews in {elapsed:.2f}s ({rate:.0f} reviews/sec), "
+          f"{len(detector.alerts)} alerts over {len(detector.series)} series")
+    return detector, {'reviews': len(df), 'seconds': elapsed,
+                      'reviews_per_sec': rate, 'alerts': len(detector.alerts)}
+
+
+if __name__ == "__main__":
+    replay_csv('data/processed/reviews_with_sentiment.csv')
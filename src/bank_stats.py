@@ -0,0 +1,157 @@
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.aggregate_store import UNSCORED_LABEL
+from src.instrument import instrumented
+from src.matcher import get_matchers, keyword_postings
+from src.text import corpus_for
+
+UNKNOWN_LABEL = 'unknown'
+
+
+class BankStats:
+    """Per-bank, per-sentiment statistics precomputed in one pass.
+
+    Reviews are assigned to (bank, sentiment_label) groups once. Counts,
+    rating / score sums, keyword hit counts for every taxonomy dictionary
+    and token frequencies are then accumulated per group, so insight
+    functions answer from tables whose size depends on banks and labels,
+    not on the number of reviews. Banks keep their order of first
+    appearance, like df['bank'].unique().
+
+    taxonomies limits keyword hits to some dictionaries of the theme
+    taxonomy (default all); tokens=False skips the token frequency table,
+    which is otherwise counted from corpus when it holds df's reviews.
+    """
+
+    @instrumented(name='bank_stats.BankStats')
+    def __init__(self, df, taxonomies=None, tokens=True, corpus=None):
+        matchers = get_matchers()
+        if taxonomies is not None:
+            matchers = {name: matchers[name] for name in taxonomies}
+        start = time.perf_counter()
+
+        has_bank = df['bank'].notna().to_numpy()
+        if tokens and len(df):
+            corpus = corpus_for(df, corpus).take(has_bank)
+        df = df[has_bank]
+        bank_codes, banks = pd.factorize(df['bank'])
+        label_codes, labels = pd.factorize(
+            df['sentiment_label'].fillna(UNKNOWN_LABEL))
+        self.banks = list(banks)
+        self.labels = list(labels)
+
+        # Dense group id per review: bank-major, label-minor
+        n_groups = len(banks) * len(labels)
+        codes = bank_codes * len(labels) + label_codes
+        self.group_banks = np.repeat(np.asarray(banks, dtype=object), len(labels))
+        self.group_labels = np.tile(np.asarray(labels, dtype=object), len(banks))
+
+        def per_group(values=None):
+            return np.bincount(codes, weights=values, minlength=n_groups)
+
+        self.totals = pd.DataFrame({
+            'reviews': per_group(),
+            'review_count': per_group(df['review'].notna().to_numpy(dtype=float)),
+            'rating_sum': per_group(df['rating'].fillna(0).to_numpy(dtype=float)),
+            'rating_count': per_group(df['rating'].notna().to_numpy(dtype=float)),
+            'score_sum': per_group(df['sentiment_score'].fillna(0).to_numpy(dtype=float)),
+            'score_count': per_group(df['sentiment_score'].notna().to_numpy(dtype=float)),
+        })
+
+        # Keyword hits: one scan of the corpus for the keywords of every taxonomy
+        texts = df['review'].tolist()
+        keywords = set().union(*(m.keyword_bits for m in matchers.values()))
+        postings = keyword_postings(texts, keywords)
+        self.keyword_hits = {}
+        for name, matcher in matchers.items():
+            masks = matcher.masks_from_postings(postings, len(texts))
+            self.keyword_hits[name] = pd.DataFrame(
+                {label: per_group((masks >> bit) & 1).astype('int64')
+                 for bit, label in enumerate(matcher.labels)})
+
+        # Token frequencies: one document-term matrix, one group product
+        self.vocabulary = np.array([], dtype=object)
+        self.token_counts = sparse.csr_matrix((n_groups, 0), dtype=np.int64)
+        if tokens and len(df):
+            doc_terms, self.vocabulary = corpus.term_matrix()
+            membership = sparse.csr_matrix(
+                (np.ones(len(codes), dtype=np.int64), (codes, np.arange(len(codes)))),
+                shape=(n_groups, len(codes)))
+            self.token_counts = (membership @ doc_terms).tocsr()
+
+        self.summary = self._bank_summary()
+        print(f"Precomputed statistics for {len(self.banks)} banks x "
+              f"{len(self.labels)} sentiment labels from {len(df)} reviews in "
+              f"{time.perf_counter() - start:.2f}s")
+
+    def _select(self, bank=None, sentiment=None):
+        """Positions of the groups matching bank and/or sentiment"""
+        mask = np.ones(len(self.group_banks), dtype=bool)
+        if bank is not None:
+            mask &= self.group_banks == bank
+        if sentiment is not None:
+            mask &= self.group_labels == sentiment
+        return np.flatnonzero(mask)
+
+    def _bank_summary(self):
+        totals = self.totals.groupby(self.group_banks, sort=False).sum()
+        summary = pd.DataFrame({
+            'rating': totals['rating_sum'] / totals['rating_count'].replace(0, np.nan),
+            'sentiment_score': totals['score_sum'] / totals['score_count'].replace(0, np.nan),
+            'review': totals['review_count'].astype('int64'),
+            'reviews': totals['reviews'].astype('int64'),
+        })
+        return summary.reindex(self.banks)
+
+    def count(self, bank=None, sentiment=None):
+        """Number of reviews for a bank and/or sentiment label"""
+        reviews = self.totals['reviews'].to_numpy()
+        return int(reviews[self._select(bank, sentiment)].sum())
+
+    def scored_count(self, bank=None):
+        """Number of reviews with a sentiment score (not left unscored)"""
+        scored = self.totals['score_count'].to_numpy()
+        return int(scored[self._select(bank)].sum())
+
+    def sentiment_counts(self):
+        """Banks x sentiment labels review counts"""
+        counts = self.totals['reviews'].to_numpy().reshape(
+            len(self.banks), len(self.labels))
+        return pd.DataFrame(counts.astype('int64'), index=self.banks,
+                            columns=self.labels)
+
+    def sentiment_share(self):
+        """Share of each sentiment label over all scored reviews"""
+        counts = self.sentiment_counts().sum()
+        counts = counts.drop([UNKNOWN_LABEL, UNSCORED_LABEL], errors='ignore')
+        return counts / counts.sum()
+
+    def bank_summary(self):
+        """Mean rating, mean sentiment score and review count per bank"""
+        return self.summary.copy()
+
+    def hits(self, taxonomy, bank=None, sentiment=None):
+        """Reviews mentioning each label of a taxonomy dictionary"""
+        table = self.keyword_hits[taxonomy]
+        rows = self._select(bank, sentiment)
+        return pd.Series(table.to_numpy()[rows].sum(axis=0), index=table.columns)
+
+    def labels_hit(self, taxonomy, bank=None, sentiment=None):
+        """Labels mentioned at least once, in taxonomy order"""
+        hits = self.hits(taxonomy, bank, sentiment)
+        return hits.index[hits > 0].tolist()
+
+    def token_frequencies(self, bank=None, sentiment=None):
+        """Token -> count for a bank and/or sentiment label"""
+        counts = np.asarray(
+            self.token_counts[self._select(bank, sentiment)].sum(axis=0)).ravel()
+        present = np.flatnonzero(counts)
+        return dict(zip(self.vocabulary[present], counts[present].tolist()))
+
+    def top_tokens(self, bank=None, sentiment=None, n=20):
+        frequencies = self.token_frequencies(bank, sentiment)
+        return sorted(frequencies.items(), key=lambda item: -item[1])[:n]
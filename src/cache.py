@@ -0,0 +1,109 @@
+import hashlib
+import sqlite3
+from collections import OrderedDict
+
+from src.text import normalize_text
+
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def cache_key(text, version):
+    """Content hash of the normalized text (punctuation kept, it changes
+    scores) and the scorer version"""
+    payload = f"{version}\0{normalize_text(text, keep_punctuation=True)}".encode('utf-8')
+    return hashlib.sha1(payload).hexdigest()
+
+
+class SentimentCache:
+    """Two-tier (label, score) cache: in-memory LRU backed by optional SQLite.
+
+    Entries evicted from memory stay on disk, so a later lookup is served
+    from SQLite and promoted back into the LRU.
+    """
+
+    def __init__(self, version, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.version = version
+        self.path = path
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.stats = {'hits': 0, 'disk_hits': 0,
+                      'misses': 0, 'evictions': 0, 'writes': 0}
+
+        self.conn = None
+        if path is not None:
+            self.conn = sqlite3.connect(path)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sentiment_cache (
+                    key TEXT PRIMARY KEY,
+                    label TEXT NOT NULL,
+                    score REAL NOT NULL
+                )
+            """)
+            self.conn.commit()
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def get(self, text):
+        """Return the cached (label, score) for text, or None"""
+        key = cache_key(text, self.version)
+
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.stats['hits'] += 1
+            return self.memory[key]
+
+        if self.conn is not None:
+            row = self.conn.execute(
+                "SELECT label, score FROM sentiment_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is not None:
+                value = (row[0], row[1])
+                self._remember(key, value)
+                self.stats['hits'] += 1
+                self.stats['disk_hits'] += 1
+                return value
+
+        self.stats['misses'] += 1
+        return None
+
+    def put_many(self, items):
+        """Store an iterable of (text, label, score) in both tiers"""
+        rows = []
+        for text, label, score in items:
+            key = cache_key(text, self.version)
+            self._remember(key, (label, float(score)))
+            rows.append((key, label, float(score)))
+
+        if self.conn is not None and rows:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sentiment_cache VALUES (?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+        self.stats['writes'] += len(rows)
+
+    def put(self, text, label, score):
+        self.put_many([(text, label, score)])
+
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+    def report(self):
+        """Print hit/miss/eviction statistics"""
+        print(f"Sentiment cache ({self.version}): "
+              f"{self.stats['hits']} hits ({self.stats['disk_hits']} from disk), "
+              f"{self.stats['misses']} misses, "
+              f"{self.stats['evictions']} evictions, "
+              f"hit rate {self.hit_rate():.1%}")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
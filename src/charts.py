@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+from src.instrument import instrumented
+
+# Bump whenever a renderer's output changes, so cached charts are redrawn
+CHART_VERSION = "charts-v1"
+HASH_FILE = '.chart_hashes.json'
+BANK_SHORT_NAMES = {
+    'Commercial Bank of Ethiopia': 'CBE',
+    'Bank of Abyssinia': 'BOA',
+    'Dashen Bank': 'Dashen',
+}
+
+
+def short_name(bank):
+    return BANK_SHORT_NAMES.get(bank, bank)
+
+
+def wordcloud_filename(bank):
+    slug = re.sub(r'[^a-z0-9]+', '_', short_name(bank).lower()).strip('_')
+    return f"wordcloud_{slug}.png"
+
+
+def chart_specs(stats):
+    """One (filename, kind, data) spec per chart, data being plain JSON types.
+
+    Banks without token frequencies get no word cloud.
+    """
+    counts = stats.sentiment_counts().sort_index()
+    counts = counts[sorted(counts.columns)]
+    ratings = stats.bank_summary()['rating'].sort_index()
+
+    specs = [
+        ('sentiment_by_bank.png', 'sentiment_by_bank',
+         {'banks': counts.index.tolist(), 'labels': counts.columns.tolist(),
+          'counts': counts.to_numpy().tolist()}),
+        ('avg_ratings.png', 'avg_ratings',
+         {'banks': ratings.index.tolist(), 'ratings': ratings.tolist()}),
+    ]
+    for bank in stats.banks:
+        frequencies = stats.token_frequencies(bank)
+        if not frequencies:
+            print(f"⚠️  Warning: No tokens for {bank} (BankStats built with tokens=False?), "
+                  f"skipping its word cloud")
+            continue
+        specs.append((wordcloud_filename(bank), 'wordcloud',
+                      {'title': f"{short_name(bank)} Word Cloud",
+                       'frequencies': frequencies}))
+    return specs
+
+
+def spec_hash(kind, data):
+    payload = json.dumps([CHART_VERSION, kind, data], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def draw_chart(kind, data, new_figure):
+    """Draw one chart on new_figure(figsize=...) and return the figure"""
+    if kind == 'sentiment_by_bank':
+        fig = new_figure(figsize=(10, 6))
+        ax = fig.add_subplot()
+        counts = pd.DataFrame(data['counts'], index=data['banks'],
+                              columns=data['labels'])
+        counts.plot(kind='bar', stacked=True, ax=ax)
+        ax.set_title('Sentiment by Bank')
+        fig.tight_layout()
+    elif kind == 'avg_ratings':
+        fig = new_figure(figsize=(8, 6))
+        ax = fig.add_subplot()
+        ax.bar(data['banks'], data['ratings'])
+        ax.set_title('Average Ratings')
+    elif kind == 'wordcloud':
+        from wordcloud import WordCloud
+        wordcloud = WordCloud(width=800, height=400).generate_from_frequencies(
+            data['frequencies'])
+        fig = new_figure(figsize=(10, 5))
+        ax = fig.add_subplot()
+        ax.imshow(wordcloud)
+        ax.axis('off')
+        ax.set_title(data['title'])
+    else:
+        raise ValueError(f"Unknown chart kind: {kind}")
+    return fig
+
+
+def render_chart(spec):
+    """Render one chart to its file without pyplot.
+
+    A bare Figure draws on the non-interactive Agg canvas, so no GUI
+    backend or display is touched and nothing has to be closed.
+    """
+    path, kind, data = spec
+    fig = draw_chart(kind, data, Figure)
+    fig.savefig(path)
+    return path
+
+
+@instrumented
+def render_charts(stats, output_dir='visualizations', workers=1,
+                  headless=True, force=False):
+    """Render every chart, skipping charts whose input has not changed.
+
+    Each chart's input data is hashed (with CHART_VERSION) and compared to
+    the hash recorded in output_dir when it was last written. Headless
+    rendering draws on Agg figures, across a process pool when
+    workers > 1. With headless=False every chart is drawn through pyplot
+    and shown with plt.show(), so nothing is skipped. Returns the paths
+    rendered in this run.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    hash_path = os.path.join(output_dir, HASH_FILE)
+    hashes = {}
+    if os.path.exists(hash_path):
+        with open(hash_path, 'r') as f:
+            hashes = json.load(f)
+
+    start = time.perf_counter()
+    pending = []
+    new_hashes = {}
+    for filename, kind, data in chart_specs(stats):
+        path = os.path.join(output_dir, filename)
+        digest = spec_hash(kind, data)
+        new_hashes[filename] = digest
+        unchanged = hashes.get(filename) == digest and os.path.exists(path)
+        if headless and not force and unchanged:
+            continue
+        pending.append((path, kind, data))
+
+    if not headless:
+        import matplotlib.pyplot as plt
+        rendered = []
+        for path, kind, data in pending:
+            fig = draw_chart(kind, data, plt.figure)
+            fig.savefig(path)
+            plt.show()
+            plt.close(fig)
+            rendered.append(path)
+    elif workers > 1 and len(pending) > 1:
+        # Spawned workers: forking while other pipeline stages run threads
+        # can deadlock
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=get_context('spawn')) as pool:
+            rendered = list(pool.map(render_chart, pending))
+    else:
+        rendered = [render_chart(spec) for spec in pending]
+
+    hashes.update(new_hashes)
+    with open(hash_path, 'w') as f:
+        json.dump(hashes, f, indent=2, sort_keys=True)
+
+    skipped = len(new_hashes) - len(rendered)
+    print(f"Rendered {len(rendered)} charts ({skipped} unchanged, skipped) "
+          f"in {time.perf_counter() - start:.2f}s")
+    return rendered
@@ -1,168 +1,366 @@
+import io
+import os
+import time
+from contextlib import contextmanager
+
 import pandas as pd
 import psycopg2
+from dotenv import load_dotenv
 from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+
+from src.instrument import instrumented
+
+load_dotenv()
+
+REVIEW_COLUMNS = ['review_id', 'bank_id', 'review_text', 'rating',
+                  'review_date', 'sentiment_label', 'sentiment_score', 'source']
+COPY_CHUNK_ROWS = 100000
+SCORED_REVIEWS_CSV = '../data/processed/reviews_with_sentiment.csv'
+SUMMARY_VIEW = 'bank_rating_sentiment_summary'
+
+_pool = None
+
+
+def get_db_config(database=None):
+    """Connection settings from the environment (or a .env file)"""
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'port': os.getenv('DB_PORT', '5432'),
+        'database': database or os.getenv('DB_NAME', 'bank_reviews'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', ''),
+    }
+
+
+def get_pool():
+    """Shared connection pool for the bank_reviews database"""
+    global _pool
+    if _pool is None:
+        _pool = ThreadedConnectionPool(
+            int(os.getenv('DB_POOL_MIN', '1')),
+            int(os.getenv('DB_POOL_MAX', '5')),
+            **get_db_config()
+        )
+    return _pool
+
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
+
+
+@contextmanager
+def connection():
+    """Borrow a pooled connection, committing on success"""
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
 
 
 def create_database():
     """Create database if it doesn't exist"""
     # Connect to default 'postgres' database
-    conn = psycopg2.connect(
-        host='localhost',
-        database='postgres',  # Connect to default DB
-        user='postgres',
-        password='arwa4063',  # Your password
-        port='5432'
-    )
+    config = get_db_config()
+    database = config['database']
+    conn = psycopg2.connect(**get_db_config('postgres'))
     conn.autocommit = True  # Need this for CREATE DATABASE
     cur = conn.cursor()
 
     # Check if database exists
-    cur.execute("SELECT 1 FROM pg_database WHERE datname = 'bank_reviews'")
+    cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (database,))
     exists = cur.fetchone()
 
     if not exists:
-        cur.execute("CREATE DATABASE bank_reviews")
-        print("✅ Created 'bank_reviews' database")
+        cur.execute(f'CREATE DATABASE "{database}"')
+        print(f"✅ Created '{database}' database")
     else:
-        print("✅ 'bank_reviews' database already exists")
+        print(f"✅ '{database}' database already exists")
 
     cur.close()
     conn.close()
 
 
+@instrumented
 def setup_database():
     """Create database and tables"""
     create_database()
-    conn = psycopg2.connect(
-        host='localhost',
-        database='bank_reviews',
-        user='postgres',
-        password='arwa4063',
-        port='5432'
-    )
-    cur = conn.cursor()
+    with connection() as conn:
+        cur = conn.cursor()
 
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS banks (
-            bank_id SERIAL PRIMARY KEY,
-            bank_name VARCHAR(100) NOT NULL,
-            app_name VARCHAR(100)
-        );
-        
-        CREATE TABLE IF NOT EXISTS reviews (
-            review_id VARCHAR(100) PRIMARY KEY,
-            bank_id INTEGER REFERENCES banks(bank_id),
-            review_text TEXT,
-            rating INTEGER CHECK (rating >= 1 AND rating <= 5),
-            review_date DATE,
-            sentiment_label VARCHAR(20),
-            sentiment_score FLOAT,
-            source VARCHAR(50)
-        );
-    """)
-
-    # Insert banks
-    banks = [
-        ('Commercial Bank of Ethiopia', 'CBE Mobile'),
-        ('Bank of Abyssinia', 'BOA Mobile Banking'),
-        ('Dashen Bank', 'Dashen SCMobile')
-    ]
-    cur.executemany(
-        "INSERT INTO banks (bank_name, app_name) VALUES (%s, %s) ON CONFLICT DO NOTHING",
-        banks
-    )
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS banks (
+                bank_id SERIAL PRIMARY KEY,
+                bank_name VARCHAR(100) NOT NULL,
+                app_name VARCHAR(100)
+            );
 
-    conn.commit()
-    cur.close()
-    conn.close()
-    print("Database setup complete")
+            CREATE TABLE IF NOT EXISTS reviews (
+                review_id VARCHAR(100) PRIMARY KEY,
+                bank_id INTEGER REFERENCES banks(bank_id),
+                review_text TEXT,
+                rating INTEGER CHECK (rating >= 1 AND rating <= 5),
+                review_date DATE,
+                sentiment_label VARCHAR(20),
+                sentiment_score FLOAT,
+                source VARCHAR(50)
+            );
 
+            CREATE INDEX IF NOT EXISTS idx_reviews_bank_date
+                ON reviews (bank_id, review_date);
+            CREATE INDEX IF NOT EXISTS idx_reviews_bank_rating
+                ON reviews (bank_id, rating);
+            CREATE INDEX IF NOT EXISTS idx_reviews_sentiment_label
+                ON reviews (sentiment_label);
+        """)
 
-def insert_reviews():
-    """Insert cleaned reviews"""
-    df = pd.read_csv('../data/processed/cleaned_reviews.csv')
+        # Recreated on every setup so older databases pick up new columns
+        cur.execute(f"""
+            DROP MATERIALIZED VIEW IF EXISTS {SUMMARY_VIEW};
 
-    conn = psycopg2.connect(
-        host='localhost',
-        database='bank_reviews',
-        user='postgres',
-        password='arwa4063',
-        port='5432'
-    )
-    cur = conn.cursor()
+            CREATE MATERIALIZED VIEW {SUMMARY_VIEW} AS
+            SELECT bank_id, rating,
+                   COUNT(*) AS total_reviews,
+                   COUNT(*) FILTER (WHERE sentiment_label = 'positive') AS positive_count,
+                   COUNT(*) FILTER (WHERE sentiment_label = 'neutral') AS neutral_count,
+                   COUNT(*) FILTER (WHERE sentiment_label = 'negative') AS negative_count,
+                   COUNT(*) FILTER (WHERE sentiment_label = 'unscored') AS unscored_count,
+                   SUM(sentiment_score) AS score_sum,
+                   COUNT(sentiment_score) AS score_count
+            FROM reviews
+            GROUP BY bank_id, rating;
+
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_summary_bank_rating
+                ON {SUMMARY_VIEW} (bank_id, rating);
+        """)
 
-    # Get bank IDs from database
+        # Insert banks (bank_name has no unique constraint, so check first)
+        banks = [
+            ('Commercial Bank of Ethiopia', 'CBE Mobile'),
+            ('Bank of Abyssinia', 'BOA Mobile Banking'),
+            ('Dashen Bank', 'Dashen SCMobile')
+        ]
+        cur.executemany(
+            """INSERT INTO banks (bank_name, app_name)
+               SELECT %s, %s
+               WHERE NOT EXISTS (SELECT 1 FROM banks WHERE bank_name = %s)""",
+            [(name, app, name) for name, app in banks]
+        )
+        cur.close()
+
+    print("Database setup complete")
+
+
+def fetch_bank_ids(cur):
+    """Bank name -> bank_id, keyed by lowercase name"""
     cur.execute("SELECT bank_name, bank_id FROM banks")
-    bank_ids = {row[0]: row[1] for row in cur.fetchall()}
-
-    # Create normalized mapping (lowercase for case-insensitive comparison)
-    normalized_bank_ids = {}
-    for name, bank_id in bank_ids.items():
-        normalized_name = name.lower().strip()
-        normalized_bank_ids[normalized_name] = bank_id
-
-    records = []
-    unmatched_banks = set()
-
-    for _, row in df.iterrows():
-        csv_bank = str(row['bank']).strip()
-        normalized_csv_bank = csv_bank.lower().strip()
-
-        bank_id = normalized_bank_ids.get(normalized_csv_bank)
-
-        if bank_id:
-            records.append((
-                str(row['review_id']),
-                bank_id,
-                str(row['review']),
-                int(row['rating']),
-                row['date'],
-                'unknown',
-                0.0,
-                'Google Play'
-            ))
-        else:
-            unmatched_banks.add(csv_bank)
-
-    # Warn about any unmatched banks
-    if unmatched_banks:
-        print(
-            f"⚠️  Warning: These banks in CSV don't match database: {unmatched_banks}")
-
-    # Insert all records
-    if records:
-        insert_query = "INSERT INTO reviews VALUES %s ON CONFLICT DO NOTHING"
-        execute_values(cur, insert_query, records)
-        conn.commit()
+    return {name.lower().strip(): bank_id for name, bank_id in cur.fetchall()}
 
-    print(f"✅ Inserted {len(records)} reviews")
 
-    cur.close()
-    conn.close()
+def build_review_records(df, bank_ids):
+    """Map scored (or cleaned) reviews onto the reviews table columns.
+
+    Sentiment columns are taken from the scoring pipeline when present,
+    otherwise they are left as 'unknown' / 0.0. Returns the records frame
+    and the set of CSV bank names that did not match any bank.
+    """
+    banks = df['bank'].astype(str).str.strip()
+    bank_id = banks.str.lower().map(bank_ids)
+    matched = bank_id.notna()
+
+    records = pd.DataFrame({
+        'review_id': df['review_id'].astype(str),
+        'bank_id': bank_id,
+        'review_text': df['review'].astype(str),
+        'rating': df['rating'],
+        'review_date': df['date'],
+        'sentiment_label': df['sentiment_label'] if 'sentiment_label' in df else 'unknown',
+        # Unscored reviews (NaN) are stored as NULL, not NaN
+        'sentiment_score': (df['sentiment_score'].astype(object)
+                            .where(df['sentiment_score'].notna(), None)
+                            if 'sentiment_score' in df else 0.0),
+        'source': 'Google Play',
+    })[matched]
+    records['bank_id'] = records['bank_id'].astype(int)
+    records['rating'] = records['rating'].astype(int)
+
+    return records, set(banks[~matched])
+
+
+def refresh_summary(cur):
+    cur.execute(f"REFRESH MATERIALIZED VIEW {SUMMARY_VIEW}")
+
+
+@instrumented
+def insert_reviews(df=None, csv_path=SCORED_REVIEWS_CSV):
+    """Insert scored reviews, updating sentiment of reviews already stored"""
+    if df is None:
+        df = pd.read_csv(csv_path)
+
+    with connection() as conn:
+        cur = conn.cursor()
+        records, unmatched_banks = build_review_records(df, fetch_bank_ids(cur))
+
+        # Warn about any unmatched banks
+        if unmatched_banks:
+            print(
+                f"⚠️  Warning: These banks in CSV don't match database: {unmatched_banks}")
+
+        # Insert all records (one row per review so the upsert is valid)
+        records = records.drop_duplicates(subset=['review_id'], keep='last')
+        if len(records) > 0:
+            insert_query = """
+                INSERT INTO reviews VALUES %s
+                ON CONFLICT (review_id) DO UPDATE SET
+                    sentiment_label = EXCLUDED.sentiment_label,
+                    sentiment_score = EXCLUDED.sentiment_score
+            """
+            execute_values(cur, insert_query,
+                           list(records.itertuples(index=False, name=None)))
+        refresh_summary(cur)
+        cur.close()
+
+    print(f"✅ Inserted {len(records)} reviews")
     return len(records)
 
 
+def copy_records(cur, records, table):
+    """Stream a records frame into table with COPY FROM STDIN"""
+    buffer = io.StringIO()
+    records.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(REVIEW_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+
+@instrumented
+def bulk_insert_reviews(df=None, csv_path=SCORED_REVIEWS_CSV,
+                        chunk_rows=COPY_CHUNK_ROWS):
+    """Bulk load reviews with COPY into a staging table, then upsert.
+
+    Rows are copied chunk_rows at a time into a temporary table and merged
+    into reviews in one INSERT ... ON CONFLICT DO UPDATE, so re-loading a
+    review replaces its previous values. The summary view is refreshed
+    in the same transaction.
+    """
+    if df is None:
+        df = pd.read_csv(csv_path)
+
+    start = time.perf_counter()
+    columns = ', '.join(REVIEW_COLUMNS)
+    updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in REVIEW_COLUMNS[1:])
+
+    with connection() as conn:
+        cur = conn.cursor()
+        records, unmatched_banks = build_review_records(df, fetch_bank_ids(cur))
+
+        if unmatched_banks:
+            print(
+                f"⚠️  Warning: These banks in CSV don't match database: {unmatched_banks}")
+
+        cur.execute("""
+            CREATE TEMP TABLE reviews_staging
+            (LIKE reviews INCLUDING DEFAULTS) ON COMMIT DROP
+        """)
+        for offset in range(0, len(records), chunk_rows):
+            copy_records(cur, records.iloc[offset:offset + chunk_rows],
+                         'reviews_staging')
+
+        cur.execute(f"""
+            INSERT INTO reviews ({columns})
+            SELECT DISTINCT ON (review_id) {columns}
+            FROM reviews_staging
+            ORDER BY review_id
+            ON CONFLICT (review_id) DO UPDATE SET {updates}
+        """)
+        upserted = cur.rowcount
+        refresh_summary(cur)
+        cur.close()
+
+    elapsed = time.perf_counter() - start
+    rate = len(records) / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Bulk loaded {upserted} reviews in {elapsed:.2f}s "
+          f"({rate:.0f} rows/sec)")
+    return upserted
+
+
+@instrumented
 def verify_data():
     """Verify data integrity"""
-    conn = psycopg2.connect(
-        host='localhost',
-        database='bank_reviews',
-        user='postgres',
-        password='arwa4063',
-        port='5432'
-    )
-    cur = conn.cursor()
+    with connection() as conn:
+        cur = conn.cursor()
 
-    cur.execute("SELECT COUNT(*) FROM reviews")
-    total = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM reviews")
+        total = cur.fetchone()[0]
 
-    cur.execute("SELECT b.bank_name, COUNT(r.review_id) FROM banks b LEFT JOIN reviews r ON b.bank_id = r.bank_id GROUP BY b.bank_name")
+        cur.execute("SELECT b.bank_name, COUNT(r.review_id) FROM banks b LEFT JOIN reviews r ON b.bank_id = r.bank_id GROUP BY b.bank_name")
 
-    print(f"\n📊 Total reviews: {total}")
-    print("Reviews per bank:")
-    for bank, count in cur.fetchall():
-        print(f"  {bank}: {count}")
+        print(f"\n📊 Total reviews: {total}")
+        print("Reviews per bank:")
+        for bank, count in cur.fetchall():
+            print(f"  {bank}: {count}")
+
+        cur.close()
 
-    cur.close()
-    conn.close()
     return total
+
+
+@instrumented
+def query_bank_rating_summary():
+    """aggregate_by_bank_and_rating computed from the summary view"""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT b.bank_name, s.rating,
+                   s.score_sum / NULLIF(s.score_count, 0),
+                   s.positive_count, s.neutral_count, s.negative_count,
+                   s.unscored_count, s.total_reviews
+            FROM {SUMMARY_VIEW} s
+            JOIN banks b ON b.bank_id = s.bank_id
+            WHERE s.rating BETWEEN 1 AND 5
+            ORDER BY b.bank_id, s.rating
+        """)
+        rows = cur.fetchall()
+        cur.close()
+
+    df = pd.DataFrame(rows, columns=[
+        'bank', 'rating', 'avg_sentiment_score', 'positive_count',
+        'neutral_count', 'negative_count', 'unscored_count', 'total_reviews'])
+    df['avg_sentiment_score'] = df['avg_sentiment_score'].astype(float).round(3)
+    return df
+
+
+@instrumented
+def query_bank_comparison():
+    """compare_banks computed from the summary view"""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT b.bank_name,
+                   SUM(s.rating * s.total_reviews)::float
+                       / NULLIF(SUM(s.total_reviews) FILTER (WHERE s.rating IS NOT NULL), 0),
+                   SUM(s.score_sum) / NULLIF(SUM(s.score_count), 0),
+                   SUM(s.total_reviews)
+            FROM {SUMMARY_VIEW} s
+            JOIN banks b ON b.bank_id = s.bank_id
+            GROUP BY b.bank_name
+            ORDER BY b.bank_name
+        """)
+        rows = cur.fetchall()
+        cur.close()
+
+    df = pd.DataFrame(rows, columns=['bank', 'rating', 'sentiment_score', 'review'])
+    df = df.set_index('bank').astype(float).round(2)
+    df['review'] = df['review'].astype(int)
+    return df
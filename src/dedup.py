@@ -0,0 +1,185 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from src.text import normalize_text
+from src.instrument import instrumented
+
+NUM_PERM = 64
+BANDS = 8
+SHINGLE_SIZE = 5
+SIMILARITY = 0.8
+MIN_CHARS = 20
+CHUNK_SIZE = 20000
+SEED = 1
+# Odd 64-bit multiplier for the polynomial shingle hash
+SHINGLE_BASE = np.uint64(0x9E3779B97F4A7C15)
+
+
+def hash_parameters(num_perm=NUM_PERM, seed=SEED):
+    """Multipliers and offsets of the num_perm multiply-shift hash functions"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+    return a, b
+
+
+def shingle_hashes(texts, k=SHINGLE_SIZE):
+    """64-bit hashes of all k-character shingles, with each text's start offset.
+
+    Texts are concatenated as UTF-32 code points with k padding zeros
+    after each, so all windows are hashed at once with k shifted
+    multiply-adds; texts shorter than k yield a single padded shingle.
+    """
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    padded = ''.join(text + '\0' * k for text in texts)
+    codes = np.frombuffer(padded.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+    n_windows = len(codes) - k + 1
+    hashes = np.zeros(max(n_windows, 0), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for j in range(k):
+            hashes = hashes * SHINGLE_BASE + codes[j:j + n_windows]
+
+    starts = np.concatenate(([0], np.cumsum(lengths + k)[:-1]))
+    counts = np.maximum(lengths - k + 1, 1)
+    # Keep windows that start inside their own text (or the single padded one)
+    keep = np.repeat(starts, counts) + (np.arange(counts.sum())
+                                        - np.repeat(np.cumsum(counts) - counts, counts))
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return hashes[keep], offsets
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, k=SHINGLE_SIZE, seed=SEED):
+    """num_perm 32-bit MinHash values per text (texts already normalized)"""
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    if not texts:
+        return signatures
+    hashes, offsets = shingle_hashes(texts, k)
+    a, b = hash_parameters(num_perm, seed)
+    with np.errstate(over='ignore'):
+        for i in range(num_perm):
+            permuted = ((hashes * a[i] + b[i]) >> np.uint64(32)).astype(np.uint32)
+            signatures[:, i] = np.minimum.reduceat(permuted, offsets)
+    return signatures
+
+
+@instrumented
+def compute_signatures(texts, chunk_size=CHUNK_SIZE, workers=1,
+                       num_perm=NUM_PERM, k=SHINGLE_SIZE):
+    """MinHash signatures in chunks, optionally across a process pool"""
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    signer = partial(minhash_signatures, num_perm=num_perm, k=k)
+    if workers > 1 and len(chunks) > 1:
+        # Workers are spawned, not forked: this may run next to other threads
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=get_context('spawn')) as pool:
+            parts = list(pool.map(signer, chunks))
+    else:
+        parts = [signer(chunk) for chunk in chunks]
+    if not parts:
+        return np.empty((0, num_perm), dtype=np.uint32)
+    return np.vstack(parts)
+
+
+def candidate_pairs(signatures, eligible, bands=BANDS):
+    """Pairs of eligible texts sharing at least one LSH band bucket.
+
+    Each band's rows are folded into one 64-bit key; texts are sorted by
+    key and every member of a bucket is paired with the bucket's first
+    member, which is enough to connect the bucket.
+    """
+    rows = signatures.shape[1] // bands
+    index = np.flatnonzero(eligible)
+    multipliers = hash_parameters(rows, seed=SEED + 1)[0]
+    firsts, others = [], []
+
+    with np.errstate(over='ignore'):
+        for band in range(bands):
+            block = signatures[index, band * rows:(band + 1) * rows].astype(np.uint64)
+            keys = (block * multipliers).sum(axis=1)
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            new_bucket = np.ones(len(order), dtype=bool)
+            new_bucket[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            first = np.maximum.accumulate(
+                np.where(new_bucket, np.arange(len(order)), 0))
+            member = ~new_bucket
+            firsts.append(index[order[first[member]]])
+            others.append(index[order[member]])
+
+    if not firsts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pairs = np.unique(np.stack([np.concatenate(firsts), np.concatenate(others)]),
+                      axis=1)
+    return pairs[0], pairs[1]
+
+
+@instrumented
+def near_duplicate_clusters(texts, similarity=SIMILARITY, min_chars=MIN_CHARS,
+                            bands=BANDS, chunk_size=CHUNK_SIZE, workers=1,
+                            num_perm=NUM_PERM, k=SHINGLE_SIZE):
+    """Cluster id per text; near-identical texts share the id of their first member.
+
+    Candidate pairs from LSH are kept when their MinHash estimate of the
+    shingle Jaccard similarity is at least `similarity`, and clusters are
+    the connected components of the kept pairs. Texts shorter than
+    min_chars after normalization are never clustered.
+    """
+    normalized = [normalize_text(text) for text in texts]
+    n = len(normalized)
+    signatures = compute_signatures(normalized, chunk_size, workers, num_perm, k)
+    eligible = np.fromiter(map(len, normalized), dtype=np.int64, count=n) >= min_chars
+
+    left, right = candidate_pairs(signatures, eligible, bands)
+    estimate = np.empty(len(left))
+    for i in range(0, len(left), 100000):
+        part = slice(i, i + 100000)
+        estimate[part] = (signatures[left[part]] == signatures[right[part]]).mean(axis=1)
+    keep = estimate >= similarity
+
+    graph = sparse.coo_matrix(
+        (np.ones(keep.sum()), (left[keep], right[keep])), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    first_member = np.full(labels.max() + 1 if n else 0, n, dtype=np.int64)
+    np.minimum.at(first_member, labels, np.arange(n))
+    return first_member[labels]
+
+
+@instrumented
+def add_duplicate_clusters(df, column='review', **kwargs):
+    """Add dup_cluster (row position of the cluster's first review),
+    dup_cluster_size and dup_weight (1 / size) columns"""
+    start = time.perf_counter()
+    df = df.copy()
+    clusters = near_duplicate_clusters(df[column].tolist(), **kwargs)
+    sizes = np.bincount(clusters, minlength=len(df))[clusters]
+    df['dup_cluster'] = clusters
+    df['dup_cluster_size'] = sizes
+    df['dup_weight'] = 1.0 / sizes
+
+    elapsed = time.perf_counter() - start
+    duplicates = int((sizes > 1).sum() - (np.unique(clusters[sizes > 1]).size))
+    rate = len(df) / elapsed if elapsed > 0 else 0.0
+    print(f"Found {duplicates} near-duplicate reviews in {len(df)} "
+          f"in {elapsed:.2f}s ({rate:.0f} reviews/sec)")
+    return df
+
+
+@instrumented
+def drop_near_duplicates(df):
+    """Keep only the first review of every near-duplicate cluster"""
+    return df[df['dup_cluster'].to_numpy() == np.arange(len(df))]
+
+
+if __name__ == "__main__":
+    df = pd.read_csv('data/processed/cleaned_reviews.csv')
+    df = add_duplicate_clusters(df)
+    clustered = df[df['dup_cluster_size'] > 1].sort_values('dup_cluster')
+    print(clustered[['dup_cluster', 'bank', 'review']].head(20).to_string())
@@ -0,0 +1,254 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from src.database import REVIEW_COLUMNS, SCORED_REVIEWS_CSV, build_review_records
+from src.instrument import instrumented
+
+ENGINES = ('sqlite', 'duckdb')
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '..', 'data', 'processed')
+SUMMARY_TABLE = 'bank_rating_sentiment_summary'
+
+BANKS = [
+    (1, 'Commercial Bank of Ethiopia', 'CBE Mobile'),
+    (2, 'Bank of Abyssinia', 'BOA Mobile Banking'),
+    (3, 'Dashen Bank', 'Dashen SCMobile')
+]
+
+
+class EmbeddedDatabase:
+    """File-backed SQLite or DuckDB database with the src.database surface.
+
+    setup_database / insert_reviews / bulk_insert_reviews / verify_data /
+    query_bank_rating_summary / query_bank_comparison behave like their
+    PostgreSQL counterparts. The summary is a plain table rebuilt after
+    every load instead of a materialized view.
+    """
+
+    def __init__(self, engine='sqlite', path=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown embedded engine: {engine}")
+        self.engine = engine
+        self.path = path or os.path.join(DATA_DIR, f"bank_reviews.{engine}")
+
+        if engine == 'duckdb':
+            import duckdb
+            self.conn = duckdb.connect(self.path)
+        else:
+            self.conn = sqlite3.connect(self.path)
+
+    def _fetchall(self, query, params=()):
+        return self.conn.execute(query, params).fetchall()
+
+    @instrumented
+    def setup_database(self):
+        """Create tables, indexes and the summary table"""
+        statements = [
+            """CREATE TABLE IF NOT EXISTS banks (
+                bank_id INTEGER PRIMARY KEY,
+                bank_name VARCHAR(100) NOT NULL,
+                app_name VARCHAR(100)
+            )""",
+            """CREATE TABLE IF NOT EXISTS reviews (
+                review_id VARCHAR(100) PRIMARY KEY,
+                bank_id INTEGER REFERENCES banks(bank_id),
+                review_text TEXT,
+                rating INTEGER CHECK (rating >= 1 AND rating <= 5),
+                review_date DATE,
+                sentiment_label VARCHAR(20),
+                sentiment_score FLOAT,
+                source VARCHAR(50)
+            )""",
+            "CREATE INDEX IF NOT EXISTS idx_reviews_bank_date ON reviews (bank_id, review_date)",
+            "CREATE INDEX IF NOT EXISTS idx_reviews_bank_rating ON reviews (bank_id, rating)",
+            "CREATE INDEX IF NOT EXISTS idx_reviews_sentiment_label ON reviews (sentiment_label)",
+            f"""CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+                bank_id INTEGER,
+                rating INTEGER,
+                total_reviews BIGINT,
+                positive_count BIGINT,
+                neutral_count BIGINT,
+                negative_count BIGINT,
+                unscored_count BIGINT,
+                score_sum DOUBLE,
+                score_count BIGINT
+            )""",
+        ]
+        # The summary is derived: recreate it so older files get new columns
+        self.conn.execute(f"DROP TABLE IF EXISTS {SUMMARY_TABLE}")
+        for statement in statements:
+            self.conn.execute(statement)
+        self.refresh_summary()
+
+        for bank_id, name, app in BANKS:
+            self.conn.execute(
+                "INSERT INTO banks SELECT ?, ?, ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM banks WHERE bank_name = ?)",
+                (bank_id, name, app, name))
+        self.conn.commit()
+        print(f"Database setup complete ({self.engine}: {self.path})")
+
+    def refresh_summary(self):
+        self.conn.execute(f"DELETE FROM {SUMMARY_TABLE}")
+        self.conn.execute(f"""
+            INSERT INTO {SUMMARY_TABLE}
+            SELECT bank_id, rating,
+                   COUNT(*),
+                   SUM(CASE WHEN sentiment_label = 'positive' THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN sentiment_label = 'neutral' THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN sentiment_label = 'negative' THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN sentiment_label = 'unscored' THEN 1 ELSE 0 END),
+                   SUM(sentiment_score),
+                   COUNT(sentiment_score)
+            FROM reviews
+            GROUP BY bank_id, rating
+        """)
+
+    @instrumented
+    def bulk_insert_reviews(self, df=None, csv_path=SCORED_REVIEWS_CSV):
+        """Append (upsert) reviews in one transaction and refresh the summary.
+
+        DuckDB inserts straight from the DataFrame; SQLite uses a single
+        executemany.
+        """
+        if df is None:
+            df = pd.read_csv(csv_path)
+
+        start = time.perf_counter()
+        bank_ids = {name.lower(): bank_id for bank_id, name in
+                    self._fetchall("SELECT bank_id, bank_name FROM banks")}
+        records, unmatched_banks = build_review_records(df, bank_ids)
+        records = records.drop_duplicates(subset=['review_id'], keep='last')
+
+        if unmatched_banks:
+            print(
+                f"⚠️  Warning: These banks in CSV don't match database: {unmatched_banks}")
+
+        columns = ', '.join(REVIEW_COLUMNS)
+        updates = ', '.join(f"{c} = excluded.{c}" for c in REVIEW_COLUMNS[1:])
+        upsert = f"ON CONFLICT (review_id) DO UPDATE SET {updates}"
+
+        # DuckDB autocommits every statement unless a transaction is open;
+        # sqlite3 opens one implicitly before the first INSERT
+        if self.engine == 'duckdb':
+            self.conn.begin()
+        try:
+            if self.engine == 'duckdb':
+                self.conn.register('review_records', records)
+                self.conn.execute(
+                    f"INSERT INTO reviews ({columns}) "
+                    f"SELECT {columns} FROM review_records {upsert}")
+                self.conn.unregister('review_records')
+            else:
+                placeholders = ', '.join('?' for _ in REVIEW_COLUMNS)
+                self.conn.executemany(
+                    f"INSERT INTO reviews ({columns}) VALUES ({placeholders}) {upsert}",
+                    records.itertuples(index=False, name=None))
+
+            self.refresh_summary()
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        elapsed = time.perf_counter() - start
+        rate = len(records) / elapsed if elapsed > 0 else 0.0
+        print(f"✅ Inserted {len(records)} reviews in {elapsed:.2f}s "
+              f"({rate:.0f} rows/sec)")
+        return len(records)
+
+    insert_reviews = bulk_insert_reviews
+
+    @instrumented
+    def verify_data(self):
+        """Verify data integrity"""
+        total = self._fetchall("SELECT COUNT(*) FROM reviews")[0][0]
+        per_bank = self._fetchall(
+            "SELECT b.bank_name, COUNT(r.review_id) FROM banks b "
+            "LEFT JOIN reviews r ON b.bank_id = r.bank_id "
+            "GROUP BY b.bank_name ORDER BY b.bank_name")
+
+        print(f"\n📊 Total reviews: {total}")
+        print("Reviews per bank:")
+        for bank, count in per_bank:
+            print(f"  {bank}: {count}")
+        return total
+
+    @instrumented
+    def query_bank_rating_summary(self):
+        """aggregate_by_bank_and_rating computed from the summary table"""
+        rows = self._fetchall(f"""
+            SELECT b.bank_name, s.rating,
+                   s.score_sum / NULLIF(s.score_count, 0),
+                   s.positive_count, s.neutral_count, s.negative_count,
+                   s.unscored_count, s.total_reviews
+            FROM {SUMMARY_TABLE} s
+            JOIN banks b ON b.bank_id = s.bank_id
+            WHERE s.rating BETWEEN 1 AND 5
+            ORDER BY b.bank_id, s.rating
+        """)
+        df = pd.DataFrame(rows, columns=[
+            'bank', 'rating', 'avg_sentiment_score', 'positive_count',
+            'neutral_count', 'negative_count', 'unscored_count', 'total_reviews'])
+        df['avg_sentiment_score'] = df['avg_sentiment_score'].astype(float).round(3)
+        return df
+
+    @instrumented
+    def query_bank_comparison(self):
+        """compare_banks computed from the summary table"""
+        rows = self._fetchall(f"""
+            SELECT b.bank_name,
+                   CAST(SUM(s.rating * s.total_reviews) AS DOUBLE)
+                       / NULLIF(SUM(CASE WHEN s.rating IS NOT NULL
+                                         THEN s.total_reviews END), 0),
+                   SUM(s.score_sum) / NULLIF(SUM(s.score_count), 0),
+                   SUM(s.total_reviews)
+            FROM {SUMMARY_TABLE} s
+            JOIN banks b ON b.bank_id = s.bank_id
+            GROUP BY b.bank_name
+            ORDER BY b.bank_name
+        """)
+        df = pd.DataFrame(rows, columns=['bank', 'rating', 'sentiment_score', 'review'])
+        df = df.set_index('bank').astype(float).round(2)
+        df['review'] = df['review'].astype(int)
+        return df
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_backend(name=None, path=None):
+    """Storage backend selected by name or the DB_BACKEND setting.
+
+    'postgres' (default) returns the src.database module; 'sqlite' and
+    'duckdb' return an EmbeddedDatabase stored at path (or DB_PATH).
+    Both expose setup_database, insert_reviews, bulk_insert_reviews,
+    verify_data, query_bank_rating_summary and query_bank_comparison.
+    """
+    name = name or os.getenv('DB_BACKEND', 'postgres')
+    if name == 'postgres':
+        from src import database
+        return database
+    return EmbeddedDatabase(name, path or os.getenv('DB_PATH'))
+
+
+@contextmanager
+def open_backend(name=None, path=None):
+    """get_backend for one query: an EmbeddedDatabase is closed afterwards,
+    the PostgreSQL module keeps its shared pool"""
+    backend = get_backend(name, path)
+    try:
+        yield backend
+    finally:
+        if isinstance(backend, EmbeddedDatabase):
+            backend.close()
@@ -1,102 +1,96 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
 import json
 import os
 
-
-def load_data():
-    """Load processed data"""
-    df = pd.read_csv('../data/processed/reviews_with_sentiment.csv')
-    with open('../data/processed/bank_themes.json', 'r') as f:
+from src.bank_stats import BankStats
+from src.charts import render_charts
+from src.instrument import instrumented
+from src.storage import read_reviews_parquet
+
+INSIGHT_TAXONOMIES = ['drivers', 'pain_points', 'recommendation_triggers']
+
+
+@instrumented
+def load_data(reviews_path='../data/processed/reviews_with_sentiment.csv',
+              themes_path='../data/processed/bank_themes.json',
+              columns=None, banks=None, months=None):
+    """Load processed data.
+
+    reviews_path may be a CSV or a partitioned Parquet dataset; for Parquet
+    only the requested columns and bank/month partitions are read.
+    """
+    if reviews_path.endswith('.csv'):
+        df = pd.read_csv(reviews_path, usecols=columns)
+        if banks is not None:
+            df = df[df['bank'].isin(banks)]
+        if months is not None:
+            df = df[df['date'].astype(str).str[:7].isin(months)]
+    else:
+        df = read_reviews_parquet(reviews_path, columns=columns,
+                                  banks=banks, months=months)
+
+    with open(themes_path, 'r') as f:
         themes = json.load(f)
     return df, themes
 
 
-def identify_drivers_pain_points(df):
+@instrumented
+def identify_drivers_pain_points(df, stats=None):
     """Find what users like and hate"""
+    if stats is None:
+        stats = BankStats(df, taxonomies=[], tokens=False)
     print("🔍 Drivers & Pain Points:")
 
-    for bank in df['bank'].unique():
-        bank_df = df[df['bank'] == bank]
-
+    for bank in stats.banks:
         print(f"\n🏦 {bank}:")
         print("  📈 Drivers:")
-        positive = bank_df[bank_df['sentiment_label'] == 'positive']
-        print(f"    • {len(positive)} positive reviews")
+        print(f"    • {stats.count(bank, 'positive')} positive reviews")
 
         print("  📉 Pain Points:")
-        negative = bank_df[bank_df['sentiment_label'] == 'negative']
-        print(f"    • {len(negative)} negative reviews")
+        print(f"    • {stats.count(bank, 'negative')} negative reviews")
 
 
-def compare_banks(df):
-    """Compare all banks"""
+@instrumented
+def compare_banks(df=None, stats=None):
+    """Compare all banks (df=None queries the configured database backend)"""
     print("\n📊 Bank Comparison:")
-    comparison = df.groupby('bank').agg({
-        'rating': 'mean',
-        'sentiment_score': 'mean',
-        'review': 'count'
-    }).round(2)
+    if df is None and stats is None:
+        from src.embedded_db import open_backend
+        with open_backend() as backend:
+            comparison = backend.query_bank_comparison()
+        print(comparison)
+        return comparison
+
+    if stats is None:
+        stats = BankStats(df, taxonomies=[], tokens=False)
+    comparison = stats.bank_summary()[['rating', 'sentiment_score', 'review']]
+    comparison = comparison.sort_index().rename_axis('bank').round(2)
     print(comparison)
     return comparison
 
 
-def create_visualizations(df):
-    """Create 3 visualizations"""
-    os.makedirs('visualizations', exist_ok=True)
-
-    # Chart 1
-    plt.figure(figsize=(10, 6))
-    sentiment_counts = df.groupby(['bank', 'sentiment_label']).size().unstack()
-    sentiment_counts.plot(kind='bar', stacked=True)
-    plt.title('Sentiment by Bank')
-    plt.tight_layout()
-    plt.savefig('visualizations/sentiment_by_bank.png')
-    plt.show()
-
-    # Chart 2
-    plt.figure(figsize=(8, 6))
-    avg_ratings = df.groupby('bank')['rating'].mean()
-    plt.bar(avg_ratings.index, avg_ratings.values)
-    plt.title('Average Ratings')
-    plt.savefig('visualizations/avg_ratings.png')
-    plt.show()
-    cbe_reviews = ' '.join(
-        df[df['bank'] == 'Commercial Bank of Ethiopia']['review'].astype(str))
-    # Ensure we have some text
-    if len(cbe_reviews.strip()) == 0:
-        cbe_reviews = "bank mobile app customer service"
-
-    try:
-        wordcloud = WordCloud(width=800, height=400).generate(cbe_reviews)
-    except:
-        # If still fails, use guaranteed text
-        wordcloud = WordCloud(width=800, height=400).generate(
-            "bank banking mobile app money transfer")
-
-    plt.figure(figsize=(10, 5))
-    plt.imshow(wordcloud)
-    plt.axis('off')
-    plt.title('CBE Word Cloud')
-    plt.savefig('visualizations/wordcloud_cbe.png')
-    plt.show()
-
-    # Chart 3
-
-    wordcloud = WordCloud(width=800, height=400).generate(cbe_reviews)
-    plt.figure(figsize=(10, 5))
-    plt.imshow(wordcloud)
-    plt.axis('off')
-    plt.title('CBE Word Cloud')
-    plt.savefig('visualizations/wordcloud_cbe.png')
-    plt.show()
-
-
-def generate_recommendations(df, themes):
+@instrumented
+def create_visualizations(df, stats=None, output_dir='visualizations',
+                          workers=1, headless=False, force=False):
+    """Create the sentiment, rating and per-bank word cloud charts.
+
+    headless=True renders without a display (Agg figures, no plt.show)
+    across `workers` processes, skipping charts whose data has not changed
+    since the last run unless force=True. Otherwise every chart is shown.
+    """
+    if stats is None:
+        stats = BankStats(df, taxonomies=[])
+    return render_charts(stats, output_dir=output_dir, workers=workers,
+                         headless=headless, force=force)
+
+
+@instrumented
+def generate_recommendations(df, themes, stats=None):
     """Generate insights and recommendations as per assignment requirements"""
 
+    if stats is None:
+        stats = BankStats(df, taxonomies=INSIGHT_TAXONOMIES, tokens=False)
+
     print("\n" + "="*70)
     print("📊 INSIGHTS AND RECOMMENDATIONS")
     print("="*70)
@@ -105,54 +99,22 @@ def generate_recommendations(df, themes):
     print("\n🔍 DRIVERS & PAIN POINTS (2+ per bank):")
     print("-" * 60)
 
-    for bank in df['bank'].unique():
-        bank_df = df[df['bank'] == bank]
-        positive_reviews = bank_df[bank_df['sentiment_label'] == 'positive']
-        negative_reviews = bank_df[bank_df['sentiment_label'] == 'negative']
-
+    for bank in stats.banks:
         print(f"\n🏦 {bank.upper()}:")
 
         # DRIVERS (Positive aspects) - Extract from positive reviews
-        if len(positive_reviews) > 0:
-            pos_text = ' '.join(
-                positive_reviews['review'].astype(str).str.lower())
-            drivers = []
-
+        if stats.count(bank, 'positive') > 0:
             # Check for positive keywords
-            positive_keywords = {
-                'Fast Transactions': ['fast', 'quick', 'instant', 'speed'],
-                'Easy to Use': ['easy', 'simple', 'user-friendly', 'intuitive'],
-                'Good UI': ['interface', 'design', 'look', 'smooth', 'ui'],
-                'Reliable': ['reliable', 'stable', 'consistent', 'dependable'],
-                'Good Support': ['support', 'helpful', 'responsive', 'customer service']
-            }
-
-            for driver, keywords in positive_keywords.items():
-                if any(keyword in pos_text for keyword in keywords):
-                    drivers.append(driver)
+            drivers = stats.labels_hit('drivers', bank, 'positive')
 
             print(f"   ✅ DRIVERS ({len(drivers[:2])} shown):")
             for i, driver in enumerate(drivers[:2], 1):
                 print(f"      {i}. {driver}")
 
         # PAIN POINTS (Negative aspects) - Extract from negative reviews
-        if len(negative_reviews) > 0:
-            neg_text = ' '.join(
-                negative_reviews['review'].astype(str).str.lower())
-            pain_points = []
-
+        if stats.count(bank, 'negative') > 0:
             # Check for negative keywords
-            negative_keywords = {
-                'Slow Performance': ['slow', 'lag', 'delay', 'wait', 'loading'],
-                'App Crashes': ['crash', 'freeze', 'close', 'stop working', 'bug'],
-                'Login Issues': ['login', 'password', 'cant enter', 'access', 'sign in'],
-                'Transfer Problems': ['transfer', 'transaction', 'send money', 'failed'],
-                'Poor Support': ['support', 'help', 'response', 'ignore', 'no reply']
-            }
-
-            for pain_point, keywords in negative_keywords.items():
-                if any(keyword in neg_text for keyword in keywords):
-                    pain_points.append(pain_point)
+            pain_points = stats.labels_hit('pain_points', bank, 'negative')
 
             print(f"   ❌ PAIN POINTS ({len(pain_points[:2])} shown):")
             for i, pain_point in enumerate(pain_points[:2], 1):
@@ -163,12 +125,14 @@ def generate_recommendations(df, themes):
     print("-" * 60)
 
     comparison_data = {}
-    for bank in df['bank'].unique():
-        bank_df = df[df['bank'] == bank]
+    summary = stats.bank_summary()
+    for bank in stats.banks:
         comparison_data[bank] = {
-            'avg_rating': bank_df['rating'].mean(),
-            'positive_pct': (len(bank_df[bank_df['sentiment_label'] == 'positive']) / len(bank_df)) * 100,
-            'review_count': len(bank_df)
+            'avg_rating': summary.loc[bank, 'rating'],
+            # Over scored reviews: unscored ones have no sentiment
+            'positive_pct': (stats.count(bank, 'positive')
+                             / max(stats.scored_count(bank), 1)) * 100,
+            'review_count': stats.count(bank)
         }
 
     # Sort by average rating
@@ -178,8 +142,8 @@ def generate_recommendations(df, themes):
     print(
         f"🏆 TOP PERFORMER: {sorted_banks[0][0]} ({sorted_banks[0][1]['avg_rating']:.1f}/5)")
     print(f"📈 Rating Ranking: ", end="")
-    for i, (bank, stats) in enumerate(sorted_banks, 1):
-        print(f"{i}. {bank} ({stats['avg_rating']:.1f})",
+    for i, (bank, bank_data) in enumerate(sorted_banks, 1):
+        print(f"{i}. {bank} ({bank_data['avg_rating']:.1f})",
               end=" | " if i < len(sorted_banks) else "\n")
 
     # 3. PRACTICAL RECOMMENDATIONS (REQUIRED: 2+ improvements per bank)
@@ -202,20 +166,13 @@ def generate_recommendations(df, themes):
     }
 
     # Data-driven adjustments
-    for bank in df['bank'].unique():
-        bank_df = df[df['bank'] == bank]
-        neg_text = ' '.join(
-            bank_df[bank_df['sentiment_label'] == 'negative']['review'].astype(str).str.lower())
-
-        if 'slow' in neg_text and bank in recommendations:
-            recommendations[bank].append(
-                "3. Optimize server response time for peak hours")
-        if 'crash' in neg_text and bank in recommendations:
-            recommendations[bank].append(
-                "3. Release stability update for app crashes")
+    for bank in stats.banks:
+        if bank in recommendations:
+            recommendations[bank].extend(stats.labels_hit(
+                'recommendation_triggers', bank, 'negative'))
 
     for bank, recs in recommendations.items():
-        if bank in df['bank'].unique():
+        if bank in stats.banks:
             print(f"\n🏦 {bank}:")
             for rec in recs[:2]:
                 print(f"   • {rec}")
@@ -250,7 +207,7 @@ def generate_recommendations(df, themes):
             print(f"• Themes data analyzed successfully")
 
     # FIX: Typo correction (.lf → .1f)
-    sentiment_dist = df['sentiment_label'].value_counts(normalize=True) * 100
+    sentiment_dist = stats.sentiment_share() * 100
     print(
         f"• Overall sentiment: {sentiment_dist.get('positive', 0):.1f}% positive")
 
@@ -0,0 +1,300 @@
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('src.metrics')
+
+PROFILE_MODES = ('cprofile', 'sample')
+SAMPLE_INTERVAL = 0.005
+PROFILE_TOP = 30
+# Sized arguments / results counted as rows
+ROW_TYPES = (pd.DataFrame, pd.Series, np.ndarray, list)
+
+_config = {}
+_local = threading.local()
+_lock = threading.Lock()
+_totals = defaultdict(lambda: {'calls': 0, 'seconds': 0.0, 'rows_in': 0,
+                               'rows_out': 0, 'memory_delta_mb': 0.0})
+_profile_counts = Counter()
+_profiling = threading.Lock()
+
+
+def configure(log_path=None, prometheus_path=None, profile_dir=None,
+              profile_mode=None):
+    """Set where stage metrics go; unset options fall back to the environment.
+
+    METRICS_LOG: append one JSON line per stage call to this file
+    METRICS_PROM_PATH: keep a Prometheus text-format file of stage totals
+    PROFILE_DIR: profile every outermost stage call into this directory
+    PROFILE_MODE: 'cprofile' (default) or 'sample' (low-overhead stack sampling)
+    """
+    _config['prometheus_path'] = prometheus_path or os.getenv('METRICS_PROM_PATH') or None
+    _config['profile_dir'] = profile_dir or os.getenv('PROFILE_DIR') or None
+    _config['profile_mode'] = profile_mode or os.getenv('PROFILE_MODE') or 'cprofile'
+    if _config['profile_mode'] not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {_config['profile_mode']}")
+
+    log_path = log_path or os.getenv('METRICS_LOG') or None
+    for handler in [h for h in logger.handlers if getattr(h, 'metrics_log', False)]:
+        logger.removeHandler(handler)
+        handler.close()
+    if log_path is not None:
+        handler = logging.FileHandler(log_path, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler.metrics_log = True
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+
+def current_rss_mb():
+    """Resident set size of this process now, or None if unknown"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+
+def count_rows(value):
+    """Rows in a DataFrame / Series / array / list (first item of a tuple)"""
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if isinstance(value, ROW_TYPES):
+        return len(value)
+    return None
+
+
+class StackSampler:
+    """Samples one thread's Python stack every interval seconds.
+
+    Counts are kept per folded stack (outermost first, ';'-separated), the
+    input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def enable(self):
+        self.thread.start()
+
+    def disable(self):
+        self.done.set()
+        self.thread.join()
+
+    def report(self, top=PROFILE_TOP):
+        total = sum(self.stacks.values()) or 1
+        own = Counter()
+        for stack, count in self.stacks.items():
+            own[stack.rsplit(';', 1)[-1]] += count
+        lines = [f"{total} samples every {self.interval * 1000:.0f} ms",
+                 "", "share  samples  function (own time)"]
+        lines += [f"{count / total:5.1%}  {count:7d}  {name}"
+                  for name, count in own.most_common(top)]
+        return '\n'.join(lines) + '\n'
+
+
+def _start_profiler():
+    """Start a profiler, or return None while another stage is being profiled"""
+    if not _profiling.acquire(blocking=False):
+        return None
+    if _config['profile_mode'] == 'sample':
+        profiler = StackSampler(threading.get_ident())
+    else:
+        profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _dump_profile(name, profiler):
+    """Write the stage's hot-path report (and raw data) to the profile dir"""
+    folder = _config['profile_dir']
+    os.makedirs(folder, exist_ok=True)
+    with _lock:
+        _profile_counts[name] += 1
+        base = os.path.join(folder, f"{name}-{_profile_counts[name]}")
+
+    if isinstance(profiler, StackSampler):
+        with open(base + '.folded', 'w', encoding='utf-8') as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in profiler.stacks.items())
+        report = profiler.report()
+    else:
+        profiler.dump_stats(base + '.prof')
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        report = out.getvalue()
+    with open(base + '.txt', 'w', encoding='utf-8') as f:
+        f.write(report)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def write_prometheus(path=None):
+    """Write per-stage totals in the Prometheus text exposition format"""
+    path = path or _config['prometheus_path']
+    metrics = [
+        ('calls', 'pipeline_stage_calls_total', 'counter', 'Number of calls'),
+        ('seconds', 'pipeline_stage_seconds_total', 'counter', 'Wall time spent'),
+        ('rows_in', 'pipeline_stage_rows_in_total', 'counter', 'Rows passed in'),
+        ('rows_out', 'pipeline_stage_rows_out_total', 'counter', 'Rows returned'),
+        ('memory_delta_mb', 'pipeline_stage_memory_delta_mb', 'gauge',
+         'Change in resident memory (MB) over the last call'),
+    ]
+    with _lock:
+        totals = {name: dict(values) for name, values in _totals.items()}
+
+    lines = []
+    for key, metric, kind, description in metrics:
+        lines += [f"# HELP {metric} {description} per pipeline stage.",
+                  f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{stage="{_escape(name)}"}} {values[key]:g}'
+                  for name, values in sorted(totals.items())]
+    # Write next to the target and rename, so scrapers never see a partial file
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(temp, path)
+
+
+def stage_totals():
+    """Per-stage totals in this process (memory delta of the last call)"""
+    with _lock:
+        rows = [{'stage': name, **values} for name, values in _totals.items()]
+    return pd.DataFrame(rows, columns=['stage', 'calls', 'seconds', 'rows_in',
+                                       'rows_out', 'memory_delta_mb'])
+
+
+def reset():
+    """Forget accumulated totals (e.g. between benchmark runs)"""
+    with _lock:
+        _totals.clear()
+        _profile_counts.clear()
+
+
+class StageRecord:
+    """Rows seen by a running stage; rows_out may be set inside the block"""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+
+def _record(name, rows_in, rows_out, seconds, memory_delta, depth, parent, error):
+    record = {
+        'event': 'stage',
+        'stage': name,
+        'parent': parent,
+        'depth': depth,
+        'seconds': round(seconds, 6),
+        'rows_in': rows_in,
+        'rows_out': rows_out,
+        'rows_per_sec': round(rows_in / seconds, 1) if rows_in and seconds > 0 else None,
+        'memory_delta_mb': round(memory_delta, 2) if memory_delta is not None else None,
+        'error': error,
+    }
+    with _lock:
+        totals = _totals[name]
+        totals['calls'] += 1
+        totals['seconds'] += seconds
+        totals['rows_in'] += rows_in or 0
+        totals['rows_out'] += rows_out or 0
+        totals['memory_delta_mb'] = memory_delta or 0.0
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(record))
+    return record
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """Measure a block as a pipeline stage.
+
+    Records duration, rows in / out, throughput and the change in
+    resident memory, logs them as one JSON line on the src.metrics
+    logger and adds them to the per-stage totals. The outermost stage of
+    a thread is profiled when profiling is configured.
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    record = StageRecord(name, rows_in)
+    parent = stack[-1] if stack else None
+    profiler = (_start_profiler() if _config['profile_dir'] and parent is None
+                else None)
+    stack.append(name)
+    memory_before = current_rss_mb()
+    error = None
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        memory_after = current_rss_mb()
+        stack.pop()
+        if profiler is not None:
+            profiler.disable()
+            _profiling.release()
+            _dump_profile(name, profiler)
+        _record(name, record.rows_in, record.rows_out, seconds,
+                None if memory_before is None else memory_after - memory_before,
+                len(stack), parent, error)
+        if _config['prometheus_path'] and parent is None:
+            write_prometheus()
+
+
+def instrumented(func=None, *, name=None):
+    """Decorator running every call of a batch-level function as a stage.
+
+    The stage is named module.function; rows in are counted from the
+    first DataFrame / Series / array / list argument and rows out from
+    the result (or the first item of a returned tuple).
+    """
+    if func is None:
+        return functools.partial(instrumented, name=name)
+    stage_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        rows_in = next((count_rows(value) for value in (*args, *kwargs.values())
+                        if isinstance(value, ROW_TYPES)), None)
+        with stage(stage_name, rows_in) as record:
+            result = func(*args, **kwargs)
+            record.rows_out = count_rows(result)
+        return result
+
+    return wrapper
+
+
+configure()
@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import re
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.instrument import instrumented
+from src.text import (SEPARATOR, corpus_for, has_geez, normalize_texts, normalized_buffer,
+                      transliterate)
+
+PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'config', 'language_profiles.json')
+# en: English, am: Amharic in Ge'ez script, am-Latn: romanized Amharic,
+# other: another script, und: no letters at all (emoji, digits)
+LANGUAGES = ('en', 'am', 'am-Latn', 'other', 'und')
+# Trigram alphabet: ' ' is a word boundary, '*' any non-ASCII letter
+ALPHABET = ' abcdefghijklmnopqrstuvwxyz*'
+N_TRIGRAMS = len(ALPHABET) ** 3
+PROFILE_SIZE = 2000
+SMOOTHING = 0.5
+# Latin-script reviews count as romanized Amharic when their mean
+# log-likelihood ratio per known trigram is above MARGIN over at least
+# MIN_TRIGRAMS trigrams; shorter or less certain ones stay English
+MARGIN = 1.0
+MIN_TRIGRAMS = 4
+BATCH_SIZE = 100_000
+SEPARATOR_CODE = ord(SEPARATOR)
+# Whitespace left after NFKC; every other non-word character is a space by then
+SPACES = np.array([0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x1C, 0x1D, 0x1E, 0x1F, 0x20,
+                   0x85, 0x1680, 0x2028, 0x2029], dtype=np.uint32)
+LATIN_ONLY = re.compile(r'[\sa-z0-9_]*[a-z][\sa-z0-9_]*')
+
+
+def _codepoints(buffer):
+    return np.frombuffer(buffer.encode('utf-32-le'), dtype=np.uint32)
+
+
+def _is_geez(codes):
+    # Ethiopic, Ethiopic Supplement and Ethiopic Extended letters
+    return (((codes >= 0x1200) & (codes < 0x1360)) | ((codes >= 0x1380) & (codes < 0x13A0))
+            | ((codes >= 0x2D80) & (codes < 0x2DE0)))
+
+
+def _is_latin(codes):
+    return (((codes >= 0x61) & (codes <= 0x7A))
+            | ((codes >= 0xDF) & (codes < 0x250) & (codes != 0xF7)))
+
+
+def _is_other(codes):
+    return (codes >= 0x250) & ~_is_geez(codes) & ~np.isin(codes, SPACES)
+
+
+def trigram_ids(codes):
+    """Trigram id and text number of every letter in the code points of a
+    normalized buffer.
+
+    Each letter is the middle of one trigram over ALPHABET; digits, spaces
+    and the separator between texts are word boundaries.
+    """
+    codes = np.concatenate(([0x20], codes, [0x20])).astype(np.uint32)
+    letters = np.zeros(len(codes), dtype=np.int64)
+    ascii_letters = (codes >= 0x61) & (codes <= 0x7A)
+    letters[ascii_letters] = codes[ascii_letters] - 0x60
+    letters[(codes >= 0xDF) & ~ascii_letters & ~np.isin(codes, SPACES)] = len(ALPHABET) - 1
+
+    size = len(ALPHABET)
+    ids = (letters[:-2] * size + letters[1:-1]) * size + letters[2:]
+    text = np.cumsum(codes == SEPARATOR_CODE)[1:-1]
+    middle = letters[1:-1] > 0
+    return ids[middle], text[middle]
+
+
+def trigram_string(trigram_id):
+    size = len(ALPHABET)
+    return (ALPHABET[trigram_id // size ** 2] + ALPHABET[trigram_id // size % size]
+            + ALPHABET[trigram_id % size])
+
+
+def trigram_id(trigram):
+    size = len(ALPHABET)
+    first, second, third = (ALPHABET.index(char) for char in trigram)
+    return (first * size + second) * size + third
+
+
+class LanguageProfiles:
+    """Character trigram counts of English and romanized Amharic.
+
+    Counts are kept for the PROFILE_SIZE most frequent trigrams of each
+    language and turned into a dense log-likelihood ratio table over all
+    trigram ids, so a whole batch of texts is scored with one lookup and
+    one bincount. Trigrams neither profile knows carry no evidence.
+    """
+
+    def __init__(self, counts):
+        self.counts = counts
+        tables = {}
+        self.known = np.zeros(N_TRIGRAMS, dtype=bool)
+        for language, grams in counts.items():
+            table = np.zeros(N_TRIGRAMS)
+            table[[trigram_id(gram) for gram in grams]] = list(grams.values())
+            tables[language] = table
+            self.known |= table > 0
+
+        def log_probability(table):
+            return np.log((table + SMOOTHING) / (table.sum() + SMOOTHING * self.known.sum()))
+
+        self.log_ratio = np.where(
+            self.known, log_probability(tables['am-Latn']) - log_probability(tables['en']), 0.0)
+
+    @classmethod
+    def train(cls, texts, size=PROFILE_SIZE):
+        """Profiles from reviews: Latin-only reviews for English, the Ge'ez
+        words of the others, transliterated, for romanized Amharic"""
+        texts = normalize_texts(texts)
+        english = [text for text in texts if LATIN_ONLY.fullmatch(text)]
+        amharic = [transliterate(' '.join(word for word in text.split() if has_geez(word)))
+                   for text in texts if has_geez(text)]
+
+        counts = {}
+        for language, sample in (('en', english), ('am-Latn', amharic)):
+            ids, _ = trigram_ids(_codepoints(SEPARATOR.join(sample)))
+            totals = np.bincount(ids, minlength=N_TRIGRAMS)
+            top = np.argsort(-totals, kind='stable')[:size]
+            counts[language] = {trigram_string(i): int(totals[i]) for i in top if totals[i]}
+            print(f"{language}: {len(sample)} reviews, {len(ids)} trigrams, "
+                  f"{len(counts[language])} kept")
+        return cls(counts)
+
+    def save(self, path=PROFILES_PATH):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'alphabet': ALPHABET, 'counts': self.counts}, f, indent=1)
+
+    @classmethod
+    def load(cls, path=PROFILES_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            profiles = json.load(f)
+        if profiles['alphabet'] != ALPHABET:
+            raise ValueError(f"{path} was built for another trigram alphabet")
+        return cls(profiles['counts'])
+
+    def romanized_amharic_scores(self, codes, n_texts):
+        """Mean romanized-Amharic vs English log-likelihood ratio per text
+        (codes of a normalized buffer) and the number of known trigrams it
+        is based on"""
+        ids, text = trigram_ids(codes)
+        known = self.known[ids]
+        counts = np.bincount(text[known], minlength=n_texts)
+        sums = np.bincount(text[known], weights=self.log_ratio[ids[known]], minlength=n_texts)
+        return sums / np.maximum(counts, 1), counts
+
+
+@lru_cache(maxsize=1)
+def get_profiles():
+    """Profiles from the config file, loaded once per process"""
+    return LanguageProfiles.load()
+
+
+def detect_batch(texts, profiles=None):
+    """Language code (see LANGUAGES) of every text, as an object array.
+
+    The script of each text is the one most of its letters belong to;
+    Latin-script texts are then told apart by their character trigrams.
+    """
+    return detect_buffer(normalized_buffer(texts), len(texts), profiles)
+
+
+def detect_buffer(buffer, n, profiles=None):
+    """detect_batch for n texts already normalized and joined by SEPARATOR
+    (normalized_buffer or TokenizedCorpus.token_buffer)"""
+    profiles = profiles or get_profiles()
+    codes = _codepoints(buffer)
+    text = np.cumsum(codes == SEPARATOR_CODE)
+
+    def per_text(mask):
+        return np.bincount(text[mask], minlength=n)
+
+    geez = per_text(_is_geez(codes))
+    latin = per_text(_is_latin(codes))
+    other = per_text(_is_other(codes))
+    # Ge'ez letters count as '*' here: transliterating the whole buffer
+    # costs more than the rare mixed-script Latin review would gain
+    ratio, trigrams = profiles.romanized_amharic_scores(codes, n)
+
+    languages = np.full(n, 'en', dtype=object)
+    languages[(ratio > MARGIN) & (trigrams >= MIN_TRIGRAMS)] = 'am-Latn'
+    languages[(other > latin) & (other > geez)] = 'other'
+    languages[(geez > 0) & (geez >= latin) & (geez >= other)] = 'am'
+    languages[geez + latin + other == 0] = 'und'
+    return languages
+
+
+@instrumented
+def detect_languages(texts, batch_size=BATCH_SIZE, profiles=None):
+    """detect_batch over batches of at most batch_size texts"""
+    texts = list(texts)
+    start = time.perf_counter()
+    languages = np.empty(len(texts), dtype=object)
+    for offset in range(0, len(texts), batch_size):
+        languages[offset:offset + batch_size] = detect_batch(
+            texts[offset:offset + batch_size], profiles)
+    elapsed = time.perf_counter() - start
+    rate = len(texts) / elapsed if elapsed > 0 else 0.0
+    print(f"Detected languages of {len(texts)} reviews in {elapsed:.2f}s "
+          f"({rate:.0f} reviews/sec)")
+    return languages
+
+
+@instrumented
+def detect_corpus_languages(corpus, batch_size=BATCH_SIZE, profiles=None):
+    """detect_languages from the tokens of a TokenizedCorpus, so the text
+    is not normalized a second time"""
+    start = time.perf_counter()
+    languages = np.empty(len(corpus), dtype=object)
+    for offset in range(0, len(corpus), batch_size):
+        rows = np.arange(offset, min(offset + batch_size, len(corpus)))
+        languages[rows] = detect_buffer(corpus.take(rows).token_buffer(), len(rows), profiles)
+    elapsed = time.perf_counter() - start
+    rate = len(corpus) / elapsed if elapsed > 0 else 0.0
+    print(f"Detected languages of {len(corpus)} reviews in {elapsed:.2f}s "
+          f"({rate:.0f} reviews/sec)")
+    return languages
+
+
+@instrumented
+def add_language_column(df, column='review', corpus=None):
+    """Add a lang column with the detected language of every review
+    (from corpus, a TokenizedCorpus of df's reviews, when given)"""
+    df = df.copy()
+    if corpus is not None:
+        df['lang'] = detect_corpus_languages(corpus_for(df, corpus, column))
+    else:
+        df['lang'] = detect_languages(df[column].tolist())
+    print(f"Languages:\n{df['lang'].value_counts()}")
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Detect review languages, or rebuild the trigram profiles")
+    parser.add_argument('path', nargs='?', default='data/processed/cleaned_reviews.csv')
+    parser.add_argument('--build-profiles', action='store_true',
+                        help=f"retrain {os.path.relpath(PROFILES_PATH)} from the reviews")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.path)
+    if args.build_profiles:
+        LanguageProfiles.train(df['review'].tolist()).save()
+        get_profiles.cache_clear()
+    add_language_column(df)
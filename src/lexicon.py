@@ -0,0 +1,135 @@
+import re
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from textblob.en import sentiment as pattern_lexicon
+
+from src.instrument import instrumented
+
+NEGATIONS = ('no', 'not', "n't", 'never')
+EXCLAMATION_BOOST = 1.25
+NEGATION_FACTOR = -0.5
+
+TOKEN_PATTERN = re.compile(r"n't|[^\W_]+(?:-[^\W_]+)*|[^\w\s]")
+
+
+def tokenize(text):
+    """Lowercase and split a review the way the pattern analyzer sees it"""
+    if pd.isna(text):
+        return []
+    text = str(text).lower().replace("n't", " n't")
+    return TOKEN_PATTERN.findall(text)
+
+
+def _shift(values, starts, fill):
+    """Shift a per-token array one position right, resetting at review starts"""
+    shifted = np.empty_like(values)
+    shifted[0:1] = fill
+    shifted[1:] = values[:-1]
+    shifted[starts] = fill
+    return shifted
+
+
+class LexiconScorer:
+    """Batch polarity scorer compiled from TextBlob's pattern lexicon.
+
+    The lexicon is compiled once into dense per-word arrays (polarity,
+    intensity, modifier and negation flags). A batch of reviews is
+    tokenized in a single pass into one flat token-id vector, the
+    negation/intensifier rules are applied to the whole vector at once,
+    and per-review sums come from a single weighted bincount (the product
+    of the sparse review-by-token indicator matrix with the token scores).
+
+    Covered rules: negation directly before a word ("not good"),
+    intensifier chains ("really very good"), negated intensifiers
+    ("not very good") and compounding "!" boosts. Emoticons and negation
+    carried across short filler words are not modelled.
+    """
+
+    def __init__(self, lexicon=pattern_lexicon):
+        words = sorted(set(lexicon) | set(NEGATIONS) | {'!'})
+        self.vocabulary = {word: i + 1 for i, word in enumerate(words)}
+        size = len(words) + 1
+
+        self.known = np.zeros(size, dtype=bool)
+        self.polarity = np.zeros(size)
+        self.intensity = np.ones(size)
+        self.modifier = np.zeros(size, dtype=bool)
+        self.negation = np.zeros(size, dtype=bool)
+
+        for word, i in self.vocabulary.items():
+            if word in lexicon and None in lexicon[word]:
+                p, _, intensity = lexicon[word][None]
+                self.known[i] = True
+                self.polarity[i] = p
+                self.intensity[i] = intensity
+                self.modifier[i] = any(
+                    pos in lexicon[word] for pos in lexicon.modifiers)
+            if word in NEGATIONS:
+                self.negation[i] = True
+
+        self.exclamation = self.vocabulary['!']
+
+    @instrumented
+    def polarity_scores(self, texts):
+        """Return a numpy array with one polarity in [-1, 1] per text"""
+        tokens = [tokenize(text) for text in texts]
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64,
+                              count=len(tokens))
+        n_docs = len(tokens)
+        if lengths.sum() == 0:
+            return np.zeros(n_docs)
+
+        get = self.vocabulary.get
+        ids = np.fromiter((get(t, 0) for t in chain.from_iterable(tokens)),
+                          dtype=np.int64, count=int(lengths.sum()))
+        doc = np.repeat(np.arange(n_docs), lengths)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        starts = offsets[lengths > 0]
+
+        prev = _shift(ids, starts, 0)
+        known = self.known[ids]
+        p = self.polarity[ids]
+
+        merged = known & self.modifier[prev]
+        negated = known & ~merged & self.negation[prev]
+        prev_negated = _shift(negated, starts, False)
+
+        # A negated intensifier inverts its intensity ("not very good").
+        prev_intensity = self.intensity[prev]
+        prev_intensity = np.where(prev_negated, 1.0 / prev_intensity,
+                                  prev_intensity)
+        value = np.where(merged, np.clip(p * prev_intensity, -1.0, 1.0), p)
+        value = np.where(negated | (merged & prev_negated),
+                         NEGATION_FACTOR * value, value)
+        value = np.where(known, value, 0.0)
+
+        # A merged word replaces its modifier's assessment instead of adding one.
+        contribution = np.where(merged, value - _shift(value, starts, 0.0),
+                                value)
+        counts = known & ~merged
+
+        # Every "!" boosts the latest assessment in the same review again.
+        bang = ids == self.exclamation
+        if bang.any():
+            positions = np.arange(len(ids))
+            last = np.maximum.accumulate(np.where(known, positions, -1))
+            valid = bang & (last >= 0)
+            valid[valid] &= doc[last[valid]] == doc[valid]
+            targets, boosts = np.unique(last[valid], return_counts=True)
+            latest = value[targets]
+            boosted = np.clip(latest * EXCLAMATION_BOOST ** boosts, -1.0, 1.0)
+            contribution[targets] += boosted - latest
+
+        sums = np.bincount(doc, weights=contribution, minlength=n_docs)
+        assessments = np.bincount(doc, weights=counts, minlength=n_docs)
+        return np.divide(sums, assessments, out=np.zeros(n_docs),
+                         where=assessments > 0)
+
+
+@lru_cache(maxsize=1)
+def get_lexicon_scorer():
+    """Compile the lexicon once per process"""
+    return LexiconScorer()
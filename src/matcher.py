@@ -0,0 +1,138 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.instrument import instrumented
+
+TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'config', 'theme_taxonomy.json')
+
+
+def load_taxonomy(path=TAXONOMY_PATH):
+    """Theme, driver, pain-point and trigger keyword groups from JSON config"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def keyword_postings(texts, keywords):
+    """Sorted positions of the texts containing each (lowercase) keyword.
+
+    The lowercased texts are joined into one buffer and every keyword is
+    searched across the whole buffer at C speed; match offsets are mapped
+    back to texts with a binary search over the text starts.
+    """
+    # Lowercase each text before measuring it: lower() can change the
+    # length (e.g. 'İ' becomes two code points)
+    texts = [text.lower() if isinstance(text, str) else
+             '' if pd.isna(text) else str(text).lower() for text in texts]
+    if not texts:
+        return {keyword: np.empty(0, dtype=np.int64) for keyword in keywords}
+
+    # Keywords never contain a newline, so no match spans two texts
+    buffer = '\n'.join(texts)
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+
+    postings = {}
+    for keyword in keywords:
+        offsets = np.fromiter(
+            (m.start() for m in re.finditer(re.escape(keyword), buffer)),
+            dtype=np.int64)
+        postings[keyword] = np.unique(
+            np.searchsorted(starts, offsets, 'right') - 1)
+    return postings
+
+
+class KeywordMatcher:
+    """Multi-keyword substring matcher compiled into one regex.
+
+    groups maps a label to its keywords, in priority order. Matching keeps
+    the semantics of `any(keyword in text.lower() ...)` for every group at
+    once: a lookahead alternation (longest keywords first) finds a keyword
+    at every position in one scan, and each keyword also carries the
+    labels of any shorter keyword that is its prefix, so overlapping
+    keywords are never missed. mask_many scans a whole batch per keyword
+    instead, which is much faster for large batches.
+    """
+
+    def __init__(self, groups):
+        self.labels = list(groups)
+        keyword_bits = {}
+        for bit, keywords in enumerate(groups.values()):
+            for keyword in keywords:
+                keyword = keyword.lower()
+                keyword_bits[keyword] = keyword_bits.get(keyword, 0) | (1 << bit)
+
+        self.keyword_bits = keyword_bits
+
+        # The longest keyword matching at a position implies all of its prefixes
+        self.masks = {}
+        for keyword in keyword_bits:
+            mask = 0
+            for other, bits in keyword_bits.items():
+                if keyword.startswith(other):
+                    mask |= bits
+            self.masks[keyword] = mask
+
+        keywords = sorted(keyword_bits, key=len, reverse=True)
+        self.pattern = re.compile(
+            '(?=(' + '|'.join(map(re.escape, keywords)) + '))')
+
+    def mask(self, text):
+        """Bitmask of every group with a keyword in text"""
+        mask = 0
+        if pd.isna(text):
+            return mask
+        for keyword in self.pattern.findall(str(text).lower()):
+            mask |= self.masks[keyword]
+        return mask
+
+    def postings(self, texts):
+        """Sorted positions of the texts containing each keyword"""
+        return keyword_postings(texts, self.keyword_bits)
+
+    def masks_from_postings(self, postings, n_texts):
+        """Per-text bitmasks from keyword postings (of these or more keywords)"""
+        if len(self.labels) > 63:
+            raise ValueError("mask_many supports at most 63 keyword groups")
+        masks = np.zeros(n_texts, dtype=np.int64)
+        for keyword, bits in self.keyword_bits.items():
+            masks[postings[keyword]] |= bits
+        return masks
+
+    @instrumented
+    def mask_many(self, texts):
+        """One bitmask per text as an int64 array (up to 63 groups)"""
+        return self.masks_from_postings(self.postings(texts), len(texts))
+
+    def labels_for(self, mask):
+        return [label for bit, label in enumerate(self.labels)
+                if mask & (1 << bit)]
+
+    def match(self, text):
+        """All matching labels, in group order"""
+        return self.labels_for(self.mask(text))
+
+    def first(self, text):
+        """Highest-priority matching label, or None"""
+        mask = self.mask(text)
+        if mask == 0:
+            return None
+        return self.labels[(mask & -mask).bit_length() - 1]
+
+
+def build_matchers(taxonomy=None):
+    """One compiled matcher per keyword dictionary in the taxonomy"""
+    if taxonomy is None:
+        taxonomy = load_taxonomy()
+    return {name: KeywordMatcher(groups) for name, groups in taxonomy.items()}
+
+
+@lru_cache(maxsize=1)
+def get_matchers():
+    """Matchers for the default taxonomy, compiled once per process"""
+    return build_matchers()
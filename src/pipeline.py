@@ -0,0 +1,526 @@
+import argparse
+import ast
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from src.instrument import instrumented
+from src.language import PROFILES_PATH
+from src.matcher import TAXONOMY_PATH
+
+# Bump when the runner changes how stages are invoked, so every stage reruns
+PIPELINE_VERSION = 1
+CACHE_PATH = 'data/processed/.pipeline_cache.json'
+PATHS = {
+    'raw': 'data/raw/raw_reviews.csv',
+    'checkpoints': 'data/raw/scrape_checkpoints.json',
+    'cleaned': 'data/processed/cleaned_reviews.csv',
+    'duplicates': 'data/processed/review_duplicates.csv',
+    'languages': 'data/processed/review_languages.csv',
+    'scored': 'data/processed/reviews_with_sentiment.csv',
+    'tokens': 'data/processed/review_tokens.npz',
+    'themes': 'data/processed/bank_themes.json',
+    'review_themes': 'data/processed/review_themes.csv',
+    'theme_index': 'data/processed/theme_index.npz',
+    'aggregate': 'data/processed/sentiment_by_bank_rating.csv',
+    'comparison': 'data/processed/bank_comparison.csv',
+    'charts': 'visualizations',
+}
+HASH_BLOCK = 1 << 20
+
+logger = logging.getLogger('src.pipeline')
+
+
+@instrumented
+def run_scrape(paths, config):
+    from src.scraper import scrape_new_reviews
+    scrape_new_reviews(paths['raw'], paths['checkpoints'], workers=config['workers'])
+
+
+@instrumented
+def run_preprocess(paths, config):
+    from src.preprocess import preprocess_reviews
+    df = preprocess_reviews(pd.read_csv(paths['raw']))
+    df.to_csv(paths['cleaned'], index=False)
+
+
+@instrumented
+def run_tokenize(paths, config):
+    from src.text import TokenizedCorpus
+    df = pd.read_csv(paths['cleaned'])
+    TokenizedCorpus.build(df['review'].tolist(), df['review_id'].tolist()).save(paths['tokens'])
+
+
+@instrumented
+def run_dedup(paths, config):
+    from src.dedup import add_duplicate_clusters
+    df = add_duplicate_clusters(pd.read_csv(paths['cleaned']), workers=config['workers'])
+    df[['review_id', 'dup_cluster', 'dup_cluster_size', 'dup_weight']].to_csv(
+        paths['duplicates'], index=False)
+
+
+@instrumented
+def run_language(paths, config):
+    from src.language import add_language_column
+    from src.text import TokenizedCorpus
+    df = add_language_column(pd.read_csv(paths['cleaned']),
+                             corpus=TokenizedCorpus.load(paths['tokens']))
+    df[['review_id', 'lang']].to_csv(paths['languages'], index=False)
+
+
+@instrumented
+def run_sentiment(paths, config):
+    from src.sentiment import perform_sentiment_analysis
+    df = pd.read_csv(paths['cleaned'])
+    for name in ('languages', 'duplicates'):
+        df = df.merge(pd.read_csv(paths[name]), on='review_id', how='left')
+    df = perform_sentiment_analysis(df,
+                                    workers=config['workers'],
+                                    backend=config['backend'])
+    df.to_csv(paths['scored'], index=False)
+
+
+@instrumented
+def run_themes(paths, config):
+    from src.text import TokenizedCorpus
+    from src.themes import analyze_themes_by_bank
+    bank_themes = analyze_themes_by_bank(pd.read_csv(paths['scored']),
+                                         corpus=TokenizedCorpus.load(paths['tokens']))
+    with open(paths['themes'], 'w') as f:
+        json.dump(bank_themes, f, indent=2)
+
+
+@instrumented
+def run_theme_index(paths, config):
+    from src.theme_index import THEME_COLUMN, ThemeIndex, assign_themes
+    df = assign_themes(pd.read_csv(paths['scored']))
+    df[['review_id', THEME_COLUMN]].to_csv(paths['review_themes'], index=False)
+    ThemeIndex.build(df).save(paths['theme_index'])
+
+
+@instrumented
+def run_aggregate(paths, config):
+    from src.dedup import drop_near_duplicates
+    from src.sentiment import aggregate_by_bank_and_rating
+    df = pd.read_csv(paths['scored'])
+    if config['dedup'] == 'drop':
+        df = drop_near_duplicates(df)
+    aggregated = aggregate_by_bank_and_rating(df)
+    aggregated.to_csv(paths['aggregate'], index=False)
+
+
+@instrumented
+def run_load(paths, config):
+    from src.embedded_db import get_backend
+    backend = get_backend(config['db_backend'], config['db_path'])
+    try:
+        backend.setup_database()
+        backend.bulk_insert_reviews(pd.read_csv(paths['scored']))
+    finally:
+        if hasattr(backend, 'close'):
+            backend.close()
+        elif hasattr(backend, 'close_pool'):
+            backend.close_pool()
+
+
+@instrumented
+def run_insights(paths, config):
+    from src.bank_stats import BankStats
+    from src.insights import (INSIGHT_TAXONOMIES, compare_banks, create_visualizations,
+                              generate_recommendations, identify_drivers_pain_points)
+    from src.text import TokenizedCorpus
+    df = pd.read_csv(paths['scored'])
+    with open(paths['themes'], 'r') as f:
+        themes = json.load(f)
+    stats = BankStats(df, taxonomies=INSIGHT_TAXONOMIES,
+                      corpus=TokenizedCorpus.load(paths['tokens']))
+    identify_drivers_pain_points(df, stats)
+    compare_banks(df, stats).to_csv(paths['comparison'])
+    create_visualizations(df, stats, output_dir=paths['charts'],
+                          workers=config['workers'], headless=True)
+    generate_recommendations(df, themes, stats)
+
+
+def load_fingerprint(paths, config, cache):
+    """Hash of the loaded database's bank x rating summary, or None if it
+    cannot be read (e.g. the database was wiped)"""
+    from src.embedded_db import open_backend
+    try:
+        with open_backend(config['db_backend'], config['db_path']) as backend:
+            summary = backend.query_bank_rating_summary()
+    except Exception:
+        return None
+    return hashlib.sha1(summary.to_csv(index=False).encode('utf-8')).hexdigest()
+
+
+def charts_fingerprint(paths, config, cache):
+    """Hashes of the chart hash file and every chart it lists"""
+    from src.charts import HASH_FILE
+    hash_path = os.path.join(paths['charts'], HASH_FILE)
+    if not os.path.exists(hash_path):
+        return None
+    with open(hash_path, 'r') as f:
+        filenames = sorted(json.load(f))
+    return {name: cache.file_hash(os.path.join(paths['charts'], name))
+            for name in [HASH_FILE, *filenames]}
+
+
+class Stage:
+    """One pipeline step: the files it reads and writes, the modules whose
+    source is its code version, and the config keys its output depends on.
+
+    Outputs that are not files (a database, a directory of charts) are
+    covered by fingerprint(paths, config, cache), a JSON value that changes
+    when they do.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), deps=(), modules=(),
+                 files=(), config_keys=(), source=False, fingerprint=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.modules = list(modules)
+        self.files = list(files)
+        self.config_keys = list(config_keys)
+        # Source stages fetch external data: they only run when forced or
+        # when their output is missing
+        self.source = source
+        self.fingerprint = fingerprint
+
+
+STAGES = [
+    Stage('scrape', run_scrape, outputs=['raw'], modules=['src.scraper'],
+          source=True),
+    Stage('preprocess', run_preprocess, inputs=['raw'], outputs=['cleaned'],
+          deps=['scrape'], modules=['src.preprocess']),
+    Stage('tokenize', run_tokenize, inputs=['cleaned'], outputs=['tokens'],
+          deps=['preprocess'], modules=['src.text']),
+    Stage('dedup', run_dedup, inputs=['cleaned'], outputs=['duplicates'],
+          deps=['preprocess'], modules=['src.dedup']),
+    Stage('language', run_language, inputs=['cleaned', 'tokens'], outputs=['languages'],
+          deps=['preprocess', 'tokenize'], modules=['src.language', 'src.text'],
+          files=[PROFILES_PATH]),
+    Stage('sentiment', run_sentiment, inputs=['cleaned', 'languages', 'duplicates'],
+          outputs=['scored'], deps=['preprocess', 'language', 'dedup'],
+          modules=['src.sentiment', 'src.lexicon', 'src.cache'], config_keys=['backend']),
+    Stage('themes', run_themes, inputs=['scored', 'tokens'], outputs=['themes'],
+          deps=['sentiment', 'tokenize'], modules=['src.themes', 'src.matcher', 'src.text'],
+          files=[TAXONOMY_PATH]),
+    Stage('theme_index', run_theme_index, inputs=['scored'],
+          outputs=['review_themes', 'theme_index'], deps=['sentiment'],
+          modules=['src.theme_index', 'src.matcher', 'src.storage'], files=[TAXONOMY_PATH]),
+    Stage('aggregate', run_aggregate, inputs=['scored'], outputs=['aggregate'],
+          deps=['sentiment'], modules=['src.sentiment', 'src.aggregate_store', 'src.dedup'],
+          config_keys=['dedup']),
+    Stage('load', run_load, inputs=['scored'], deps=['sentiment'],
+          modules=['src.database', 'src.embedded_db'],
+          config_keys=['db_backend', 'db_path'], fingerprint=load_fingerprint),
+    Stage('insights', run_insights, inputs=['scored', 'themes', 'tokens'],
+          outputs=['comparison'], deps=['sentiment', 'themes', 'tokenize'],
+          modules=['src.insights', 'src.bank_stats', 'src.charts', 'src.matcher',
+                   'src.text'],
+          files=[TAXONOMY_PATH], config_keys=['charts'], fingerprint=charts_fingerprint),
+]
+STAGE_NAMES = [stage.name for stage in STAGES]
+
+
+def default_config():
+    return {
+        'workers': 1,
+        'backend': 'textblob',
+        'db_backend': os.getenv('DB_BACKEND', 'sqlite'),
+        'db_path': os.getenv('DB_PATH') or None,
+        'charts': PATHS['charts'],
+        'dedup': 'keep',
+    }
+
+
+class PipelineCache:
+    """Stage keys and output hashes from earlier runs, kept in a JSON file.
+
+    File hashes are remembered with the size and mtime they were computed
+    for, so unchanged files are not re-read on every run.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {'stages': {}, 'files': {}}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.data = json.load(f)
+
+    def file_hash(self, path):
+        """SHA-1 of a file's content, or None if it does not exist"""
+        if not os.path.exists(path):
+            return None
+        info = os.stat(path)
+        with self.lock:
+            known = self.data['files'].get(path)
+        if known and known['size'] == info.st_size and known['mtime_ns'] == info.st_mtime_ns:
+            return known['sha1']
+
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b''):
+                digest.update(block)
+        with self.lock:
+            self.data['files'][path] = {'size': info.st_size,
+                                        'mtime_ns': info.st_mtime_ns,
+                                        'sha1': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def get(self, stage):
+        with self.lock:
+            return self.data['stages'].get(stage)
+
+    def record(self, stage, key, outputs):
+        with self.lock:
+            self.data['stages'][stage] = {'key': key, 'outputs': outputs,
+                                          'finished': time.strftime('%Y-%m-%dT%H:%M:%S')}
+            self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp = f"{self.path}.tmp"
+        with open(temp, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(temp, self.path)
+
+
+def source_path(module):
+    return importlib.util.find_spec(module).origin
+
+
+def source_hash(module):
+    """SHA-1 of a module's source file, its code version"""
+    with open(source_path(module), 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def imported_modules(module):
+    """src.* modules imported anywhere in a module, including inside functions"""
+    with open(source_path(module), 'rb') as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            if node.module == 'src':
+                names.update(f"src.{alias.name}" for alias in node.names)
+            else:
+                names.add(node.module)
+    return {name for name in names if name.startswith('src.')}
+
+
+def module_closure(modules):
+    """The modules and every src.* module they import, transitively"""
+    seen = set()
+    pending = list(modules)
+    while pending:
+        module = pending.pop()
+        if module not in seen:
+            seen.add(module)
+            pending.extend(imported_modules(module))
+    return sorted(seen)
+
+
+def stage_key(stage, paths, config, cache):
+    """Hash of the stage's code, config and input file contents.
+
+    The code version covers the stage's modules with everything they
+    import from src, plus this module, which holds the stage functions.
+    """
+    code = {module: source_hash(module) for module in module_closure(stage.modules)}
+    code[__name__] = source_hash(__name__)
+    payload = {
+        'pipeline': PIPELINE_VERSION,
+        'stage': stage.name,
+        'code': code,
+        'files': {path: cache.file_hash(path) for path in stage.files},
+        'config': {key: config[key] for key in stage.config_keys},
+        'inputs': {name: cache.file_hash(paths[name]) for name in stage.inputs},
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def output_hashes(stage, paths, config, cache):
+    """Content hash of every output file, plus the stage's fingerprint"""
+    hashes = {name: cache.file_hash(paths[name]) for name in stage.outputs}
+    if stage.fingerprint is not None:
+        hashes['fingerprint'] = stage.fingerprint(paths, config, cache)
+    return hashes
+
+
+def is_fresh(stage, key, paths, config, cache):
+    """True when the last run had the same key and its outputs are untouched"""
+    if stage.source:
+        return all(os.path.exists(paths[name]) for name in stage.outputs)
+    previous = cache.get(stage.name)
+    if previous is None or previous['key'] != key:
+        return False
+    current = output_hashes(stage, paths, config, cache)
+    return all(value == previous['outputs'].get(name)
+               for name, value in current.items())
+
+
+def select_stages(targets=None):
+    """The target stages and everything upstream of them, in pipeline order"""
+    by_name = {stage.name: stage for stage in STAGES}
+    needed = set()
+    pending = list(targets or STAGE_NAMES)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(by_name[name].deps)
+    return [stage for stage in STAGES if stage.name in needed]
+
+
+def run_pipeline(targets=None, force=(), config=None, paths=None, jobs=2,
+                 cache_path=CACHE_PATH, dry_run=False):
+    """Run the target stages and their dependencies, skipping fresh ones.
+
+    Stages start as soon as their dependencies have finished, up to `jobs`
+    at a time, so themes, aggregate and load run side by side. A stage is
+    skipped when its key (code version, config and input hashes) matches
+    the cached one and its outputs are unchanged; 'all' in force reruns
+    everything. Progress is logged per stage on the src.pipeline logger
+    (see configure_logging); sys.stdout is left alone, so the stages' own
+    output is printed unprefixed. Returns {stage: 'ran' | 'skipped' |
+    'would run' | 'failed' | 'blocked'}.
+    """
+    config = {**default_config(), **(config or {})}
+    paths = {**PATHS, **(paths or {}), 'charts': config['charts']}
+    stages = select_stages(targets)
+    force = set(STAGE_NAMES if 'all' in force else force)
+    cache = PipelineCache(cache_path)
+    selected = {stage.name for stage in stages}
+    status = {}
+    changed = set()
+
+    def execute(stage):
+        log = logging.LoggerAdapter(logger, {'stage': stage.name})
+        start = time.perf_counter()
+        key = stage_key(stage, paths, config, cache)
+        # A dry run cannot see the new outputs of upstream stages
+        upstream_changed = dry_run and any(dep in changed for dep in stage.deps)
+        if (stage.name not in force and not upstream_changed
+                and is_fresh(stage, key, paths, config, cache)):
+            log.info("up to date, skipped")
+            return 'skipped'
+        if dry_run:
+            log.info("would run")
+            return 'would run'
+        log.info("running")
+        stage.func(paths, config)
+        cache.record(stage.name, key, output_hashes(stage, paths, config, cache))
+        log.info(f"done in {time.perf_counter() - start:.2f}s")
+        return 'ran'
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+            running = {}
+            while len(status) < len(stages):
+                for stage in stages:
+                    if stage.name in status or stage.name in running.values():
+                        continue
+                    deps = [dep for dep in stage.deps if dep in selected]
+                    if any(status.get(dep) in ('failed', 'blocked') for dep in deps):
+                        status[stage.name] = 'blocked'
+                    elif all(dep in status for dep in deps):
+                        running[pool.submit(execute, stage)] = stage.name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        status[name] = future.result()
+                    except Exception as e:
+                        status[name] = 'failed'
+                        logger.error(f"failed: {type(e).__name__}: {e}",
+                                     extra={'stage': name})
+                    if status[name] == 'would run':
+                        changed.add(name)
+    finally:
+        cache.save()
+
+    print(f"\nPipeline finished in {time.perf_counter() - start:.1f}s")
+    for stage in stages:
+        print(f"  {stage.name:<11} {status[stage.name]}")
+    return status
+
+
+def configure_logging():
+    """Print runner messages as "[stage] message" on stdout"""
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('[%(stage)s] %(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m src.pipeline',
+        description="Run the review pipeline, skipping stages whose inputs, "
+                    "code and config are unchanged.")
+    parser.add_argument('targets', nargs='*', metavar='STAGE', help=f"stages to bring up to date "
+                        f"(default: all of {', '.join(STAGE_NAMES)})")
+    parser.add_argument('--force', nargs='+', default=[], metavar='STAGE',
+                        choices=STAGE_NAMES + ['all'],
+                        help="rerun these stages even if cached ('all' for every stage)")
+    parser.add_argument('--jobs', type=int, default=2,
+                        help="stages run at the same time (default 2)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="workers inside each stage (default 1)")
+    parser.add_argument('--backend', default='textblob', choices=['textblob', 'lexicon'],
+                        help="sentiment scorer")
+    parser.add_argument('--db-backend', default=None,
+                        help="postgres, sqlite or duckdb (default: DB_BACKEND, "
+                             "else sqlite)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="show which stages would run")
+    parser.add_argument('--drop-duplicates', action='store_true',
+                        help="aggregate without near-duplicate reviews")
+    parser.add_argument('--raw', default=None,
+                        help="use this raw reviews CSV instead of scraping")
+    args = parser.parse_args(argv)
+    configure_logging()
+    unknown = set(args.targets) - set(STAGE_NAMES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    force = args.force
+    if args.raw:
+        # Never scrape into a file the user passed in
+        if 'scrape' in force:
+            parser.error("--force scrape cannot be combined with --raw")
+        if 'all' in force:
+            force = [name for name in STAGE_NAMES if name != 'scrape']
+
+    config = {'workers': args.workers, 'backend': args.backend,
+              'dedup': 'drop' if args.drop_duplicates else 'keep'}
+    if args.db_backend:
+        config['db_backend'] = args.db_backend
+    paths = {'raw': args.raw} if args.raw else None
+    status = run_pipeline(args.targets or None, force, config, paths,
+                          jobs=args.jobs, dry_run=args.dry_run)
+    return 1 if any(value in ('failed', 'blocked') for value in status.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,56 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from src.instrument import instrumented
 
+
+class SeenIds:
+    """Compact set of review_ids seen so far, stored as sorted 64-bit hashes"""
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def filter_new(self, ids):
+        """Mask of first occurrences of unseen ids; remembers them"""
+        hashes = pd.util.hash_pandas_object(
+            ids.astype(str), index=False).to_numpy()
+        positions = np.searchsorted(self.hashes, hashes)
+        found = np.zeros(len(hashes), dtype=bool)
+        in_range = positions < len(self.hashes)
+        found[in_range] = self.hashes[positions[in_range]] == hashes[in_range]
+
+        new = ~found & ~pd.Series(hashes).duplicated().to_numpy()
+        # Merge the sorted new hashes in instead of re-sorting the whole set
+        added = np.sort(hashes[new])
+        self.hashes = np.insert(self.hashes,
+                                np.searchsorted(self.hashes, added), added)
+        return new
+
+
+def normalize_dates(df):
+    """Fill missing dates with today and format all dates as YYYY-MM-DD"""
+    df['date'] = df['date'].fillna(pd.Timestamp.now().strftime('%Y-%m-%d'))
+
+    try:
+        df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+    except Exception as e:
+        print(f"Date formatting warning: {e}")
+
+    return df
+
+
+@instrumented
+def preprocess_chunk(df, seen):
+    """Quiet preprocess_reviews for one chunk, deduplicating against seen"""
+    df = df[seen.filter_new(df['review_id'])]
+    df = df.dropna(subset=['review'])
+    return normalize_dates(df)
+
+
+@instrumented
 def preprocess_reviews(df):
 
     print("Starting data preprocessing...")
@@ -15,15 +64,10 @@ def preprocess_reviews(df):
     missing_before = df.isnull().sum()
     df = df.dropna(subset=['review'])
 
-    df['date'] = df['date'].fillna(pd.Timestamp.now().strftime('%Y-%m-%d'))
-
     print(
         f"Missing data handled. Removed {missing_before['review'] - df['review'].isnull().sum()} rows with missing reviews")
 
-    try:
-        df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
-    except Exception as e:
-        print(f"Date formatting warning: {e}")
+    df = normalize_dates(df)
 
     print(f"Final data shape: {df.shape}")
     print(f"Reviews per bank:\n{df['bank'].value_counts()}")
@@ -1,74 +1,364 @@
-
 import pandas as pd
 from google_play_scraper import reviews, Sort
+import argparse
+import json
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from src.instrument import instrumented
+
+try:
+    # Private class; without it stored tokens are dropped and crawls restart
+    # from the newest page
+    from google_play_scraper.features.reviews import _ContinuationToken
+except ImportError:
+    _ContinuationToken = None
+
+BANK_APPS = {
+    'Commercial Bank of Ethiopia': 'com.combanketh.mobilebanking',
+    'Bank of Abyssinia': 'com.boa.boaMobileBanking',
+    'Dashen Bank': 'com.dashen.dashensuperapp'
+}
+TARGET_PER_BANK = 400
+PAGE_SIZE = 200
+MAX_PAGES = 10
+RAW_PATH = 'data/raw/raw_reviews.csv'
+CHECKPOINT_PATH = 'data/raw/scrape_checkpoints.json'
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting page requests across all workers"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ScrapeStats:
+    """Page, retry and failure counters shared by scraping threads"""
+
+    def __init__(self):
+        self.counts = {'pages': 0, 'reviews': 0, 'retries': 0, 'failures': 0}
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    def add(self, key, amount=1):
+        with self.lock:
+            self.counts[key] += amount
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.counts['pages'] / elapsed if elapsed > 0 else 0.0
+        print(f"Fetched {self.counts['pages']} pages "
+              f"({self.counts['reviews']} reviews) in {elapsed:.1f}s: "
+              f"{rate:.2f} pages/sec, {self.counts['retries']} retries, "
+              f"{self.counts['failures']} failed apps")
+
+
+class CheckpointStore:
+    """Per-app scraping checkpoints persisted to a JSON file.
+
+    Each app records the newest review already collected
+    (newest_review_id / newest_at). While a run is still working back
+    towards that boundary it also records the continuation token of the
+    last page fetched and the newest review of the run (pending_*), so an
+    interrupted run resumes where it stopped instead of starting over.
+
+    Checkpoints must only be saved once the reviews they cover are written,
+    so scrape_bank_reviews only stages the new states (pending) and the
+    caller calls commit after saving the rows.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.checkpoints = {}
+        self.pending = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.checkpoints = json.load(f)
+
+    def get(self, app_id):
+        with self.lock:
+            return dict(self.checkpoints.get(app_id, {}))
+
+    def update(self, app_id, state):
+        self.update_many({app_id: state})
+
+    def update_many(self, states):
+        with self.lock:
+            self.checkpoints.update(states)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.checkpoints, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def stage(self, app_id, state):
+        """Hold a new state until commit, get still returns the saved one"""
+        with self.lock:
+            self.pending[app_id] = state
+
+    def commit(self):
+        """Save the staged states, once the reviews they cover are written"""
+        pending, self.pending = self.pending, {}
+        self.update_many(pending)
+
 
+def token_to_json(token):
+    if token is None or isinstance(token, (str, int)):
+        return token
+    slots = getattr(token, '__slots__', None)
+    if slots is None:
+        return None
+    return {slot: getattr(token, slot) for slot in slots}
 
-def scrape_bank_reviews():
 
-    bank_apps = {
-        'Commercial Bank of Ethiopia': 'com.combanketh.mobilebanking',
-        'Bank of Abyssinia': 'com.boa.boaMobileBanking',
-        'Dashen Bank': 'com.dashen.dashensuperapp'
-    }
+def token_from_json(value):
+    """Rebuild a stored continuation token, or None if this version of
+    google_play_scraper cannot"""
+    if not isinstance(value, dict):
+        return value
+    if _ContinuationToken is None:
+        return None
+    try:
+        return _ContinuationToken(**value)
+    except TypeError:
+        return None
 
-    all_reviews = []
-    TARGET_PER_BANK = 400
 
-    for bank_name, app_id in bank_apps.items():
-        print(f"Scraping reviews for {bank_name}...")
-        bank_reviews = []
-        continuation_token = None
-        attempts = 0
+def fetch_page(app_id, continuation_token, fetch, limiter, stats,
+               max_retries=3, backoff=1.0):
+    """Fetch one review page, retrying with exponential backoff"""
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        try:
+            result, continuation_token = fetch(
+                app_id,
+                lang='en',
+                country='et',
+                sort=Sort.NEWEST,
+                count=PAGE_SIZE,
+                continuation_token=continuation_token
+            )
+            stats.add('pages')
+            stats.add('reviews', len(result))
+            return result, continuation_token
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = backoff * 2 ** attempt
+            stats.add('retries')
+            print(f"  {app_id}: {e}, retrying in {delay:.1f}s")
+            time.sleep(delay)
 
-        while len(bank_reviews) < TARGET_PER_BANK and attempts < 10:
-            try:
 
-                result, continuation_token = reviews(
-                    app_id,
-                    lang='en',
-                    country='et',
-                    sort=Sort.NEWEST,
-                    count=200,
-                    continuation_token=continuation_token
-                )
+def to_review_rows(bank_name, app_reviews):
+    return [{
+        'review_id': review['reviewId'],
+        'review': review['content'],
+        'rating': review['score'],
+        'date': review['at'].strftime('%Y-%m-%d'),
+        'bank': bank_name,
+        'source': 'Google Play'
+    } for review in app_reviews]
 
-                bank_reviews.extend(result)
-                print(
-                    f"  Batch: {len(result)} reviews, Total: {len(bank_reviews)}")
 
-                if continuation_token is None:
-                    break
+def is_known_review(review, checkpoint):
+    """True once a newest-first crawl reaches reviews already collected"""
+    if review['reviewId'] == checkpoint.get('newest_review_id'):
+        return True
+    newest_at = checkpoint.get('newest_at')
+    return newest_at is not None and review['at'] < datetime.fromisoformat(newest_at)
 
-            except Exception as e:
-                print(f"  Error: {e}")
+
+@instrumented
+def scrape_app(bank_name, app_id, fetch, limiter, stats,
+               target=TARGET_PER_BANK, max_retries=3, backoff=1.0,
+               checkpoint=None):
+    """Collect up to target reviews for one app.
+
+    With a checkpoint (a CheckpointStore entry, {} for an app never
+    scraped) only reviews newer than it are collected (no target cap once
+    the app has been scraped), and the crawl stops at the first known
+    review. Returns the review rows and the app's new checkpoint state,
+    which is not saved here: it is only valid once the rows are written.
+    """
+    print(f"Scraping reviews for {bank_name}...")
+    checkpoint = dict(checkpoint) if checkpoint is not None else None
+    state = checkpoint or {}
+    incremental = 'newest_review_id' in state
+    limit = None if incremental else target
+
+    bank_reviews = []
+    stored_token = state.get('continuation_token')
+    continuation_token = token_from_json(stored_token)
+    pending = state.get('pending_newest')
+    if stored_token is not None and continuation_token is None:
+        # The token could not be rebuilt: start again from the newest page
+        pending = None
+    pages = 0
+    complete = False
+
+    while (limit is None or len(bank_reviews) < limit) and pages < MAX_PAGES:
+        try:
+            result, continuation_token = fetch_page(
+                app_id, continuation_token, fetch, limiter, stats,
+                max_retries, backoff)
+        except Exception as e:
+            stats.add('failures')
+            print(f"  Error: {e} (giving up on {bank_name})")
+            break
+
+        pages += 1
+        new_reviews = []
+        for review in result:
+            if incremental and is_known_review(review, state):
+                complete = True
                 break
+            new_reviews.append(review)
+
+        if pending is None and new_reviews:
+            pending = {'review_id': new_reviews[0]['reviewId'],
+                       'at': new_reviews[0]['at'].isoformat()}
+        bank_reviews.extend(new_reviews)
+        print(f"  {bank_name} batch: {len(new_reviews)} new reviews, "
+              f"Total: {len(bank_reviews)}")
+
+        if continuation_token is None:
+            complete = True
+        if complete:
+            break
+
+    if limit is not None and len(bank_reviews) >= limit:
+        complete = True
+
+    if checkpoint is not None:
+        if complete:
+            if pending is not None:
+                checkpoint['newest_review_id'] = pending['review_id']
+                checkpoint['newest_at'] = pending['at']
+            checkpoint.pop('continuation_token', None)
+            checkpoint.pop('pending_newest', None)
+        elif pages > 0:
+            checkpoint['continuation_token'] = token_to_json(continuation_token)
+            checkpoint['pending_newest'] = pending
+
+    collected = bank_reviews if limit is None else bank_reviews[:limit]
+    if incremental:
+        print(f"{bank_name}: {len(collected)} new reviews since checkpoint")
+    else:
+        status = "YES" if len(collected) >= target else "NO"
+        print(f"{status} {bank_name}: {len(collected)}/{target} reviews")
+
+    return to_review_rows(bank_name, collected), checkpoint
+
 
-            attempts += 1
-            time.sleep(1)
+@instrumented
+def scrape_bank_reviews(bank_apps=None, workers=1, rate=1.0, max_retries=3,
+                        backoff=1.0, fetch=reviews, checkpoints=None):
+    """Scrape every app, up to `workers` apps at a time.
 
-        for review in bank_reviews[:TARGET_PER_BANK]:
-            all_reviews.append({
-                'review_id': review['reviewId'],
-                'review': review['content'],
-                'rating': review['score'],
-                'date': review['at'].strftime('%Y-%m-%d'),
-                'bank': bank_name,
-                'source': 'Google Play'
-            })
+    All workers share one token bucket allowing `rate` page requests per
+    second. `fetch` defaults to google_play_scraper.reviews and can be any
+    callable with the same signature, e.g. an offline stand-in. With a
+    CheckpointStore as checkpoints only reviews newer than the last run
+    are fetched, and each app's new state is staged on the store: save
+    the rows first, then call checkpoints.commit() (see scrape_new_reviews).
+    """
+    if bank_apps is None:
+        bank_apps = BANK_APPS
 
-        collected = len(bank_reviews[:TARGET_PER_BANK])
-        status = "YES" if collected >= TARGET_PER_BANK else "NO"
-        print(f"{status} {bank_name}: {collected}/{TARGET_PER_BANK} reviews")
+    limiter = TokenBucket(rate)
+    stats = ScrapeStats()
+
+    def scrape(item):
+        bank_name, app_id = item
+        checkpoint = checkpoints.get(app_id) if checkpoints is not None else None
+        rows, checkpoint = scrape_app(bank_name, app_id, fetch, limiter, stats,
+                                      max_retries=max_retries, backoff=backoff,
+                                      checkpoint=checkpoint)
+        if checkpoints is not None:
+            checkpoints.stage(app_id, checkpoint)
+        return rows
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            per_app = list(pool.map(scrape, bank_apps.items()))
+    else:
+        per_app = [scrape(item) for item in bank_apps.items()]
+
+    all_reviews = [row for rows in per_app for row in rows]
 
     df = pd.DataFrame(all_reviews)
     print(f"\nTOTAL COLLECTED: {len(df)} reviews")
-    print("Distribution per bank:")
-    print(df['bank'].value_counts())
+    stats.report()
+    if len(df) > 0:
+        print("Distribution per bank:")
+        print(df['bank'].value_counts())
 
     return df
 
 
+def append_raw_reviews(df, path=RAW_PATH):
+    """Add scraped rows to the raw CSV, keeping the latest copy of each
+    review_id; returns the number of reviews in the file"""
+    if os.path.exists(path):
+        existing = pd.read_csv(path, dtype={'review_id': str})
+        df = pd.concat([existing, df], ignore_index=True)
+    df = df.drop_duplicates(subset=['review_id'], keep='last')
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return len(df)
+
+
+@instrumented
+def scrape_new_reviews(raw_path=RAW_PATH, checkpoint_path=CHECKPOINT_PATH,
+                       **kwargs):
+    """Scrape reviews newer than the checkpoints into raw_path.
+
+    The checkpoints only advance after the new rows are in the CSV, so a
+    crash in between re-fetches those reviews instead of losing them.
+    """
+    checkpoints = CheckpointStore(checkpoint_path)
+    df = scrape_bank_reviews(checkpoints=checkpoints, **kwargs)
+    total = append_raw_reviews(df, raw_path)
+    checkpoints.commit()
+    print(f"Saved {len(df)} new reviews, {total} in {raw_path}")
+    return df
+
+
 if __name__ == "__main__":
-    df = scrape_bank_reviews()
-    df.to_csv('data/raw/raw_reviews.csv', index=False)
+    parser = argparse.ArgumentParser(
+        description="Append reviews newer than the saved checkpoints to the raw CSV")
+    parser.add_argument('--full', action='store_true',
+                        help=f"ignore checkpoints and overwrite {RAW_PATH} with a "
+                             f"fresh scrape of up to {TARGET_PER_BANK} reviews per bank")
+    args = parser.parse_args()
+
+    if args.full:
+        df = scrape_bank_reviews()
+        df.to_csv(RAW_PATH, index=False)
+    else:
+        scrape_new_reviews()
@@ -1,6 +1,40 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from multiprocessing import get_context
+
+import numpy as np
 import pandas as pd
 from textblob import TextBlob
 
+from src.aggregate_store import RATINGS, UNSCORED_LABEL
+from src.cache import cache_key
+from src.instrument import instrumented
+from src.lexicon import get_lexicon_scorer
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_BACKEND = 'textblob'
+# Bump a backend's version whenever its output changes, so cached scores expire
+SCORER_VERSIONS = {
+    'textblob': "textblob-v1",
+    'lexicon': "lexicon-v1",
+}
+SCORER_VERSION = SCORER_VERSIONS[DEFAULT_BACKEND]
+# Both backends only understand English; reviews detected as another
+# language (src.language) get this label and no score
+SCORED_LANGUAGES = ('en',)
+
+
+def label_polarity(polarity):
+    if polarity > 0.1:
+        return "positive"
+    elif polarity < -0.1:
+        return "negative"
+    else:
+        return "neutral"
+
 
 def analyze_sentiment(text):
     if pd.isna(text) or str(text).strip() == "":
@@ -9,40 +43,269 @@ def analyze_sentiment(text):
     analysis = TextBlob(str(text))
     polarity = analysis.sentiment.polarity
 
-    if polarity > 0.1:
-        return "positive", polarity
-    elif polarity < -0.1:
-        return "negative", polarity
-    else:
-        return "neutral", polarity
+    return label_polarity(polarity), polarity
 
 
-def perform_sentiment_analysis(df):
-    print("Analyzing sentiment for each review...")
+def score_reviews(texts, backend=DEFAULT_BACKEND):
+    """Score one chunk of reviews, returns (labels, scores) in input order"""
+    if backend == 'lexicon':
+        scores = get_lexicon_scorer().polarity_scores(texts).tolist()
+        return [label_polarity(score) for score in scores], scores
+    if backend != 'textblob':
+        raise ValueError(f"Unknown sentiment backend: {backend}")
 
-    sentiments = []
+    labels = []
     scores = []
 
-    for i, review in enumerate(df['review']):
-        sentiment, score = analyze_sentiment(review)
-        sentiments.append(sentiment)
+    for text in texts:
+        label, score = analyze_sentiment(text)
+        labels.append(label)
         scores.append(score)
 
-        if (i + 1) % 100 == 0:
-            print(f"  Processed {i + 1} reviews...")
+    return labels, scores
+
+
+def split_into_chunks(values, chunk_size):
+    """Split a list into consecutive chunks of at most chunk_size items"""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    return [values[start:start + chunk_size]
+            for start in range(0, len(values), chunk_size)]
+
+
+def scoring_pool(workers):
+    """Process pool for score_texts.
+
+    spawn: the pipeline runner may have other stage threads running, and
+    forking a multithreaded process can deadlock.
+    """
+    return ProcessPoolExecutor(max_workers=workers,
+                               mp_context=get_context('spawn'))
+
+
+@instrumented
+def score_texts(texts, chunk_size=DEFAULT_CHUNK_SIZE, workers=1,
+                backend=DEFAULT_BACKEND, executor=None):
+    """Score texts in chunks, optionally across a process pool.
+
+    Chunks are reassembled in their original order, so the result is
+    identical for any worker count. Callers scoring many batches can pass
+    a pool from scoring_pool as executor so it is started only once.
+    """
+    chunks = split_into_chunks(texts, chunk_size)
+    scorer = partial(score_reviews, backend=backend)
+    labels = []
+    scores = []
+
+    if (executor is not None or workers > 1) and len(chunks) > 1:
+        with ExitStack() as stack:
+            pool = executor or stack.enter_context(scoring_pool(workers))
+            for chunk_labels, chunk_scores in pool.map(scorer, chunks):
+                labels.extend(chunk_labels)
+                scores.extend(chunk_scores)
+                print(f"  Processed {len(labels)} reviews...")
+    else:
+        for chunk in chunks:
+            chunk_labels, chunk_scores = scorer(chunk)
+            labels.extend(chunk_labels)
+            scores.extend(chunk_scores)
+            print(f"  Processed {len(labels)} reviews...")
+
+    return labels, scores
+
+
+@instrumented
+def score_texts_cached(texts, cache, chunk_size=DEFAULT_CHUNK_SIZE, workers=1,
+                       backend=DEFAULT_BACKEND, executor=None):
+    """Score only the unique texts the cache has not seen before"""
+    keys = [cache_key(text, cache.version) for text in texts]
+    representatives = {}
+    for key, text in zip(keys, texts):
+        representatives.setdefault(key, text)
+
+    known = {}
+    missing = []
+    for key, text in representatives.items():
+        value = cache.get(text)
+        if value is None:
+            missing.append(text)
+        else:
+            known[key] = value
+
+    print(f"  {len(missing)} of {len(representatives)} unique texts need scoring")
+    new_labels, new_scores = score_texts(missing, chunk_size, workers, backend,
+                                         executor)
+    cache.put_many(zip(missing, new_labels, new_scores))
+    for text, label, score in zip(missing, new_labels, new_scores):
+        known[cache_key(text, cache.version)] = (label, score)
+
+    labels = [known[key][0] for key in keys]
+    scores = [known[key][1] for key in keys]
+    return labels, scores
+
+
+def scored_mask(df):
+    """Reviews a backend can score: those in SCORED_LANGUAGES when df has
+    a lang column, otherwise all of them"""
+    if 'lang' not in df:
+        return np.ones(len(df), dtype=bool)
+    return df['lang'].isin(SCORED_LANGUAGES).to_numpy()
+
+
+def fill_unscored(mask, labels, scores):
+    """Spread labels / scores of the masked reviews over all reviews,
+    with UNSCORED_LABEL and a NaN score for the rest"""
+    all_labels = np.full(len(mask), UNSCORED_LABEL, dtype=object)
+    all_scores = np.full(len(mask), np.nan)
+    all_labels[mask] = labels
+    all_scores[mask] = scores
+    return all_labels.tolist(), all_scores.tolist()
+
+
+@instrumented
+def perform_sentiment_analysis(df, chunk_size=DEFAULT_CHUNK_SIZE, workers=1,
+                               cache=None, backend=DEFAULT_BACKEND):
+    """Score every review in chunks, optionally across a process pool.
+
+    workers=None uses every CPU. backend is 'textblob' (default) or the
+    vectorized 'lexicon' scorer. Pass a SentimentCache built with the
+    backend's SCORER_VERSIONS entry to skip texts already scored. With a
+    lang column only English reviews are scored; the others are labelled
+    UNSCORED_LABEL with a NaN score, so they do not inflate the neutral
+    counts and average scores.
+    """
+    print(f"Analyzing sentiment for each review ({backend} backend)...")
+
+    if backend not in SCORER_VERSIONS:
+        raise ValueError(f"Unknown sentiment backend: {backend}")
+    if cache is not None and cache.version != SCORER_VERSIONS[backend]:
+        raise ValueError(
+            f"Cache version {cache.version} does not match {backend} backend")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    mask = scored_mask(df)
+    texts = df.loc[mask, 'review'].tolist()
+    if len(texts) < len(df):
+        print(f"Skipping {len(df) - len(texts)} reviews not in {', '.join(SCORED_LANGUAGES)}")
+    start = time.perf_counter()
+
+    if cache is None:
+        sentiments, scores = score_texts(texts, chunk_size, workers, backend)
+    else:
+        sentiments, scores = score_texts_cached(
+            texts, cache, chunk_size, workers, backend)
+
+    elapsed = time.perf_counter() - start
+    rate = len(sentiments) / elapsed if elapsed > 0 else 0.0
+    sentiments, scores = fill_unscored(mask, sentiments, scores)
 
     df['sentiment_label'] = sentiments
     df['sentiment_score'] = scores
 
     print(f"\nSentiment analysis complete!")
+    print(f"Scored {len(texts)} reviews in {elapsed:.2f}s "
+          f"({rate:.0f} reviews/sec, {workers} workers, chunk size {chunk_size})")
+    if cache is not None:
+        cache.report()
     print("Sentiment distribution:")
     print(df['sentiment_label'].value_counts())
 
     return df
 
 
-def aggregate_by_bank_and_rating(df):
-    """Calculate average sentiment for each bank and star rating"""
+@instrumented
+def compare_scorers(df, backend='lexicon'):
+    """Compare a backend against the TextBlob labels/scores already in df
+    (reviews left unscored are skipped)"""
+    print(f"\nComparing {backend} scorer against TextBlob...")
+    df = df[df['sentiment_label'] != UNSCORED_LABEL]
+
+    start = time.perf_counter()
+    labels, scores = score_reviews(df['review'].tolist(), backend=backend)
+    elapsed = time.perf_counter() - start
+
+    baseline_scores = df['sentiment_score'].astype(float)
+    scores = pd.Series(scores, index=df.index)
+    labels = pd.Series(labels, index=df.index, name=backend)
+
+    report = {
+        'reviews': len(df),
+        'label_agreement': (labels == df['sentiment_label']).mean(),
+        'exact_score_match': ((scores - baseline_scores).abs() < 1e-9).mean(),
+        'score_correlation': scores.corr(baseline_scores),
+        'mean_abs_error': (scores - baseline_scores).abs().mean(),
+        'reviews_per_sec': len(df) / elapsed if elapsed > 0 else 0.0,
+    }
+
+    print(f"Label agreement: {report['label_agreement']:.1%}")
+    print(f"Exact score match: {report['exact_score_match']:.1%}")
+    print(f"Score correlation: {report['score_correlation']:.3f}")
+    print(f"Mean absolute error: {report['mean_abs_error']:.4f}")
+    print(f"Throughput: {report['reviews_per_sec']:.0f} reviews/sec")
+    print(f"Label confusion (rows: TextBlob, columns: {backend}):")
+    print(pd.crosstab(df['sentiment_label'], labels))
+
+    return report
+
+
+@instrumented
+def aggregate_by_bank_and_rating(df=None, store=None):
+    """Calculate average sentiment for each bank and star rating.
+
+    With an AggregateStore only reviews it has not seen are merged and
+    the result is read back from its running totals. With df=None the
+    result is read from the configured database backend's summary.
+    unscored_count holds reviews left unscored (src.language), so
+    total_reviews is positive + neutral + negative + unscored.
+    """
+    print("\nAggregating sentiment by bank and rating...")
+
+    if df is None:
+        from src.embedded_db import open_backend
+        with open_backend() as backend:
+            aggregated_df = backend.query_bank_rating_summary()
+        print("Aggregation complete!")
+        return aggregated_df
+
+    if store is not None:
+        store.add_reviews(df)
+        print("Aggregation complete!")
+        return store.to_dataframe()
+
+    # Categorical keys keep banks in order of first appearance and ratings
+    # 1-5, so one grouped pass yields the rows in the original loop order.
+    labels = df['sentiment_label']
+    frame = pd.DataFrame({
+        'bank': pd.Categorical(df['bank'], categories=df['bank'].dropna().unique()),
+        'rating': pd.Categorical(df['rating'], categories=RATINGS),
+        'score': df['sentiment_score'],
+        'positive': labels == 'positive',
+        'neutral': labels == 'neutral',
+        'negative': labels == 'negative',
+        'unscored': labels == UNSCORED_LABEL,
+    })
+
+    grouped = frame.groupby(['bank', 'rating'], observed=True, sort=True).agg(
+        avg_sentiment_score=('score', 'mean'),
+        positive_count=('positive', 'sum'),
+        neutral_count=('neutral', 'sum'),
+        negative_count=('negative', 'sum'),
+        unscored_count=('unscored', 'sum'),
+        total_reviews=('score', 'size'),
+    ).reset_index()
+
+    grouped['bank'] = grouped['bank'].astype(df['bank'].dtype)
+    grouped['rating'] = grouped['rating'].astype('int64')
+    grouped['avg_sentiment_score'] = grouped['avg_sentiment_score'].round(3)
+    print("Aggregation complete!")
+
+    return grouped
+
+
+@instrumented
+def aggregate_by_bank_and_rating_masked(df):
+    """Original per bank x rating mask implementation, kept for benchmarks"""
     print("\nAggregating sentiment by bank and rating...")
 
     results = []
@@ -64,6 +327,7 @@ def aggregate_by_bank_and_rating(df):
                     'positive_count': sentiment_counts.get('positive', 0),
                     'neutral_count': sentiment_counts.get('neutral', 0),
                     'negative_count': sentiment_counts.get('negative', 0),
+                    'unscored_count': sentiment_counts.get(UNSCORED_LABEL, 0),
                     'total_reviews': len(bank_rating_reviews)
                 })
 
@@ -71,3 +335,8 @@ def aggregate_by_bank_and_rating(df):
     print("Aggregation complete!")
 
     return aggregated_df
+
+
+if __name__ == "__main__":
+    df = pd.read_csv('data/processed/reviews_with_sentiment.csv')
+    compare_scorers(df)
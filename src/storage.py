@@ -0,0 +1,97 @@
+import os
+import shutil
+
+import pandas as pd
+
+from src.instrument import instrumented
+
+PARTITION_COLS = ['bank', 'month']
+DICTIONARY_COLS = ['sentiment_label', 'source', 'lang']
+UNKNOWN_MONTH = 'unknown'
+REVIEW_COLUMNS = ['review_id', 'review', 'rating', 'date', 'bank', 'source',
+                  'sentiment_label', 'sentiment_score']
+
+
+def add_month(df):
+    """Add the YYYY-MM partition column derived from date"""
+    month = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m')
+    df = df.copy()
+    df['month'] = month.fillna(UNKNOWN_MONTH)
+    return df
+
+
+@instrumented
+def write_reviews_parquet(df, root, overwrite=True, part=None):
+    """Write reviews as Parquet partitioned by bank and month.
+
+    bank and month become directory keys; sentiment_label, source and lang are
+    stored as dictionary-encoded (categorical) columns. With
+    overwrite=False the files are added next to existing ones, named after
+    `part` so streamed chunks do not collide.
+    """
+    if overwrite and os.path.exists(root):
+        shutil.rmtree(root)
+
+    df = add_month(df)
+    for column in DICTIONARY_COLS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+
+    basename = f"part-{part if part is not None else 0}-{{i}}.parquet"
+    df.to_parquet(root, engine='pyarrow', index=False,
+                  partition_cols=PARTITION_COLS,
+                  basename_template=basename,
+                  existing_data_behavior='overwrite_or_ignore')
+
+
+@instrumented
+def read_reviews_parquet(root, columns=None, banks=None, months=None):
+    """Read a partitioned review dataset.
+
+    columns projects only the named columns; banks and months prune whole
+    partitions before any file is opened. The derived month column is only
+    returned when asked for.
+    """
+    filters = []
+    if banks is not None:
+        filters.append(('bank', 'in', list(banks)))
+    if months is not None:
+        filters.append(('month', 'in', list(months)))
+
+    read_columns = columns
+    if columns is not None and 'month' not in columns and months is not None:
+        read_columns = list(columns) + ['month']
+
+    df = pd.read_parquet(root, engine='pyarrow', columns=read_columns,
+                         filters=filters or None)
+
+    if 'month' in df.columns and (columns is None or 'month' not in columns):
+        df = df.drop(columns='month')
+
+    # Partition keys come back last; restore the CSV column order
+    order = columns or [c for c in REVIEW_COLUMNS if c in df.columns]
+    return df[order + [c for c in df.columns if c not in order]]
+
+
+def dataset_size(path):
+    """Total bytes of a file or of every file under a directory"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(folder, name))
+               for folder, _, names in os.walk(path) for name in names)
+
+
+@instrumented
+def csv_to_parquet(csv_path, root):
+    df = pd.read_csv(csv_path)
+    write_reviews_parquet(df, root)
+    print(f"Converted {len(df)} reviews from {csv_path} to {root} "
+          f"({dataset_size(csv_path) / 1024:.0f} KB -> "
+          f"{dataset_size(root) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    csv_to_parquet('data/processed/cleaned_reviews.csv',
+                   'data/processed/cleaned_reviews.parquet')
+    csv_to_parquet('data/processed/reviews_with_sentiment.csv',
+                   'data/processed/reviews_with_sentiment.parquet')
@@ -0,0 +1,127 @@
+import os
+import shutil
+import time
+from contextlib import ExitStack
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from src.instrument import instrumented
+from src.language import detect_batch
+from src.preprocess import SeenIds, preprocess_chunk
+from src.storage import write_reviews_parquet
+from src.sentiment import (DEFAULT_BACKEND, DEFAULT_CHUNK_SIZE, fill_unscored,
+                           score_texts, score_texts_cached, scored_mask,
+                           scoring_pool)
+
+STREAM_CHUNK_SIZE = 50000
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process so far, or None if unknown"""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@instrumented
+def stream_sentiment_pipeline(raw_path, output_path, cleaned_path=None,
+                              chunk_size=STREAM_CHUNK_SIZE, workers=1,
+                              cache=None, backend=DEFAULT_BACKEND,
+                              parquet_root=None):
+    """Preprocess and score a raw review CSV chunk by chunk.
+
+    Only one chunk of reviews is held in memory at a time; duplicates
+    across chunks are caught with a SeenIds hash set (8 bytes per id).
+    Each chunk gets a lang column and only English reviews are scored.
+    Scored rows are appended to output_path and, if given, cleaned rows
+    to cleaned_path. With parquet_root the scored rows are also written to
+    a bank/month partitioned Parquet dataset. Returns a summary dict
+    including peak RSS.
+    """
+    print(f"Streaming {raw_path} in chunks of {chunk_size} rows...")
+
+    for path in (output_path, cleaned_path):
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+    if parquet_root is not None and os.path.exists(parquet_root):
+        shutil.rmtree(parquet_root)
+
+    start = time.perf_counter()
+    seen = SeenIds()
+    chunk_number = 0
+    rows_in = 0
+    rows_out = 0
+    write_header = True
+
+    with ExitStack() as stack:
+        # One scoring pool for the whole file instead of one per chunk
+        executor = (stack.enter_context(scoring_pool(workers))
+                    if workers > 1 else None)
+        for chunk in pd.read_csv(raw_path, chunksize=chunk_size):
+            rows_in += len(chunk)
+            chunk = preprocess_chunk(chunk, seen)
+            chunk['lang'] = detect_batch(chunk['review'].tolist())
+
+            if cleaned_path is not None:
+                chunk.to_csv(cleaned_path, mode='a', header=write_header,
+                             index=False)
+
+            mask = scored_mask(chunk)
+            texts = chunk.loc[mask, 'review'].tolist()
+            scorer_chunk = min(DEFAULT_CHUNK_SIZE, max(len(texts), 1))
+            if cache is None:
+                labels, scores = score_texts(texts, scorer_chunk, workers,
+                                             backend, executor)
+            else:
+                labels, scores = score_texts_cached(
+                    texts, cache, scorer_chunk, workers, backend, executor)
+            labels, scores = fill_unscored(mask, labels, scores)
+            chunk['sentiment_label'] = labels
+            chunk['sentiment_score'] = scores
+
+            chunk.to_csv(output_path, mode='a', header=write_header, index=False)
+            if parquet_root is not None and len(chunk) > 0:
+                write_reviews_parquet(chunk, parquet_root, overwrite=False,
+                                      part=chunk_number)
+            write_header = False
+            chunk_number += 1
+            rows_out += len(chunk)
+            print(f"  Streamed {rows_in} rows, kept {rows_out}")
+
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        'rows_in': rows_in,
+        'rows_out': rows_out,
+        'duplicates_or_empty': rows_in - rows_out,
+        'seconds': elapsed,
+        'reviews_per_sec': rows_out / elapsed if elapsed > 0 else 0.0,
+        'peak_memory_mb': peak_memory_mb(),
+        'seen_ids_mb': seen.hashes.nbytes / 1024 ** 2,
+    }
+
+    print(f"\nStreaming complete: {rows_out}/{rows_in} rows written to {output_path}")
+    print(f"Elapsed {elapsed:.1f}s ({summary['reviews_per_sec']:.0f} reviews/sec)")
+    if summary['peak_memory_mb'] is not None:
+        print(f"Peak memory (RSS): {summary['peak_memory_mb']:.1f} MB "
+              f"(seen-id set {summary['seen_ids_mb']:.2f} MB)")
+
+    if cache is not None:
+        cache.report()
+
+    return summary
+
+
+if __name__ == "__main__":
+    stream_sentiment_pipeline(
+        'data/raw/raw_reviews.csv',
+        'data/processed/reviews_with_sentiment.csv',
+        cleaned_path='data/processed/cleaned_reviews.csv'
+    )
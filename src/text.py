@@ -0,0 +1,314 @@
+import json
+import re
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from src.instrument import instrumented
+
+TOKENS_PATH = 'data/processed/review_tokens.npz'
+# Joins texts into one buffer; never survives normalization inside a text
+SEPARATOR = '\x01'
+NON_WORD = re.compile(r'[^\w\s\x01]')
+
+# Ethiopic syllables come in rows of 8 vowel orders starting at these code
+# points: ä u i a e ə o wa (labialized rows: ä - i a e ə). The range ends
+# before the combining marks U+135D-135F
+GEEZ_START, GEEZ_END = 0x1200, 0x135D
+GEEZ_ROWS = {
+    0x1200: 'h', 0x1208: 'l', 0x1210: 'h', 0x1218: 'm', 0x1220: 's',
+    0x1228: 'r', 0x1230: 's', 0x1238: 'sh', 0x1240: 'q', 0x1248: 'qw',
+    0x1250: 'q', 0x1258: 'qw', 0x1260: 'b', 0x1268: 'v', 0x1270: 't',
+    0x1278: 'ch', 0x1280: 'h', 0x1288: 'hw', 0x1290: 'n', 0x1298: 'ny',
+    0x12A0: '', 0x12A8: 'k', 0x12B0: 'kw', 0x12B8: 'kh', 0x12C0: 'khw',
+    0x12C8: 'w', 0x12D0: '', 0x12D8: 'z', 0x12E0: 'zh', 0x12E8: 'y',
+    0x12F0: 'd', 0x12F8: 'd', 0x1300: 'j', 0x1308: 'g', 0x1310: 'gw',
+    0x1318: 'g', 0x1320: 't', 0x1328: 'ch', 0x1330: 'p', 0x1338: 'ts',
+    0x1340: 'ts', 0x1348: 'f', 0x1350: 'p',
+}
+# ፘ ፙ ፚ: palatalized m, r and f with the fourth-order vowel
+GEEZ_SYLLABLES = {0x1358: 'mya', 0x1359: 'rya', 0x135A: 'fya'}
+LABIALIZED_ROWS = {0x1248, 0x1258, 0x1288, 0x12B0, 0x12C0, 0x1310}
+VOWELS = ['e', 'u', 'i', 'a', 'e', '', 'o', 'wa']
+LABIALIZED_VOWELS = ['e', '', 'i', 'a', 'e', '', '', '']
+# Vowel-carrier rows: the sixth order (እ, ዕ) is pronounced as i
+CARRIER_VOWELS = ['a', 'u', 'i', 'a', 'e', 'i', 'o', 'wa']
+# Letters that sound alike in Amharic and are spelled interchangeably
+HOMOPHONE_ROWS = {0x1210: 0x1200, 0x1280: 0x1200, 0x1220: 0x1230,
+                  0x12D0: 0x12A0, 0x1340: 0x1338}
+GEEZ_NUMERALS = dict(zip(range(0x1369, 0x137D), [
+    '1', '2', '3', '4', '5', '6', '7', '8', '9',
+    '10', '20', '30', '40', '50', '60', '70', '80', '90', '100', '10000']))
+
+
+def _fold_table():
+    table = {}
+    for row, target in HOMOPHONE_ROWS.items():
+        for order in range(8):
+            table[row + order] = target + order
+    table.update({code: digits for code, digits in GEEZ_NUMERALS.items()})
+    return str.maketrans(table)
+
+
+def _latin_table():
+    table = {}
+    for row, consonant in GEEZ_ROWS.items():
+        if row in LABIALIZED_ROWS:
+            vowels = LABIALIZED_VOWELS
+        elif consonant == '':
+            vowels = CARRIER_VOWELS
+        else:
+            vowels = VOWELS
+        for order, vowel in enumerate(vowels):
+            table[row + order] = consonant + vowel
+    table.update(GEEZ_SYLLABLES)
+    table.update({code: digits for code, digits in GEEZ_NUMERALS.items()})
+    return str.maketrans(table)
+
+
+FOLD_TABLE = _fold_table()
+LATIN_TABLE = _latin_table()
+
+
+def has_geez(text):
+    """True when text contains at least one Ethiopic syllable"""
+    return any(GEEZ_START <= ord(char) < GEEZ_END for char in str(text))
+
+
+def transliterate(text):
+    """Romanize Ethiopic syllables (ሰላም -> selam, ጥሩ -> tru); other text is kept"""
+    return str(text).translate(LATIN_TABLE)
+
+
+def normalize_text(text, keep_punctuation=False):
+    """NFKC, lowercase, fold Amharic homophones and Ethiopic numerals, and
+    turn punctuation (Ethiopic included) into spaces.
+
+    keep_punctuation=True leaves punctuation alone, for callers such as
+    the sentiment cache whose results depend on it ("good" vs "good!!").
+    """
+    text = unicodedata.normalize('NFKC', str(text)).lower().translate(FOLD_TABLE)
+    if keep_punctuation:
+        return text
+    return re.sub(r'[^\w\s]', ' ', text)
+
+
+def _as_strings(texts):
+    return ['' if not isinstance(text, str) and pd.isna(text) else str(text)
+            for text in texts]
+
+
+def normalized_buffer(texts):
+    """All texts normalized at once, joined by SEPARATOR.
+
+    Each step (Unicode normalization, lowercasing, folding and the
+    punctuation regex) runs once over a single joined string instead of
+    once per review.
+    """
+    texts = _as_strings(texts)
+    buffer = SEPARATOR.join(texts)
+    if buffer.count(SEPARATOR) != max(len(texts) - 1, 0):
+        buffer = SEPARATOR.join(text.replace(SEPARATOR, ' ') for text in texts)
+    buffer = unicodedata.normalize('NFKC', buffer).lower().translate(FOLD_TABLE)
+    return NON_WORD.sub(' ', buffer)
+
+
+def normalize_texts(texts):
+    """normalize_text for a batch of texts, as a list"""
+    if len(texts) == 0:
+        return []
+    return normalized_buffer(texts).split(SEPARATOR)
+
+
+class TokenizedCorpus:
+    """Normalized word tokens of every review, stored once as flat arrays.
+
+    Token ids index an alphabetically sorted vocabulary; review i owns
+    ids[offsets[i]:offsets[i + 1]]. Tokens are the runs of word characters
+    left by normalize_text, so Ge'ez words are tokens like any other.
+    Stages that need token counts build them from these arrays instead of
+    re-tokenizing the text.
+    """
+
+    def __init__(self, vocabulary, ids, offsets, review_ids=None):
+        self.vocabulary = np.asarray(vocabulary, dtype=object)
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.review_ids = (None if review_ids is None
+                           else np.asarray(review_ids, dtype=object))
+
+    @classmethod
+    @instrumented(name='text.TokenizedCorpus.build')
+    def build(cls, texts, review_ids=None):
+        """Normalize and tokenize a batch of texts in one pass"""
+        start = time.perf_counter()
+        texts = list(texts)
+        if not texts:
+            return cls([], [], [0], None if review_ids is None else [])
+        # Whitespace around separators makes each one a token of its own
+        tokens = normalized_buffer(texts).replace(SEPARATOR, f' {SEPARATOR} ').split()
+        codes, uniques = pd.factorize(np.asarray(tokens, dtype=object))
+
+        separator_code = -1
+        if len(texts) > 1:
+            separator_code = int(np.flatnonzero(uniques == SEPARATOR)[0])
+        is_token = codes != separator_code
+        # Token count of each text = gaps between consecutive separators
+        boundaries = np.concatenate(([-1], np.flatnonzero(~is_token), [len(codes)]))
+        lengths = np.diff(boundaries) - 1
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+        words = np.flatnonzero(np.arange(len(uniques)) != separator_code)
+        vocabulary = uniques[words]
+        order = np.argsort(vocabulary.astype(str), kind='stable')
+        rank = np.full(len(uniques), -1, dtype=np.int64)
+        rank[words[order]] = np.arange(len(words))
+
+        corpus = cls(vocabulary[order], rank[codes[is_token]], offsets,
+                     None if review_ids is None else list(review_ids))
+        elapsed = time.perf_counter() - start
+        rate = len(texts) / elapsed if elapsed > 0 else 0.0
+        print(f"Tokenized {len(texts)} reviews into {len(corpus.ids)} tokens "
+              f"({len(corpus.vocabulary)} distinct) in {elapsed:.2f}s "
+              f"({rate:.0f} reviews/sec)")
+        return corpus
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def tokens(self, i):
+        """Token strings of review i"""
+        return self.vocabulary[self.ids[self.offsets[i]:self.offsets[i + 1]]].tolist()
+
+    def doc_index(self):
+        """Review position of every token"""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def take(self, rows):
+        """Corpus of the reviews at the given positions (or boolean mask)"""
+        rows = np.arange(len(self))[np.asarray(rows)]
+        lengths = self.lengths[rows]
+        starts = np.repeat(self.offsets[rows] - np.concatenate(([0], np.cumsum(lengths)[:-1])),
+                           lengths)
+        ids = self.ids[starts + np.arange(lengths.sum())]
+        review_ids = None if self.review_ids is None else self.review_ids[rows]
+        return TokenizedCorpus(self.vocabulary, ids,
+                               np.concatenate(([0], np.cumsum(lengths))), review_ids)
+
+    def matches(self, review_ids):
+        """True when this corpus was built for exactly these reviews, in order.
+
+        Ids are compared as strings, the form they are saved in, so numeric
+        or missing ids of a loaded corpus still match.
+        """
+        if self.review_ids is None or len(self.review_ids) != len(review_ids):
+            return False
+        return bool((np.asarray(list(map(str, self.review_ids)), dtype=object)
+                     == np.asarray(list(map(str, review_ids)), dtype=object)).all())
+
+    def token_buffer(self):
+        """Tokens of each review joined by spaces and reviews joined by
+        SEPARATOR: normalized_buffer without punctuation or extra spaces"""
+        words = np.insert(self.vocabulary[self.ids], self.offsets[1:-1], SEPARATOR)
+        return ' '.join(words.tolist())
+
+    def latin_vocabulary(self):
+        """Vocabulary with Ge'ez tokens transliterated to Latin letters"""
+        return np.array([transliterate(word) for word in self.vocabulary], dtype=object)
+
+    def term_matrix(self, ngram_range=(1, 1), stop_words='english', min_length=2):
+        """Review x term count matrix and its alphabetical feature names.
+
+        Matches CountVectorizer(stop_words=..., ngram_range=...) on the
+        normalized text: tokens shorter than min_length and stop words are
+        dropped first, and bigrams join the remaining consecutive tokens.
+        """
+        if stop_words == 'english':
+            stop_words = ENGLISH_STOP_WORDS
+        stop_words = stop_words or frozenset()
+        keep_word = np.fromiter(
+            (len(word) >= min_length and word not in stop_words for word in self.vocabulary),
+            dtype=bool, count=len(self.vocabulary))
+        keep = keep_word[self.ids]
+        ids = self.ids[keep].astype(np.int64)
+        doc = self.doc_index()[keep]
+
+        names, columns, rows = [], [], []
+        if ngram_range[0] <= 1 <= ngram_range[1]:
+            unigrams, inverse = np.unique(ids, return_inverse=True)
+            names.append(self.vocabulary[unigrams])
+            columns.append(inverse)
+            rows.append(doc)
+        if ngram_range[0] <= 2 <= ngram_range[1] and len(ids) > 1:
+            pairs = np.flatnonzero(doc[1:] == doc[:-1])
+            codes = ids[pairs] * len(self.vocabulary) + ids[pairs + 1]
+            bigrams, inverse = np.unique(codes, return_inverse=True)
+            first, second = np.divmod(bigrams, len(self.vocabulary))
+            names.append(np.array([f"{a} {b}" for a, b in zip(
+                self.vocabulary[first], self.vocabulary[second])], dtype=object))
+            columns.append(inverse + sum(len(n) for n in names[:-1]))
+            rows.append(doc[pairs])
+
+        if not names:
+            return sparse.csr_matrix((len(self), 0), dtype=np.int64), np.array([], dtype=object)
+        names = np.concatenate(names)
+        order = np.argsort(names.astype(str), kind='stable')
+        position = np.empty(len(names), dtype=np.int64)
+        position[order] = np.arange(len(names))
+        columns = position[np.concatenate(columns)]
+        rows = np.concatenate(rows)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int64), (rows, columns)),
+            shape=(len(self), len(names)))
+        return matrix, names[order]
+
+    def save(self, path=TOKENS_PATH):
+        """Store the arrays in one .npz; strings as newline-joined UTF-8"""
+        def blob(values):
+            return np.frombuffer('\n'.join(map(str, values)).encode('utf-8'), dtype=np.uint8)
+
+        manifest = {'reviews': len(self), 'has_review_ids': self.review_ids is not None}
+        np.savez_compressed(
+            path, manifest=np.array(json.dumps(manifest)),
+            vocabulary=blob(self.vocabulary), ids=self.ids, offsets=self.offsets,
+            review_ids=blob(self.review_ids if self.review_ids is not None else []))
+        print(f"Saved {len(self)} tokenized reviews to {path}")
+
+    @classmethod
+    def load(cls, path=TOKENS_PATH):
+        def unblob(values, n=None):
+            text = values.tobytes().decode('utf-8')
+            return np.array(text.split('\n') if text or n else [], dtype=object)
+
+        with np.load(path) as data:
+            manifest = json.loads(str(data['manifest']))
+            review_ids = (unblob(data['review_ids'], manifest['reviews'])
+                          if manifest['has_review_ids'] else None)
+            return cls(unblob(data['vocabulary']), data['ids'], data['offsets'],
+                       review_ids)
+
+
+def corpus_for(df, corpus=None, column='review'):
+    """A corpus aligned with df: the given one if it was built for df's
+    reviews, otherwise a new one tokenized from df[column]"""
+    review_ids = df['review_id'].tolist() if 'review_id' in df else None
+    if corpus is not None:
+        if (review_ids is None and len(corpus) == len(df)
+                or review_ids is not None and corpus.matches(review_ids)):
+            return corpus
+        print(f"Token corpus ({len(corpus)} reviews) does not match these "
+              f"{len(df)} reviews, tokenizing them again")
+    return TokenizedCorpus.build(df[column].tolist(), review_ids)
+
+
+if __name__ == "__main__":
+    df = pd.read_csv('data/processed/cleaned_reviews.csv')
+    TokenizedCorpus.build(df['review'].tolist(), df['review_id'].tolist()).save()
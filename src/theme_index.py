@@ -0,0 +1,169 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.instrument import instrumented
+from src.matcher import get_matchers
+from src.storage import UNKNOWN_MONTH
+
+THEME_COLUMN = 'themes'
+FACETS = {'bank': 'bank', 'sentiment': 'sentiment_label', 'month': 'month'}
+INDEX_PATH = '../data/processed/theme_index.npz'
+
+
+def mask_dtype(n_groups):
+    """Smallest unsigned integer type holding one bit per group"""
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if n_groups <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"Too many themes for a bitmask column: {n_groups}")
+
+
+@instrumented
+def assign_themes(df, matcher=None, column=THEME_COLUMN):
+    """Add a bitmask column with every theme each review mentions.
+
+    Bit i is set when the review contains a keyword of the i-th theme of
+    the taxonomy (matcher.labels order); use theme_labels to decode.
+    """
+    if matcher is None:
+        matcher = get_matchers()['themes']
+
+    start = time.perf_counter()
+    df = df.copy()
+    df[column] = matcher.mask_many(df['review'].tolist()).astype(
+        mask_dtype(len(matcher.labels)))
+
+    elapsed = time.perf_counter() - start
+    rate = len(df) / elapsed if elapsed > 0 else 0.0
+    tagged = (df[column] != 0).sum()
+    print(f"Assigned themes to {tagged}/{len(df)} reviews in {elapsed:.2f}s "
+          f"({rate:.0f} reviews/sec)")
+    return df
+
+
+def theme_labels(df, matcher=None, column=THEME_COLUMN):
+    """Decode the bitmask column into a list of theme labels per review"""
+    if matcher is None:
+        matcher = get_matchers()['themes']
+    return df[column].map(lambda mask: matcher.labels_for(int(mask)))
+
+
+class ThemeIndex:
+    """Inverted index from themes, keywords, banks, sentiment and month to reviews.
+
+    Every key maps to a sorted array of row positions; a lookup intersects
+    the posting lists of the requested keys (smallest first) and returns
+    the matching review_ids, so no pass over the reviews is needed.
+    """
+
+    def __init__(self, review_ids, postings):
+        self.review_ids = np.asarray(review_ids, dtype=object)
+        self.postings = postings
+
+    @classmethod
+    @instrumented
+    def build(cls, df, matcher=None):
+        """Index scored reviews (review_id, review, bank, sentiment_label, date)"""
+        if matcher is None:
+            matcher = get_matchers()['themes']
+
+        start = time.perf_counter()
+        keyword_postings = matcher.postings(df['review'].tolist())
+        postings = {'keyword': keyword_postings, 'theme': {}}
+        for bit, label in enumerate(matcher.labels):
+            # The empty array keeps a label without keywords valid
+            postings['theme'][label] = np.unique(np.concatenate(
+                [np.empty(0, dtype=np.int64),
+                 *(keyword_postings[k] for k, bits in matcher.keyword_bits.items()
+                   if bits & (1 << bit))]))
+
+        month = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m')
+        facets = pd.DataFrame({
+            'bank': df['bank'].to_numpy(),
+            'sentiment_label': df['sentiment_label'].to_numpy(),
+            'month': month.fillna(UNKNOWN_MONTH).to_numpy(),
+        })
+        for facet, column in FACETS.items():
+            postings[facet] = {str(value): np.asarray(rows, dtype=np.int64)
+                               for value, rows in
+                               facets.groupby(column, sort=True).indices.items()}
+
+        index = cls(df['review_id'].astype(str).to_numpy(), postings)
+        print(f"Built theme index over {len(df)} reviews in "
+              f"{time.perf_counter() - start:.2f}s")
+        return index
+
+    def rows(self, theme=None, keyword=None, bank=None, sentiment=None,
+             month=None):
+        """Sorted row positions matching every given key"""
+        keys = {'theme': theme, 'keyword': keyword, 'bank': bank,
+                'sentiment': sentiment, 'month': month}
+        lists = [self.postings[kind].get(str(value).lower() if kind == 'keyword'
+                                         else str(value),
+                                         np.empty(0, dtype=np.int64))
+                 for kind, value in keys.items() if value is not None]
+        if not lists:
+            return np.arange(len(self.review_ids))
+
+        lists.sort(key=len)
+        result = lists[0]
+        for other in lists[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, other, assume_unique=True)
+        return result
+
+    def lookup(self, n=None, **keys):
+        """review_ids of up to n reviews matching every given key.
+
+        e.g. index.lookup(5, theme='Login & Account Access', bank='Dashen Bank',
+        sentiment='negative', month='2025-03')
+        """
+        rows = self.rows(**keys)
+        if n is not None:
+            rows = rows[:n]
+        return self.review_ids[rows].tolist()
+
+    def counts(self, kind):
+        """Number of reviews per key of one posting kind"""
+        return pd.Series({key: len(rows) for key, rows in
+                          self.postings[kind].items()}, dtype='int64')
+
+    def save(self, path=INDEX_PATH):
+        """Store the index as one .npz file of posting arrays"""
+        arrays = {'review_ids': self.review_ids.astype(str)}
+        manifest = {}
+        for kind, lists in self.postings.items():
+            manifest[kind] = []
+            for key, rows in lists.items():
+                name = f"p{len(arrays)}"
+                arrays[name] = rows
+                manifest[kind].append([key, name])
+        arrays['manifest'] = np.array(json.dumps(manifest))
+        np.savez_compressed(path, **arrays)
+        print(f"Saved theme index to {path}")
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with np.load(path) as data:
+            manifest = json.loads(str(data['manifest']))
+            postings = {kind: {key: data[name] for key, name in entries}
+                        for kind, entries in manifest.items()}
+            return cls(data['review_ids'].astype(object), postings)
+
+
+if __name__ == "__main__":
+    df = pd.read_csv('data/processed/reviews_with_sentiment.csv')
+    df = assign_themes(df)
+    index = ThemeIndex.build(df)
+    index.save('data/processed/theme_index.npz')
+
+    print("\nReviews per theme:")
+    print(index.counts('theme').to_string())
+    print("\nNegative Login & Account Access reviews for Dashen Bank:")
+    for review_id in index.lookup(5, theme='Login & Account Access',
+                                  bank='Dashen Bank', sentiment='negative'):
+        print(f"  {review_id}")
@@ -1,8 +1,20 @@
 import pandas as pd
+import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 import re
+import time
 
+from src.instrument import instrumented
+from src.matcher import KeywordMatcher, get_matchers
+from src.text import corpus_for
 
+# The taxonomy and stop words are English; reviews detected as another
+# language (src.language) do not contribute keywords or examples
+THEME_LANGUAGES = ('en',)
+
+
+@instrumented
 def extract_keywords(reviews, top_n=20):
     print("Extracting important keywords...")
 
@@ -28,41 +40,65 @@ def extract_keywords(reviews, top_n=20):
     return feature_names
 
 
-def group_into_themes(keywords):
-    """Group keywords into 3-5 themes manually"""
+def theme_mask(df):
+    """Reviews in THEME_LANGUAGES when df has a lang column, otherwise all"""
+    if 'lang' not in df:
+        return np.ones(len(df), dtype=bool)
+    return df['lang'].isin(THEME_LANGUAGES).to_numpy()
+
+
+def top_terms(term_counts, feature_names, top_n):
+    """Same selection as TfidfVectorizer(max_features=top_n) on one bank.
+
+    Terms are ranked by total count with ties kept in alphabetical order,
+    and the winners are returned alphabetically like get_feature_names_out.
+    """
+    present = np.flatnonzero(term_counts)
+    order = np.argsort(-term_counts[present], kind='stable')[:top_n]
+    return feature_names[np.sort(present[order])]
+
+
+@instrumented
+def extract_keywords_by_bank(df, top_n=20, corpus=None):
+    """Top keywords for every bank from one shared document-term matrix.
+
+    The document-term matrix comes from the shared token arrays (corpus,
+    or a new TokenizedCorpus when it is missing or built for other
+    reviews); a sparse bank-by-review indicator matrix times the
+    document-term matrix gives every bank's term counts in a single
+    product. Only reviews in THEME_LANGUAGES are counted.
+    """
+    print("Extracting important keywords for all banks...")
+
+    doc_terms, feature_names = corpus_for(df, corpus).term_matrix(ngram_range=(1, 2))
+
+    banks = df['bank'].unique()
+    codes = pd.Categorical(df['bank'], categories=banks).codes
+    rows = np.flatnonzero((codes >= 0) & theme_mask(df))
+    membership = sparse.csr_matrix(
+        (np.ones(len(rows)), (codes[rows], rows)),
+        shape=(len(banks), doc_terms.shape[0]))
+    bank_terms = (membership @ doc_terms).toarray()
+
+    keywords = {bank: top_terms(bank_terms[i], feature_names, top_n)
+                for i, bank in enumerate(banks)}
+    print(f"Vocabulary of {len(feature_names)} terms across {len(banks)} banks")
+    return keywords
+
+
+def group_into_themes(keywords, matcher=None):
+    """Group keywords into 3-5 themes from the configured taxonomy"""
     print("\nGrouping keywords into themes...")
 
-    themes = {
-        'Login & Account Access': [],
-        'Transaction & Transfer': [],
-        'App Performance': [],
-        'User Interface': [],
-        'Customer Support': [],
-        'Feature Requests': []
-    }
-
-    login_words = ['login', 'password', 'fingerprint', 'access', 'account']
-    transaction_words = ['transfer', 'transaction', 'money', 'send', 'payment']
-    performance_words = ['slow', 'fast', 'crash', 'error', 'bug', 'work']
-    ui_words = ['interface', 'design', 'easy', 'simple', 'beautiful']
-    support_words = ['support', 'help', 'service', 'contact']
-    feature_words = ['should', 'could', 'please', 'add', 'feature']
+    if matcher is None:
+        matcher = get_matchers()['themes']
+    themes = {theme: [] for theme in matcher.labels}
 
     for keyword in keywords:
-        keyword_lower = keyword.lower()
-
-        if any(word in keyword_lower for word in login_words):
-            themes['Login & Account Access'].append(keyword)
-        elif any(word in keyword_lower for word in transaction_words):
-            themes['Transaction & Transfer'].append(keyword)
-        elif any(word in keyword_lower for word in performance_words):
-            themes['App Performance'].append(keyword)
-        elif any(word in keyword_lower for word in ui_words):
-            themes['User Interface'].append(keyword)
-        elif any(word in keyword_lower for word in support_words):
-            themes['Customer Support'].append(keyword)
-        elif any(word in keyword_lower for word in feature_words):
-            themes['Feature Requests'].append(keyword)
+        theme = matcher.first(keyword)
+
+        if theme is not None:
+            themes[theme].append(keyword)
         else:
             for theme in themes:
                 if len(themes[theme]) < 5:
@@ -78,37 +114,48 @@ def group_into_themes(keywords):
     return themes
 
 
-def analyze_themes_by_bank(df):
+def find_theme_examples(bank_reviews, themes):
+    """Up to 2 of the first 20 reviews per theme, in one pass over reviews"""
+    matcher = KeywordMatcher({theme: keywords[:3]
+                              for theme, keywords in themes.items()})
+    theme_examples = {theme: [] for theme in themes}
+
+    for review in bank_reviews[:20]:
+        for theme in matcher.match(review):
+            if len(theme_examples[theme]) < 2:
+                short_review = str(review)[
+                    :80] + "..." if len(str(review)) > 80 else str(review)
+                theme_examples[theme].append(short_review)
+
+    return theme_examples
+
+
+@instrumented
+def analyze_themes_by_bank(df, corpus=None):
+    """Themes and example reviews per bank, from one shared vocabulary.
+
+    corpus is reused for keyword extraction when it holds df's reviews.
+    """
     print("\n" + "="*50)
     print("THEMATIC ANALYSIS BY BANK")
     print("="*50)
 
-    bank_themes = {}
+    start = time.perf_counter()
+    bank_keywords = extract_keywords_by_bank(df, corpus=corpus)
+    reviews_by_bank = df[theme_mask(df)].groupby('bank', sort=False)['review'].agg(list)
 
-    for bank in df['bank'].unique():
+    def analyze_bank(bank):
         print(f"\nAnalyzing {bank}...")
-
-        bank_reviews = df[df['bank'] == bank]['review'].tolist()
-        keywords = extract_keywords(bank_reviews)
-
-        themes = group_into_themes(keywords)
-        theme_examples = {}
-        for theme, theme_keywords in themes.items():
-            examples = []
-            for review in bank_reviews[:20]:
-                if any(keyword in str(review).lower() for keyword in theme_keywords[:3]):
-                    short_review = str(review)[
-                        :80] + "..." if len(str(review)) > 80 else str(review)
-                    examples.append(short_review)
-                    if len(examples) >= 2:
-                        break
-            theme_examples[theme] = examples
-
-        bank_themes[bank] = {
+        themes = group_into_themes(bank_keywords[bank])
+        theme_examples = find_theme_examples(reviews_by_bank.get(bank, []), themes)
+        print(f"{bank}: Found {len(themes)} themes")
+        return bank, {
             'themes': themes,
             'examples': theme_examples
         }
 
-        print(f"{bank}: Found {len(themes)} themes")
+    bank_themes = dict(analyze_bank(bank) for bank in bank_keywords)
 
+    print(f"\nThemes for {len(bank_themes)} banks in "
+          f"{time.perf_counter() - start:.2f}s")
     return bank_themes
@@ -0,0 +1,171 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.aggregate_store import UNKNOWN_DAY
+from src.instrument import instrumented
+
+# Rolling windows per resampling frequency, in periods of that frequency
+DEFAULT_WINDOWS = {'D': [7, 30], 'W': [4, 12]}
+PERIOD_DAYS = {'D': 1, 'W': 7}
+# Periods are labelled by their first day (weeks start on Monday)
+RESAMPLE_RULES = {'D': 'D', 'W': 'W-MON'}
+TREND_STATS = ['reviews', 'score_sum', 'score_count', 'negative_count']
+TREND_COLUMNS = ['bank', 'freq', 'window', 'period', 'reviews',
+                 'score_mean', 'negative_share']
+
+
+@instrumented
+def daily_totals(df):
+    """Per bank and day review counts, score sums and negative counts"""
+    day = pd.to_datetime(df['date'], errors='coerce').dt.floor('D')
+    valid = day.notna() & df['bank'].notna()
+    frame = pd.DataFrame({
+        'bank': df.loc[valid, 'bank'],
+        'day': day[valid],
+        'reviews': 1,
+        'score_sum': df.loc[valid, 'sentiment_score'].fillna(0.0),
+        'score_count': df.loc[valid, 'sentiment_score'].notna().astype('int64'),
+        'negative_count': (df.loc[valid, 'sentiment_label'] == 'negative').astype('int64'),
+    })
+    return frame.groupby(['bank', 'day'], sort=True)[TREND_STATS].sum().reset_index()
+
+
+@instrumented
+def rolling_trends(daily, freq='D', window=7):
+    """Rolling review count, mean sentiment and negative share per bank.
+
+    daily holds one row per bank and day (see daily_totals). Each stat is
+    pivoted to a period x bank matrix, resampled to freq (empty periods
+    count as zero, periods labelled by their first day) and summed over a
+    trailing window of `window` periods, all banks at once. Means and
+    shares are ratios of the rolling sums; both are over scored reviews
+    (score_count), so reviews left unscored only count in reviews.
+    """
+    if daily.empty:
+        return pd.DataFrame(columns=TREND_COLUMNS)
+
+    wide = daily.pivot_table(index='day', columns='bank', values=TREND_STATS,
+                             aggfunc='sum', fill_value=0)
+    wide = wide.resample(RESAMPLE_RULES[freq], closed='left', label='left').sum()
+    rolled = wide.rolling(window, min_periods=1).sum()
+
+    reviews = rolled['reviews'].to_numpy()
+    score_count = rolled['score_count'].to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        score_mean = np.where(score_count > 0,
+                              rolled['score_sum'].to_numpy() / score_count, np.nan)
+        negative_share = np.where(score_count > 0,
+                                  rolled['negative_count'].to_numpy() / score_count, np.nan)
+
+    periods, banks = rolled.index, rolled['reviews'].columns
+    trends = pd.DataFrame({
+        'bank': np.tile(banks.to_numpy(), len(periods)),
+        'freq': freq,
+        'window': window,
+        'period': np.repeat(periods.to_numpy(), len(banks)),
+        'reviews': reviews.ravel().astype('int64'),
+        'score_mean': score_mean.ravel(),
+        'negative_share': negative_share.ravel(),
+    })
+    trends = trends[trends['reviews'] > 0]
+    return trends.sort_values(['bank', 'period'], ignore_index=True)
+
+
+class TrendStore:
+    """Rolling sentiment trends kept next to an AggregateStore.
+
+    The store's per-day rows are the incremental input: add_reviews merges
+    a batch into the AggregateStore and then recomputes only the periods
+    from the batch's earliest day onwards (reading just enough earlier
+    days to fill the longest window), upserting them into the
+    sentiment_trends table. Older trend rows are never touched.
+    """
+
+    def __init__(self, store, windows=None):
+        self.store = store
+        self.conn = store.conn
+        self.windows = windows or DEFAULT_WINDOWS
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS sentiment_trends (
+                bank TEXT NOT NULL,
+                freq TEXT NOT NULL,
+                window INTEGER NOT NULL,
+                period TEXT NOT NULL,
+                reviews INTEGER NOT NULL,
+                score_mean REAL,
+                negative_share REAL,
+                PRIMARY KEY (bank, freq, window, period)
+            )
+        """)
+        self.conn.commit()
+
+    def _lookback_days(self):
+        return max(PERIOD_DAYS[freq] * (max(windows) + 1)
+                   for freq, windows in self.windows.items())
+
+    def _daily_since(self, day):
+        """Per bank and day totals from the AggregateStore, from day on"""
+        query = """
+            SELECT bank, day, SUM(total_reviews) AS reviews,
+                   SUM(score_sum) AS score_sum, SUM(score_count) AS score_count,
+                   SUM(negative_count) AS negative_count
+            FROM daily_sentiment
+            WHERE day != ? AND day >= ?
+            GROUP BY bank, day
+        """
+        daily = pd.read_sql_query(query, self.conn, params=(UNKNOWN_DAY, day))
+        daily['day'] = pd.to_datetime(daily['day'])
+        return daily
+
+    @instrumented
+    def update(self, since=None):
+        """Recompute trend rows for periods from `since` (default: everything)"""
+        start = time.perf_counter()
+        first = '0000-00-00'
+        if since is not None:
+            since = pd.Timestamp(since).floor('D')
+            first = (since - pd.Timedelta(days=self._lookback_days())).strftime('%Y-%m-%d')
+
+        daily = self._daily_since(first)
+        written = 0
+        for freq, windows in self.windows.items():
+            label_start = since.to_period(freq).start_time if since is not None else None
+            for window in windows:
+                trends = rolling_trends(daily, freq, window)
+                if label_start is not None:
+                    trends = trends[trends['period'] >= label_start]
+                trends = trends.assign(period=trends['period'].dt.strftime('%Y-%m-%d'))
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO sentiment_trends "
+                    f"({', '.join(TREND_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    trends.astype(object).where(trends.notna(), None)
+                    .itertuples(index=False, name=None))
+                written += len(trends)
+        self.conn.commit()
+        print(f"Updated {written} trend rows in {time.perf_counter() - start:.2f}s")
+        return written
+
+    @instrumented
+    def add_reviews(self, df):
+        """Merge scored reviews into the store and refresh the affected trends"""
+        added = self.store.add_reviews(df)
+        days = pd.to_datetime(df['date'], errors='coerce')
+        if added and days.notna().any():
+            self.update(since=days.min())
+        return added
+
+    def trends(self, bank=None, freq='D', window=None):
+        """Stored trend rows for one frequency (and optionally bank / window)"""
+        if window is None:
+            window = self.windows[freq][0]
+        query = "SELECT * FROM sentiment_trends WHERE freq = ? AND window = ?"
+        params = [freq, window]
+        if bank is not None:
+            query += " AND bank = ?"
+            params.append(bank)
+        df = pd.read_sql_query(query + " ORDER BY bank, period", self.conn,
+                               params=params)
+        df['period'] = pd.to_datetime(df['period'])
+        return df
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from src.aggregate_store import AggregateStore
+from src.sentiment import aggregate_by_bank_and_rating
+from tests.test_sentiment import scored_reviews
+
+
+def test_store_matches_full_aggregation():
+    store = AggregateStore()
+    pd.testing.assert_frame_equal(aggregate_by_bank_and_rating(scored_reviews(), store=store),
+                                  aggregate_by_bank_and_rating(scored_reviews()),
+                                  check_dtype=False)
+
+
+def test_batches_merge_to_the_same_result():
+    df = scored_reviews()
+    store = AggregateStore()
+    assert store.add_reviews(df.iloc[:3]) == 3
+    assert store.add_reviews(df.iloc[3:]) == 5
+    pd.testing.assert_frame_equal(store.to_dataframe(),
+                                  aggregate_by_bank_and_rating(df),
+                                  check_dtype=False)
+
+
+def test_resent_reviews_are_not_counted_twice():
+    df = scored_reviews()
+    store = AggregateStore()
+    store.add_reviews(df)
+    assert store.add_reviews(pd.concat([df.iloc[:2], df.iloc[:2]])) == 0
+    assert store.to_dataframe()['total_reviews'].sum() == len(df)
+
+
+def test_totals_persist_across_instances(tmp_path):
+    path = tmp_path / "aggregates.sqlite"
+    store = AggregateStore(path)
+    store.add_reviews(scored_reviews())
+    store.close()
+
+    reopened = AggregateStore(path)
+    assert reopened.add_reviews(scored_reviews()) == 0
+    assert reopened.daily_stats('A')['total_reviews'].sum() == 4
+    reopened.close()
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from src.anomaly import AnomalyDetector
+from src.sentiment import UNSCORED_LABEL
+
+
+def review_stream(spike_at=500, spike_length=60, n=1200):
+    """Bank A is 10% negative except for one all-negative burst; bank B
+    stays at 10% throughout"""
+    rows = []
+    for i in range(n):
+        spiking = spike_at <= i < spike_at + spike_length
+        for bank in ('A', 'B'):
+            negative = (bank == 'A' and spiking) or i % 10 == 0
+            rows.append({'review_id': f"{bank}{i}", 'bank': bank, 'review': 'text',
+                         'date': str(pd.Timestamp('2025-01-01') + pd.Timedelta(hours=i)),
+                         'sentiment_label': 'negative' if negative else 'positive'})
+    return pd.DataFrame(rows)
+
+
+def test_spike_fires_exactly_once():
+    detector = AnomalyDetector(themes=False)
+    alerts = detector.process(review_stream())
+
+    assert len(alerts) == 1
+    alert = alerts[0]
+    assert alert['bank'] == 'A' and alert['theme'] is None
+    assert 500 <= int(alert['review_id'][1:]) < 560
+    assert alert['negative_share'] > alert['baseline']
+
+
+def test_steady_stream_never_alerts():
+    detector = AnomalyDetector(themes=False)
+    assert detector.process(review_stream(spike_length=0)) == []
+
+
+def test_batches_give_the_same_alerts():
+    df = review_stream()
+    whole = AnomalyDetector(themes=False).process(df)
+
+    chunked = AnomalyDetector(themes=False)
+    for start in range(0, len(df), 97):
+        chunked.process(df.iloc[start:start + 97])
+    assert chunked.alerts == whole
+
+
+def test_unscored_reviews_do_not_dilute_the_shares():
+    df = review_stream()
+    unscored = df.assign(review_id=df['review_id'] + 'u', sentiment_label=UNSCORED_LABEL)
+    mixed = pd.concat([df, unscored]).sort_index(kind='stable', ignore_index=True)
+
+    detector = AnomalyDetector(themes=False)
+    alerts = detector.process(mixed)
+    assert [a['review_id'] for a in alerts] == [
+        a['review_id'] for a in AnomalyDetector(themes=False).process(df)]
+    assert detector.processed == len(mixed)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.bank_stats import BankStats
+from src.matcher import get_matchers
+from src.sentiment import UNSCORED_LABEL
+from tests.test_sentiment import scored_reviews
+
+
+def test_counts_match_dataframe_filters():
+    df = scored_reviews()
+    stats = BankStats(df, tokens=False)
+    assert stats.banks == ['A', 'B']
+    for bank in ('A', 'B', None):
+        for sentiment in ('positive', 'negative', UNSCORED_LABEL, None):
+            mask = np.ones(len(df), dtype=bool)
+            if bank is not None:
+                mask &= df['bank'] == bank
+            if sentiment is not None:
+                mask &= df['sentiment_label'] == sentiment
+            assert stats.count(bank, sentiment) == mask.sum()
+
+
+def test_bank_summary_matches_groupby():
+    df = scored_reviews()
+    summary = BankStats(df, tokens=False).bank_summary()
+    grouped = df.groupby('bank').agg(rating=('rating', 'mean'),
+                                     sentiment_score=('sentiment_score', 'mean'),
+                                     review=('review', 'count'))
+    pd.testing.assert_frame_equal(summary[['rating', 'sentiment_score', 'review']],
+                                  grouped, check_names=False)
+
+
+def test_keyword_hits_match_per_review_matching():
+    df = scored_reviews()
+    stats = BankStats(df, taxonomies=['pain_points'], tokens=False)
+    matcher = get_matchers()['pain_points']
+    negative = df[(df['bank'] == 'B') & (df['sentiment_label'] == 'negative')]
+    expected = {label: sum(label in matcher.match(text) for text in negative['review'])
+                for label in matcher.labels}
+    assert stats.hits('pain_points', 'B', 'negative').to_dict() == expected
+    assert stats.labels_hit('pain_points', 'B', 'negative') == ['Slow Performance']
+
+
+def test_token_frequencies_per_bank():
+    stats = BankStats(scored_reviews(), taxonomies=[])
+    assert stats.token_frequencies('B', 'negative') == {'bad': 1, 'slow': 1}
+    assert stats.top_tokens('A', n=1) == [('bad', 1)]
+
+
+def test_shares_are_over_scored_reviews():
+    stats = BankStats(scored_reviews(), taxonomies=[], tokens=False)
+    assert stats.count('A') == 4 and stats.scored_count('A') == 3
+    assert stats.sentiment_share()['positive'] == pytest.approx(2 / 6)
+    assert UNSCORED_LABEL not in stats.sentiment_share()
@@ -0,0 +1,56 @@
+from src.cache import SentimentCache, cache_key
+from src.sentiment import score_texts_cached
+
+
+def test_miss_then_hit_shares_normalized_key():
+    cache = SentimentCache("test-v1")
+    assert cache.get("Great app") is None
+
+    cache.put("Great app", "positive", 0.8)
+    assert cache.get("GREAT App") == ("positive", 0.8)
+    assert cache.get("Great app!") is None
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 2
+
+
+def test_version_is_part_of_the_key():
+    assert cache_key("Great app", "test-v1") != cache_key("Great app", "test-v2")
+
+
+def test_sqlite_tier_persists_across_instances(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    first = SentimentCache("test-v1", path=path)
+    first.put_many([("Great app", "positive", 0.8),
+                    ("Slow transfers", "negative", -0.4)])
+    first.close()
+
+    second = SentimentCache("test-v1", path=path)
+    assert second.get("slow transfers") == ("negative", -0.4)
+    assert second.stats['disk_hits'] == 1
+    second.close()
+
+
+def test_evicted_entries_are_served_from_disk(tmp_path):
+    cache = SentimentCache("test-v1", path=tmp_path / "cache.sqlite",
+                           max_entries=1)
+    cache.put("first", "neutral", 0.0)
+    cache.put("second", "neutral", 0.0)
+    assert cache.stats['evictions'] == 1
+
+    assert cache.get("first") == ("neutral", 0.0)
+    assert cache.stats['disk_hits'] == 1
+    cache.close()
+
+
+def test_cached_scoring_only_scores_unseen_texts():
+    cache = SentimentCache("lexicon-test")
+    texts = ["Great app", "great APP", "Terrible update"]
+
+    labels, scores = score_texts_cached(texts, cache, backend='lexicon')
+    assert labels[0] == labels[1]
+    assert cache.stats['writes'] == 2
+
+    again, again_scores = score_texts_cached(texts, cache, backend='lexicon')
+    assert again == labels
+    assert again_scores == scores
+    assert cache.stats['writes'] == 2
@@ -0,0 +1,62 @@
+import os
+
+import matplotlib
+import pytest
+
+from src import charts
+from src.bank_stats import BankStats
+from src.charts import HASH_FILE, render_charts
+from tests.test_sentiment import scored_reviews
+
+CHARTS = ['avg_ratings.png', 'sentiment_by_bank.png', 'wordcloud_a.png', 'wordcloud_b.png']
+
+
+@pytest.fixture
+def stats():
+    return BankStats(scored_reviews(), taxonomies=[])
+
+
+def names(paths):
+    return sorted(os.path.basename(path) for path in paths)
+
+
+def test_unchanged_charts_are_skipped(tmp_path, stats):
+    assert names(render_charts(stats, tmp_path)) == CHARTS
+    assert (tmp_path / HASH_FILE).exists()
+    assert render_charts(stats, tmp_path) == []
+
+
+def test_changed_or_missing_charts_are_redrawn(tmp_path, stats):
+    render_charts(stats, tmp_path)
+    (tmp_path / 'avg_ratings.png').unlink()
+    assert names(render_charts(stats, tmp_path)) == ['avg_ratings.png']
+
+    df = scored_reviews()
+    df.loc[0, 'rating'] = 1
+    changed = BankStats(df, taxonomies=[])
+    assert names(render_charts(changed, tmp_path)) == ['avg_ratings.png']
+
+
+def test_force_redraws_everything(tmp_path, stats):
+    render_charts(stats, tmp_path)
+    assert names(render_charts(stats, tmp_path, force=True)) == CHARTS
+
+
+def test_shown_charts_are_never_skipped_and_closed(tmp_path, stats, monkeypatch):
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    monkeypatch.setattr(plt, 'show', lambda: None)
+
+    render_charts(stats, tmp_path)
+    assert names(render_charts(stats, tmp_path, headless=False)) == CHARTS
+    assert plt.get_fignums() == []
+
+
+def test_process_pool_renders_the_same_files(tmp_path, stats):
+    assert names(render_charts(stats, tmp_path, workers=2)) == CHARTS
+    assert names(os.listdir(tmp_path)) == sorted(CHARTS + [HASH_FILE])
+
+
+def test_banks_without_tokens_get_no_word_cloud():
+    specs = charts.chart_specs(BankStats(scored_reviews(), taxonomies=[], tokens=False))
+    assert [spec[0] for spec in specs] == ['sentiment_by_bank.png', 'avg_ratings.png']
@@ -0,0 +1,107 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import database
+from src.database import REVIEW_COLUMNS, build_review_records, copy_records
+
+BANK_IDS = {'commercial bank of ethiopia': 1, 'dashen bank': 3}
+
+
+def scored_reviews():
+    return pd.DataFrame({
+        'review_id': [101, 102, 103, 104],
+        'review': ['good', 'bad', 'ጥሩ', 'ok'],
+        'rating': [5.0, 1.0, 4.0, 3.0],
+        'date': ['2025-01-01', '2025-01-02', '2025-01-03', '2025-01-04'],
+        'bank': ['Commercial Bank of Ethiopia', ' dashen bank ', 'Dashen Bank', 'Unknown Bank'],
+        'sentiment_label': ['positive', 'negative', 'unscored', 'neutral'],
+        'sentiment_score': [0.7, -0.5, np.nan, 0.0],
+    })
+
+
+@pytest.fixture
+def scratch_database(monkeypatch):
+    """A PostgreSQL database the test may overwrite, named by TEST_DATABASE"""
+    name = os.getenv('TEST_DATABASE')
+    if not name:
+        pytest.skip("set TEST_DATABASE to a scratch PostgreSQL database")
+    monkeypatch.setenv('DB_NAME', name)
+    database.close_pool()
+    database.setup_database()
+    with database.connection() as conn:
+        conn.cursor().execute("TRUNCATE reviews")
+    yield
+    database.close_pool()
+
+
+def test_records_match_banks_case_insensitively():
+    records, unmatched = build_review_records(scored_reviews(), BANK_IDS)
+    assert list(records.columns) == REVIEW_COLUMNS
+    assert records['bank_id'].tolist() == [1, 3, 3]
+    assert records['review_id'].tolist() == ['101', '102', '103']
+    assert records['rating'].dtype == int
+    assert unmatched == {'Unknown Bank'}
+
+
+def test_unscored_reviews_get_null_scores():
+    records, _ = build_review_records(scored_reviews(), BANK_IDS)
+    assert records['sentiment_score'].tolist() == [0.7, -0.5, None]
+
+
+def test_cleaned_reviews_default_to_unknown_sentiment():
+    df = scored_reviews().drop(columns=['sentiment_label', 'sentiment_score'])
+    records, _ = build_review_records(df, BANK_IDS)
+    assert set(records['sentiment_label']) == {'unknown'}
+    assert set(records['sentiment_score']) == {0.0}
+
+
+def test_copy_streams_csv_in_column_order():
+    class Cursor:
+        def copy_expert(self, sql, buffer):
+            self.sql, self.data = sql, buffer.read()
+
+    cur = Cursor()
+    records, _ = build_review_records(scored_reviews(), BANK_IDS)
+    copy_records(cur, records, 'reviews_staging')
+    assert cur.sql.startswith(f"COPY reviews_staging ({', '.join(REVIEW_COLUMNS)})")
+    assert pd.read_csv(io.StringIO(cur.data), header=None).shape == (3, len(REVIEW_COLUMNS))
+
+
+def test_bulk_load_upserts(scratch_database):
+    df = scored_reviews()
+    assert database.bulk_insert_reviews(df, chunk_rows=2) == 3
+
+    df['sentiment_label'] = 'neutral'
+    database.bulk_insert_reviews(pd.concat([df, df]))
+    assert database.verify_data() == 3
+    with database.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT DISTINCT sentiment_label FROM reviews")
+        assert cur.fetchall() == [('neutral',)]
+
+
+def test_bulk_load_matches_row_inserts(scratch_database):
+    database.insert_reviews(scored_reviews())
+    with database.connection() as conn:
+        inserted = pd.read_sql("SELECT * FROM reviews ORDER BY review_id", conn)
+        conn.cursor().execute("TRUNCATE reviews")
+
+    database.bulk_insert_reviews(scored_reviews())
+    with database.connection() as conn:
+        bulk = pd.read_sql("SELECT * FROM reviews ORDER BY review_id", conn)
+    pd.testing.assert_frame_equal(bulk, inserted)
+
+
+def test_summary_view_matches_aggregation(scratch_database):
+    from src.sentiment import aggregate_by_bank_and_rating
+
+    df = scored_reviews().iloc[:3].copy()
+    database.bulk_insert_reviews(df)
+    df['bank'] = ['Commercial Bank of Ethiopia', 'Dashen Bank', 'Dashen Bank']
+    pd.testing.assert_frame_equal(database.query_bank_rating_summary(),
+                                  aggregate_by_bank_and_rating(df),
+                                  check_dtype=False)
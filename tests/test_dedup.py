@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from src.dedup import add_duplicate_clusters, drop_near_duplicates, near_duplicate_clusters
+
+TEXTS = [
+    "The app keeps crashing every time I try to transfer money",
+    "Great app, transfers are fast and the design is simple",
+    "the app keeps crashing every time I try to transfer money!!",
+    "I cannot log in since the last update, please fix the OTP",
+    "The app keeps crashing every time i try to  transfer money :(",
+    "ok",
+    "ok",
+    "I cannot login since the last update, please fix the OTP",
+    "Customer support never answers the phone or emails",
+]
+
+
+def test_known_near_duplicates_share_a_cluster():
+    clusters = near_duplicate_clusters(TEXTS)
+    assert clusters.tolist() == [0, 1, 0, 3, 0, 5, 6, 3, 8]
+
+
+def test_workers_give_the_same_clusters():
+    texts = TEXTS * 40
+    assert np.array_equal(near_duplicate_clusters(texts, chunk_size=50, workers=2),
+                          near_duplicate_clusters(texts))
+
+
+def test_cluster_columns_and_drop():
+    df = add_duplicate_clusters(pd.DataFrame({'review': TEXTS}))
+    assert df['dup_cluster_size'].tolist() == [3, 1, 3, 2, 3, 1, 1, 2, 1]
+    assert df['dup_weight'].sum() == 6
+    assert drop_near_duplicates(df).index.tolist() == [0, 1, 3, 5, 6, 8]
@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import embedded_db
+from src.embedded_db import EmbeddedDatabase, get_backend
+from src.sentiment import aggregate_by_bank_and_rating
+
+ENGINES = ['sqlite', 'duckdb']
+
+
+def scored_reviews():
+    return pd.DataFrame({
+        'review_id': [f"r{i}" for i in range(8)],
+        'review': ['good', 'bad login', 'ok', 'ሰላም', 'slow', 'great', 'ጥሩ', 'bad'],
+        'bank': ['Dashen Bank'] * 4 + ['Bank of Abyssinia'] * 4,
+        'rating': [5, 1, 3, 5, 1, 5, 4, 1],
+        'date': ['2025-01-01'] * 4 + ['2025-01-02'] * 4,
+        'sentiment_label': ['positive', 'negative', 'neutral', 'unscored',
+                            'negative', 'positive', 'unscored', 'negative'],
+        'sentiment_score': [0.7, -0.5, 0.0, np.nan, -0.3, 0.8, np.nan, -0.7],
+    })
+
+
+@pytest.fixture(params=ENGINES)
+def db(request, tmp_path):
+    with EmbeddedDatabase(request.param, str(tmp_path / f"reviews.{request.param}")) as db:
+        db.setup_database()
+        yield db
+
+
+def test_summary_matches_aggregation(db):
+    db.bulk_insert_reviews(scored_reviews())
+    # Rows come back in bank_id order: Bank of Abyssinia (2) before Dashen (3)
+    expected = aggregate_by_bank_and_rating(scored_reviews().iloc[::-1])
+    pd.testing.assert_frame_equal(db.query_bank_rating_summary(), expected,
+                                  check_dtype=False)
+
+
+def test_reloading_upserts_instead_of_duplicating(db):
+    df = scored_reviews()
+    db.bulk_insert_reviews(df)
+    df['sentiment_label'] = 'neutral'
+    df['sentiment_score'] = 0.0
+    db.bulk_insert_reviews(pd.concat([df, df]))
+
+    assert db.verify_data() == len(df)
+    summary = db.query_bank_rating_summary()
+    assert summary['neutral_count'].sum() == len(df)
+    assert summary['unscored_count'].sum() == 0
+
+
+def test_failed_load_rolls_back(db, monkeypatch):
+    db.bulk_insert_reviews(scored_reviews().iloc[:4])
+
+    def broken_refresh():
+        raise RuntimeError("refresh failed")
+
+    monkeypatch.setattr(db, 'refresh_summary', broken_refresh)
+    with pytest.raises(RuntimeError):
+        db.bulk_insert_reviews(scored_reviews().iloc[4:])
+    assert db.verify_data() == 4
+
+
+def test_setup_is_idempotent(db):
+    db.bulk_insert_reviews(scored_reviews())
+    db.setup_database()
+    assert db.verify_data() == len(scored_reviews())
+    assert db.query_bank_rating_summary()['total_reviews'].sum() == len(scored_reviews())
+
+
+def test_engines_agree_on_comparison(tmp_path):
+    results = []
+    for engine in ENGINES:
+        with get_backend(engine, str(tmp_path / f"reviews.{engine}")) as db:
+            db.setup_database()
+            db.bulk_insert_reviews(scored_reviews())
+            results.append(db.query_bank_comparison())
+    pd.testing.assert_frame_equal(*results)
+
+
+def test_default_path_does_not_depend_on_the_working_directory(tmp_path, monkeypatch):
+    opened = []
+    monkeypatch.setattr(embedded_db.sqlite3, 'connect', opened.append)
+    monkeypatch.chdir(tmp_path)
+
+    EmbeddedDatabase('sqlite')
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert os.path.normpath(opened[0]) == os.path.join(repo, 'data', 'processed',
+                                                        'bank_reviews.sqlite')
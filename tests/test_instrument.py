@@ -0,0 +1,103 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src import instrument
+from src.instrument import instrumented, stage, stage_totals, write_prometheus
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    instrument.reset()
+    yield
+    instrument.configure()
+    instrument.reset()
+
+
+@instrumented
+def keep_positive(df):
+    return df[df['value'] > 0]
+
+
+@instrumented(name='custom.split')
+def split(values):
+    return values[:2], values[2:]
+
+
+def totals():
+    return stage_totals().set_index('stage')
+
+
+def test_decorator_counts_rows_in_and_out():
+    keep_positive(pd.DataFrame({'value': [1, -1, 2, 0]}))
+    keep_positive(pd.DataFrame({'value': [3]}))
+    split([1, 2, 3])
+
+    table = totals()
+    row = table.loc['test_instrument.keep_positive']
+    assert (row['calls'], row['rows_in'], row['rows_out']) == (2, 5, 3)
+    assert table.loc['custom.split', 'rows_out'] == 2
+    assert row['seconds'] > 0
+
+
+def test_nested_stages_and_errors_are_logged(tmp_path):
+    log_path = tmp_path / 'metrics.jsonl'
+    instrument.configure(log_path=str(log_path))
+
+    with stage('outer', rows_in=10) as record:
+        keep_positive(pd.DataFrame({'value': [1]}))
+        record.rows_out = 7
+    with pytest.raises(ValueError):
+        with stage('broken'):
+            raise ValueError("boom")
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    inner, outer, broken = records
+    assert inner['stage'] == 'test_instrument.keep_positive'
+    assert (inner['parent'], inner['depth']) == ('outer', 1)
+    assert (outer['rows_in'], outer['rows_out'], outer['depth']) == (10, 7, 0)
+    assert outer['rows_per_sec'] > 0
+    assert broken['error'] == 'ValueError'
+    assert totals().loc['broken', 'calls'] == 1
+
+
+def test_prometheus_text_format(tmp_path):
+    prom_path = tmp_path / 'metrics.prom'
+    instrument.configure(prometheus_path=str(prom_path))
+    with stage('load "reviews"', rows_in=3) as record:
+        record.rows_out = 2
+
+    lines = prom_path.read_text().splitlines()
+    assert '# TYPE pipeline_stage_calls_total counter' in lines
+    assert '# TYPE pipeline_stage_memory_delta_mb gauge' in lines
+    assert 'pipeline_stage_calls_total{stage="load \\"reviews\\""} 1' in lines
+    assert 'pipeline_stage_rows_in_total{stage="load \\"reviews\\""} 3' in lines
+    assert 'pipeline_stage_rows_out_total{stage="load \\"reviews\\""} 2' in lines
+
+    write_prometheus(str(tmp_path / 'copy.prom'))
+    assert (tmp_path / 'copy.prom').read_text() == prom_path.read_text()
+
+
+def test_profiles_are_written_per_outer_stage(tmp_path):
+    instrument.configure(profile_dir=str(tmp_path))
+    with stage('profiled'):
+        keep_positive(pd.DataFrame({'value': [1]}))
+
+    assert (tmp_path / 'profiled-1.prof').exists()
+    assert 'keep_positive' in (tmp_path / 'profiled-1.txt').read_text()
+
+
+def test_batch_entry_points_are_instrumented():
+    from src import database, dedup, pipeline, scraper
+    from src.embedded_db import EmbeddedDatabase
+
+    functions = [database.setup_database, database.verify_data,
+                 database.query_bank_rating_summary, database.query_bank_comparison,
+                 EmbeddedDatabase.setup_database, EmbeddedDatabase.verify_data,
+                 EmbeddedDatabase.query_bank_rating_summary,
+                 EmbeddedDatabase.query_bank_comparison,
+                 dedup.drop_near_duplicates, scraper.scrape_new_reviews,
+                 *(stage.func for stage in pipeline.STAGES)]
+    for func in functions:
+        assert hasattr(func, '__wrapped__'), func.__qualname__
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from src.language import add_language_column, detect_batch, detect_corpus_languages
+from src.text import TokenizedCorpus
+
+SAMPLES = {
+    "The app keeps crashing when I try to transfer money": 'en',
+    "good": 'en',
+    "ሰላም ጥሩ አፕ ነው": 'am',
+    # Mixed scripts: the script most letters belong to wins
+    "ጥሩ አገልግሎት ነው ok": 'am',
+    "ጥሩ but very slow": 'en',
+    "selam dehna neh betam": 'am-Latn',
+    "Приложение не работает": 'other',
+    "😀😀👍": 'und',
+    "": 'und',
+    "12345 !!!": 'und',
+}
+
+
+def test_detect_batch_labels():
+    languages = detect_batch(list(SAMPLES))
+    assert languages.tolist() == list(SAMPLES.values())
+
+
+def test_missing_review_is_undetermined():
+    assert detect_batch([np.nan, "Nice app"]).tolist() == ['und', 'en']
+
+
+def test_corpus_detection_matches_text_detection():
+    texts = list(SAMPLES) * 3 + ["ሰላም, good app!!", "Dashen: best bank ever"]
+    corpus = TokenizedCorpus.build(texts)
+    assert (detect_corpus_languages(corpus, batch_size=4).tolist()
+            == detect_batch(texts).tolist())
+
+
+def test_add_language_column_uses_corpus():
+    df = pd.DataFrame({'review_id': range(len(SAMPLES)), 'review': list(SAMPLES)})
+    corpus = TokenizedCorpus.build(df['review'], df['review_id'])
+    with_corpus = add_language_column(df, corpus=corpus)
+    assert with_corpus['lang'].tolist() == list(SAMPLES.values())
+    assert 'lang' not in df
@@ -0,0 +1,46 @@
+import pytest
+from textblob import TextBlob
+
+from src.lexicon import get_lexicon_scorer, tokenize
+from src.sentiment import label_polarity, score_reviews
+
+SAMPLE = [
+    "Great app, very easy to use",
+    "The app is not good",
+    "Really very slow transfers",
+    "Not very helpful at all",
+    "Excellent service!!",
+    "Terrible update, it keeps crashing",
+    "It works",
+    "",
+]
+
+
+def test_tokenize_splits_contractions():
+    assert tokenize("Doesn't work!") == ['does', "n't", 'work', '!']
+
+
+@pytest.mark.parametrize('text', SAMPLE)
+def test_scores_match_textblob(text):
+    expected = TextBlob(text).sentiment.polarity
+    score = get_lexicon_scorer().polarity_scores([text])[0]
+    assert score == pytest.approx(expected)
+
+
+def test_labels_match_textblob_backend():
+    textblob_labels, _ = score_reviews(SAMPLE, backend='textblob')
+    lexicon_labels, _ = score_reviews(SAMPLE, backend='lexicon')
+    assert lexicon_labels == textblob_labels
+
+
+def test_batch_scores_equal_single_scores():
+    scorer = get_lexicon_scorer()
+    batch = scorer.polarity_scores(SAMPLE)
+    singles = [scorer.polarity_scores([text])[0] for text in SAMPLE]
+    assert batch.tolist() == pytest.approx(singles)
+
+
+def test_label_thresholds():
+    assert label_polarity(0.2) == "positive"
+    assert label_polarity(-0.2) == "negative"
+    assert label_polarity(0.1) == "neutral"
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from src.matcher import KeywordMatcher, keyword_postings
+
+GROUPS = {
+    'Login': ['login', 'log in', 'password', 'otp'],
+    'Speed': ['slow', 'loading', 'load'],
+    'Transfer': ['transfer', 'send money'],
+    'Empty': [],
+}
+TEXTS = [
+    "Login fails and the OTP never arrives",
+    "Very SLOW loading, cannot transfer",
+    "İİİİİİ login",
+    "x",
+    "",
+    np.nan,
+    12345,
+    "ẞtraße send money log in",
+    "downloading is slowww",
+]
+
+
+def test_keyword_postings_attributes_matches_to_the_right_text():
+    assert keyword_postings(['İİİİİİ login', 'x'], ['login'])['login'].tolist() == [0]
+    postings = keyword_postings(['x', 'İİİİİİ', 'login'], ['login', 'x'])
+    assert postings['login'].tolist() == [2]
+    assert postings['x'].tolist() == [0]
+
+
+@pytest.mark.parametrize('texts', [TEXTS, TEXTS[::-1], [], ["only one slow text"]])
+def test_mask_many_matches_mask(texts):
+    matcher = KeywordMatcher(GROUPS)
+    expected = [matcher.mask(text) for text in texts]
+    assert matcher.mask_many(texts).tolist() == expected
+
+
+def test_postings_match_substring_search():
+    matcher = KeywordMatcher(GROUPS)
+    postings = matcher.postings(TEXTS)
+    for keyword, rows in postings.items():
+        expected = [i for i, text in enumerate(TEXTS)
+                    if isinstance(text, (str, int)) and keyword in str(text).lower()]
+        assert rows.tolist() == expected, keyword
+
+
+def test_first_and_match_follow_group_order():
+    matcher = KeywordMatcher(GROUPS)
+    assert matcher.match("slow login") == ['Login', 'Speed']
+    assert matcher.first("slow login") == 'Login'
+    assert matcher.first("nothing here") is None
+
+
+@pytest.mark.parametrize('text', [t for t in TEXTS if isinstance(t, str)])
+def test_match_equals_nested_any_scan(text):
+    expected = [group for group, keywords in GROUPS.items()
+                if any(keyword in text.lower() for keyword in keywords)]
+    assert KeywordMatcher(GROUPS).match(text) == expected
@@ -0,0 +1,193 @@
+import sys
+
+import pytest
+
+from src import pipeline
+from src.pipeline import PipelineCache, Stage, module_closure, run_pipeline, stage_key
+
+
+def copy_upper(source, target):
+    def run(paths, config):
+        with open(paths[source]) as f:
+            text = f.read()
+        with open(paths[target], 'w') as f:
+            f.write(text.upper() + config['suffix'])
+    return run
+
+
+@pytest.fixture
+def toy_pipeline(tmp_path, monkeypatch):
+    """Two file stages (a -> b -> c) plus a stage with a fingerprint"""
+    calls = []
+    state = {'fingerprint': 'v1'}
+
+    def counted(name, func):
+        def run(paths, config):
+            calls.append(name)
+            func(paths, config)
+        return run
+
+    stages = [
+        Stage('first', counted('first', copy_upper('a', 'b')), inputs=['a'],
+              outputs=['b'], modules=['src.pipeline'], config_keys=['suffix']),
+        Stage('second', counted('second', copy_upper('b', 'c')), inputs=['b'],
+              outputs=['c'], deps=['first'], modules=['src.pipeline']),
+        Stage('external', counted('external', lambda paths, config: None),
+              inputs=['c'], deps=['second'],
+              fingerprint=lambda paths, config, cache: state['fingerprint']),
+    ]
+    monkeypatch.setattr(pipeline, 'STAGES', stages)
+    monkeypatch.setattr(pipeline, 'STAGE_NAMES', [stage.name for stage in stages])
+
+    paths = {name: str(tmp_path / f"{name}.txt") for name in 'abc'}
+    with open(paths['a'], 'w') as f:
+        f.write('reviews')
+
+    def run(targets=None, force=(), suffix=''):
+        calls.clear()
+        status = run_pipeline(targets, force, {'suffix': suffix}, paths,
+                              jobs=2, cache_path=str(tmp_path / 'cache.json'))
+        return status, list(calls)
+
+    return run, paths, state
+
+
+def test_second_run_skips_every_stage(toy_pipeline):
+    run, paths, _ = toy_pipeline
+    status, calls = run()
+    assert calls == ['first', 'second', 'external']
+    assert set(status.values()) == {'ran'}
+
+    status, calls = run()
+    assert calls == []
+    assert set(status.values()) == {'skipped'}
+
+
+def test_changed_input_reruns_downstream(toy_pipeline):
+    run, paths, _ = toy_pipeline
+    run()
+    with open(paths['a'], 'w') as f:
+        f.write('more reviews')
+
+    _, calls = run()
+    assert calls == ['first', 'second', 'external']
+
+
+def test_unchanged_output_stops_propagation(toy_pipeline):
+    run, paths, _ = toy_pipeline
+    run()
+    # Same content upper-cased: b is rewritten identically
+    with open(paths['a'], 'w') as f:
+        f.write('REVIEWS')
+
+    _, calls = run()
+    assert calls == ['first']
+
+
+def test_deleted_output_reruns_its_stage(toy_pipeline, tmp_path):
+    run, paths, _ = toy_pipeline
+    run()
+    (tmp_path / 'c.txt').unlink()
+
+    _, calls = run()
+    assert calls == ['second']
+
+
+def test_config_key_change_reruns(toy_pipeline):
+    run, _, _ = toy_pipeline
+    run()
+    _, calls = run(suffix='!')
+    assert calls == ['first', 'second', 'external']
+
+
+def test_changed_fingerprint_reruns(toy_pipeline):
+    run, _, state = toy_pipeline
+    run()
+    state['fingerprint'] = 'v2'
+
+    _, calls = run()
+    assert calls == ['external']
+
+
+def test_force_and_targets(toy_pipeline):
+    run, _, _ = toy_pipeline
+    run()
+    _, calls = run(force=['second'])
+    assert calls == ['second']
+
+    _, calls = run(targets=['first'], force=['all'])
+    assert calls == ['first']
+
+
+def test_failed_stage_blocks_dependents(toy_pipeline, tmp_path):
+    run, paths, _ = toy_pipeline
+    (tmp_path / 'a.txt').unlink()
+
+    status, _ = run()
+    assert status == {'first': 'failed', 'second': 'blocked', 'external': 'blocked'}
+
+
+def test_stage_key_covers_config_inputs_and_code(tmp_path):
+    path = tmp_path / 'input.csv'
+    path.write_text('a,b\n1,2\n')
+    cache = PipelineCache(str(tmp_path / 'cache.json'))
+    paths = {'input': str(path)}
+    stage = Stage('s', None, inputs=['input'], modules=['src.pipeline'],
+                  config_keys=['backend'])
+
+    key = stage_key(stage, paths, {'backend': 'textblob', 'workers': 1}, cache)
+    # Config keys the stage does not declare do not change its key
+    assert stage_key(stage, paths, {'backend': 'textblob', 'workers': 8}, cache) == key
+    assert stage_key(stage, paths, {'backend': 'lexicon', 'workers': 1}, cache) != key
+
+    path.write_text('a,b\n1,2\n3,4\n')
+    assert stage_key(stage, paths, {'backend': 'textblob', 'workers': 1}, cache) != key
+
+    other_code = Stage('s', None, inputs=['input'], modules=['src.text'],
+                       config_keys=['backend'])
+    assert stage_key(other_code, paths, {'backend': 'textblob'}, cache) != key
+
+
+def test_raw_file_is_never_scraped_into(capsys):
+    with pytest.raises(SystemExit):
+        pipeline.main(['--raw', 'mine.csv', '--force', 'scrape'])
+    assert '--force scrape cannot be combined with --raw' in capsys.readouterr().err
+
+
+def test_module_closure_follows_src_imports():
+    closure = module_closure(['src.sentiment'])
+    assert {'src.sentiment', 'src.cache', 'src.lexicon', 'src.instrument',
+            'src.aggregate_store'} <= set(closure)
+    # Imported inside a function
+    assert {'src.embedded_db', 'src.database'} <= set(closure)
+    assert 'src.charts' not in closure
+
+
+def test_stage_key_covers_imported_modules_and_the_runner(tmp_path, monkeypatch):
+    cache = PipelineCache(str(tmp_path / 'cache.json'))
+    stage = Stage('s', None, modules=['src.sentiment'])
+    key = stage_key(stage, {}, {}, cache)
+
+    for changed in ('src.instrument', 'src.pipeline'):
+        original = pipeline.source_hash
+        monkeypatch.setattr(pipeline, 'source_hash', lambda module: (
+            'edited' if module == changed else original(module)))
+        assert stage_key(stage, {}, {}, cache) != key
+        monkeypatch.undo()
+
+
+def test_stages_write_to_the_real_stdout(toy_pipeline, monkeypatch):
+    run, _, _ = toy_pipeline
+    streams = []
+    stage = pipeline.STAGES[0]
+    func = stage.func
+    monkeypatch.setattr(stage, 'func', lambda paths, config: (
+        streams.append(sys.stdout), func(paths, config)))
+
+    run()
+    assert streams == [sys.stdout]
+
+
+def test_default_backend_is_sqlite(monkeypatch):
+    monkeypatch.delenv('DB_BACKEND', raising=False)
+    assert pipeline.default_config()['db_backend'] == 'sqlite'
@@ -0,0 +1,199 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from src import scraper
+from src.scraper import (CheckpointStore, ScrapeStats, TokenBucket, fetch_page,
+                         scrape_app, scrape_bank_reviews, scrape_new_reviews)
+
+APP_ID = 'com.example.bank'
+APPS = {f"Bank {i}": f"com.example.bank{i}" for i in range(4)}
+
+
+class FakeStore:
+    """Newest-first review pages; continuation tokens are page numbers.
+
+    publish() adds newer reviews on top, fail_after makes every fetch of a
+    later page raise.
+    """
+
+    def __init__(self, n_reviews, page_size=10):
+        self.page_size = page_size
+        self.start = datetime(2025, 1, 1)
+        self.reviews = [self.review(i) for i in range(n_reviews)][::-1]
+        self.fail_after = None
+        self.fetched = []
+
+    def review(self, i):
+        return {'reviewId': f"r{i}", 'content': f"review {i}", 'score': 1 + i % 5,
+                'at': self.start + timedelta(hours=i)}
+
+    def publish(self, n):
+        first = len(self.reviews)
+        self.reviews = [self.review(i) for i in range(first, first + n)][::-1] + self.reviews
+
+    def __call__(self, app_id, lang='en', country='et', sort=None, count=200,
+                 continuation_token=None):
+        page = continuation_token or 0
+        if self.fail_after is not None and page >= self.fail_after:
+            raise ConnectionError("simulated outage")
+        self.fetched.append(page)
+        start = page * self.page_size
+        result = self.reviews[start:start + self.page_size]
+        more = start + self.page_size < len(self.reviews)
+        return result, page + 1 if more else None
+
+
+def test_concurrent_scrape_matches_sequential():
+    options = dict(bank_apps=APPS, rate=1e9, backoff=0)
+    sequential = scrape_bank_reviews(fetch=FakeStore(45), workers=1, **options)
+    concurrent = scrape_bank_reviews(fetch=FakeStore(45), workers=4, **options)
+
+    pd.testing.assert_frame_equal(concurrent, sequential)
+    assert len(sequential) == 4 * 45
+
+
+def test_target_caps_reviews_per_app():
+    df = scrape_bank_reviews(bank_apps=APPS, fetch=FakeStore(1000, page_size=200),
+                             workers=2, rate=1e9, backoff=0)
+    assert df.groupby('bank').size().tolist() == [400] * 4
+
+
+def test_failed_page_is_retried():
+    store = FakeStore(5)
+    calls = []
+
+    def flaky(app_id, **kwargs):
+        calls.append(kwargs['continuation_token'])
+        if len(calls) == 1:
+            raise ConnectionError("simulated outage")
+        return store(app_id, **kwargs)
+
+    stats = ScrapeStats()
+    result, token = fetch_page(APP_ID, None, flaky, TokenBucket(1e9), stats,
+                               max_retries=2, backoff=0)
+    assert len(result) == 5 and token is None
+    assert calls == [None, None]
+    assert stats.counts['retries'] == 1 and stats.counts['pages'] == 1
+
+
+def scrape(store, checkpoint, target=1000):
+    return scrape_app('Bank', APP_ID, store, TokenBucket(1e9), ScrapeStats(),
+                      target=target, max_retries=0, backoff=0, checkpoint=checkpoint)
+
+
+def ids(rows):
+    return [row['review_id'] for row in rows]
+
+
+def test_first_crawl_sets_newest_review():
+    store = FakeStore(25)
+    rows, checkpoint = scrape(store, {})
+    assert ids(rows) == [f"r{i}" for i in range(24, -1, -1)]
+    assert checkpoint['newest_review_id'] == 'r24'
+    assert 'continuation_token' not in checkpoint
+
+
+def test_no_checkpoint_returns_none():
+    rows, checkpoint = scrape(FakeStore(5), None)
+    assert len(rows) == 5 and checkpoint is None
+
+
+def test_incremental_crawl_stops_at_known_review():
+    store = FakeStore(25)
+    _, checkpoint = scrape(store, {})
+    store.publish(12)
+    store.fetched.clear()
+
+    rows, checkpoint = scrape(store, checkpoint)
+    assert ids(rows) == [f"r{i}" for i in range(36, 24, -1)]
+    assert store.fetched == [0, 1]
+    assert checkpoint['newest_review_id'] == 'r36'
+
+
+def test_interrupted_crawl_resumes_from_token():
+    store = FakeStore(25)
+    _, checkpoint = scrape(store, {})
+    store.publish(30)
+    store.fail_after = 2
+
+    rows, checkpoint = scrape(store, checkpoint)
+    assert ids(rows) == [f"r{i}" for i in range(54, 34, -1)]
+    # The boundary stays put until the gap down to r24 is closed
+    assert checkpoint['newest_review_id'] == 'r24'
+    assert checkpoint['continuation_token'] == 2
+    assert checkpoint['pending_newest']['review_id'] == 'r54'
+
+    store.fail_after = None
+    store.fetched.clear()
+    rows, checkpoint = scrape(store, checkpoint)
+    assert store.fetched == [2, 3]
+    assert ids(rows) == [f"r{i}" for i in range(34, 24, -1)]
+    assert checkpoint['newest_review_id'] == 'r54'
+    assert 'continuation_token' not in checkpoint and 'pending_newest' not in checkpoint
+
+
+def test_unrebuildable_token_restarts_from_newest_page(monkeypatch):
+    monkeypatch.setattr(scraper, 'token_from_json', lambda value: None)
+    store = FakeStore(25)
+    _, checkpoint = scrape(store, {})
+    store.publish(5)
+    checkpoint.update({'continuation_token': {'token': 'opaque'},
+                       'pending_newest': {'review_id': 'r99', 'at': '2030-01-01T00:00:00'}})
+
+    rows, checkpoint = scrape(store, checkpoint)
+    assert store.fetched[-1] == 0
+    assert ids(rows) == ['r29', 'r28', 'r27', 'r26', 'r25']
+    assert checkpoint['newest_review_id'] == 'r29'
+
+
+def test_checkpoints_advance_only_after_rows_are_written(tmp_path, monkeypatch):
+    raw_path = str(tmp_path / 'raw.csv')
+    checkpoint_path = str(tmp_path / 'checkpoints.json')
+    store = FakeStore(25)
+    options = dict(bank_apps={'Bank': APP_ID}, fetch=store, rate=1e9, backoff=0)
+
+    scrape_new_reviews(raw_path, checkpoint_path, **options)
+    assert CheckpointStore(checkpoint_path).get(APP_ID)['newest_review_id'] == 'r24'
+
+    store.publish(5)
+
+    def failing_write(df, path):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(scraper, 'append_raw_reviews', failing_write)
+    with pytest.raises(OSError):
+        scrape_new_reviews(raw_path, checkpoint_path, **options)
+    assert CheckpointStore(checkpoint_path).get(APP_ID)['newest_review_id'] == 'r24'
+
+    monkeypatch.undo()
+    scrape_new_reviews(raw_path, checkpoint_path, **options)
+    raw = pd.read_csv(raw_path)
+    assert len(raw) == 30 and raw['review_id'].is_unique
+    assert CheckpointStore(checkpoint_path).get(APP_ID)['newest_review_id'] == 'r29'
+
+
+def test_append_keeps_existing_rows_and_latest_copy(tmp_path):
+    path = str(tmp_path / 'raw.csv')
+    scraper.append_raw_reviews(pd.DataFrame({'review_id': ['1', '2'], 'review': ['a', 'b']}), path)
+    total = scraper.append_raw_reviews(
+        pd.DataFrame({'review_id': ['2', '3'], 'review': ['b edited', 'c']}), path)
+
+    raw = pd.read_csv(path, dtype={'review_id': str})
+    assert total == 3
+    assert raw.set_index('review_id')['review'].to_dict() == {'1': 'a', '2': 'b edited', '3': 'c'}
+
+
+def test_checkpoints_are_staged_until_commit(tmp_path):
+    checkpoints = CheckpointStore(str(tmp_path / 'checkpoints.json'))
+    df = scrape_bank_reviews(bank_apps={'Bank': APP_ID}, fetch=FakeStore(25),
+                             rate=1e9, backoff=0, checkpoints=checkpoints)
+    assert isinstance(df, pd.DataFrame) and len(df) == 25
+    assert checkpoints.get(APP_ID) == {}
+    assert checkpoints.pending[APP_ID]['newest_review_id'] == 'r24'
+
+    checkpoints.commit()
+    assert checkpoints.pending == {}
+    saved = CheckpointStore(str(tmp_path / 'checkpoints.json'))
+    assert saved.get(APP_ID)['newest_review_id'] == 'r24'
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from src.sentiment import (UNSCORED_LABEL, aggregate_by_bank_and_rating,
+                           aggregate_by_bank_and_rating_masked)
+
+
+def scored_reviews():
+    return pd.DataFrame({
+        'review_id': [f"r{i}" for i in range(8)],
+        'review': ['good', 'bad login', 'ok', 'ሰላም', 'slow', 'great', 'ጥሩ', 'bad'],
+        'bank': ['A', 'A', 'A', 'A', 'B', 'B', 'B', 'B'],
+        'rating': [5, 1, 3, 5, 1, 5, 4, 1],
+        'date': ['2025-01-01'] * 4 + ['2025-01-02'] * 4,
+        'sentiment_label': ['positive', 'negative', 'neutral', UNSCORED_LABEL,
+                            'negative', 'positive', UNSCORED_LABEL, 'negative'],
+        'sentiment_score': [0.7, -0.5, 0.0, np.nan, -0.3, 0.8, np.nan, -0.7],
+    })
+
+
+def test_grouped_matches_masked():
+    pd.testing.assert_frame_equal(aggregate_by_bank_and_rating(scored_reviews()),
+                                  aggregate_by_bank_and_rating_masked(scored_reviews()))
+
+
+def test_rows_follow_bank_appearance_then_rating():
+    df = scored_reviews().iloc[::-1].reset_index(drop=True)
+    aggregated = aggregate_by_bank_and_rating(df)
+    assert aggregated['bank'].tolist() == ['B', 'B', 'B', 'A', 'A', 'A']
+    assert aggregated['rating'].tolist() == [1, 4, 5, 1, 3, 5]
+
+
+def test_unscored_reviews_have_their_own_count():
+    aggregated = aggregate_by_bank_and_rating(scored_reviews())
+    counts = aggregated[['positive_count', 'neutral_count', 'negative_count',
+                         'unscored_count']].sum(axis=1)
+    assert (counts == aggregated['total_reviews']).all()
+    assert aggregated['unscored_count'].sum() == 2
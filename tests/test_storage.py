@@ -0,0 +1,56 @@
+import pandas as pd
+
+from src.storage import read_reviews_parquet, write_reviews_parquet
+
+
+def scored_reviews():
+    return pd.DataFrame({
+        'review_id': [f"r{i}" for i in range(6)],
+        'review': ['good', 'bad', 'ok', 'slow', 'great', 'fine'],
+        'rating': [5, 1, 3, 1, 5, 4],
+        'date': ['2025-01-05', '2025-02-01', '2025-02-03',
+                 '2025-01-09', '2025-02-11', None],
+        'bank': ['A', 'A', 'A', 'B', 'B', 'B'],
+        'source': 'Google Play',
+        'sentiment_label': ['positive', 'negative', 'neutral',
+                            'negative', 'positive', 'neutral'],
+        'sentiment_score': [0.7, -0.7, 0.0, -0.3, 0.8, 0.05],
+    })
+
+
+def sort(df):
+    return df.sort_values('review_id').reset_index(drop=True)
+
+
+def test_round_trip_keeps_rows_and_columns(tmp_path):
+    df = scored_reviews()
+    write_reviews_parquet(df, tmp_path / 'reviews')
+
+    result = read_reviews_parquet(tmp_path / 'reviews')
+    assert list(result.columns) == list(df.columns)
+    pd.testing.assert_frame_equal(sort(result).astype(str), sort(df).astype(str))
+
+
+def test_bank_and_month_filters_prune_partitions(tmp_path):
+    root = tmp_path / 'reviews'
+    write_reviews_parquet(scored_reviews(), root)
+    # Unreadable files in other partitions only fail if they are opened
+    for path in root.glob('bank=B/**/*.parquet'):
+        path.write_bytes(b'not parquet')
+
+    result = read_reviews_parquet(root, columns=['review_id', 'rating'],
+                                  banks=['A'], months=['2025-02'])
+    assert list(result.columns) == ['review_id', 'rating']
+    assert sorted(result['review_id']) == ['r1', 'r2']
+
+
+def test_unknown_dates_get_their_own_month(tmp_path):
+    write_reviews_parquet(scored_reviews(), tmp_path / 'reviews')
+    assert (tmp_path / 'reviews' / 'bank=B' / 'month=unknown').is_dir()
+
+
+def test_appended_parts_do_not_overwrite(tmp_path):
+    df = scored_reviews()
+    write_reviews_parquet(df.iloc[:3], tmp_path / 'reviews', overwrite=False, part=0)
+    write_reviews_parquet(df.iloc[3:], tmp_path / 'reviews', overwrite=False, part=1)
+    assert len(read_reviews_parquet(tmp_path / 'reviews')) == len(df)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from src.language import detect_batch
+from src.preprocess import SeenIds, preprocess_reviews
+from src.sentiment import perform_sentiment_analysis, score_texts, scoring_pool
+from src.streaming import stream_sentiment_pipeline
+
+TEXTS = ["Great app, very easy to use", "The app is not good", "ጥሩ አገልግሎት ነው",
+         "Really very slow transfers", None, "Excellent service!!",
+         "Terrible update, it keeps crashing", "It works"]
+
+
+def raw_reviews():
+    rows = [{'review_id': f"r{i}", 'review': TEXTS[i % len(TEXTS)],
+             'rating': 1 + i % 5, 'date': f"2025-01-{1 + i % 28:02d}",
+             'bank': ['A', 'B', 'C'][i % 3], 'source': 'Google Play'}
+            for i in range(30)]
+    # Re-sent reviews land in later chunks than their first copy
+    return pd.DataFrame(rows + rows[2:9:3])
+
+
+def test_seen_ids_filters_across_batches():
+    seen = SeenIds()
+    first = seen.filter_new(pd.Series(['a', 'b', 'a', 'c']))
+    second = seen.filter_new(pd.Series(['d', 'b', 'e', 'd']))
+
+    assert first.tolist() == [True, True, False, True]
+    assert second.tolist() == [True, False, True, False]
+    assert len(seen) == 5
+    assert (np.diff(seen.hashes) > 0).all()
+
+
+def test_stream_matches_batch_path(tmp_path):
+    raw_path = tmp_path / 'raw.csv'
+    raw_reviews().to_csv(raw_path, index=False)
+
+    stream_sentiment_pipeline(raw_path, tmp_path / 'streamed.csv',
+                              chunk_size=7, backend='lexicon')
+
+    batch = preprocess_reviews(pd.read_csv(raw_path))
+    batch['lang'] = detect_batch(batch['review'].tolist())
+    batch = perform_sentiment_analysis(batch, backend='lexicon')
+    batch.to_csv(tmp_path / 'batch.csv', index=False)
+
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'streamed.csv'),
+                                  pd.read_csv(tmp_path / 'batch.csv'))
+
+
+def test_shared_executor_matches_serial_scoring():
+    texts = [text for text in TEXTS if text is not None] * 3
+    with scoring_pool(2) as pool:
+        pooled = score_texts(texts, chunk_size=4, backend='lexicon', executor=pool)
+    assert pooled == score_texts(texts, chunk_size=4, backend='lexicon')
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+
+from src.text import (TokenizedCorpus, corpus_for, has_geez, normalize_text,
+                      normalize_texts, transliterate)
+
+TEXTS = [
+    "Great app, very fast transfers!",
+    "The app is slow and login fails... again & again",
+    "ሰላም! ጥሩ አፕ ነው።",
+    "ሐሳብ ኀይል ሀገር",
+    "",
+    np.nan,
+    "a b c",
+    "I can't transfer money; app crashes every time I transfer money",
+    "Ⅻ ＦＵＬＬＷＩＤＴＨ text and_underscores 123",
+]
+
+
+@pytest.mark.parametrize('ngram_range', [(1, 1), (1, 2), (2, 2)])
+def test_term_matrix_matches_count_vectorizer(ngram_range):
+    corpus = TokenizedCorpus.build(TEXTS)
+    matrix, names = corpus.term_matrix(ngram_range=ngram_range)
+
+    vectorizer = CountVectorizer(stop_words='english', ngram_range=ngram_range)
+    expected = vectorizer.fit_transform(normalize_texts(TEXTS))
+
+    assert names.tolist() == vectorizer.get_feature_names_out().tolist()
+    assert (matrix != expected).nnz == 0
+
+
+def test_tokens_are_normalized_once_per_review():
+    corpus = TokenizedCorpus.build(TEXTS)
+    assert len(corpus) == len(TEXTS)
+    assert corpus.tokens(0) == ['great', 'app', 'very', 'fast', 'transfers']
+    # Homophone rows fold together: ሐ and ኀ become ሀ
+    assert corpus.tokens(3) == ['ሀሳብ', 'ሀይል', 'ሀገር']
+    assert corpus.tokens(4) == [] and corpus.tokens(5) == []
+
+
+def test_take_keeps_tokens_and_ids():
+    corpus = TokenizedCorpus.build(TEXTS, review_ids=list(range(len(TEXTS))))
+    part = corpus.take([1, 7])
+    assert part.tokens(0) == corpus.tokens(1)
+    assert part.tokens(1) == corpus.tokens(7)
+    assert part.review_ids.tolist() == [1, 7]
+
+
+def test_saved_numeric_ids_still_match(tmp_path, capsys):
+    df = pd.DataFrame({'review_id': [10, 11, np.nan], 'review': TEXTS[:3]})
+    path = str(tmp_path / 'tokens.npz')
+    TokenizedCorpus.build(df['review'], df['review_id']).save(path)
+
+    loaded = TokenizedCorpus.load(path)
+    assert loaded.matches(df['review_id'].tolist())
+    capsys.readouterr()
+    assert corpus_for(df, loaded) is loaded
+    assert 'tokenizing them again' not in capsys.readouterr().out
+
+
+def test_mismatched_corpus_is_rebuilt_with_a_message(capsys):
+    df = pd.DataFrame({'review_id': ['a', 'b'], 'review': TEXTS[:2]})
+    stale = TokenizedCorpus.build(TEXTS[:2], ['a', 'c'])
+    capsys.readouterr()
+
+    rebuilt = corpus_for(df, stale)
+    assert rebuilt is not stale and rebuilt.review_ids.tolist() == ['a', 'b']
+    assert 'tokenizing them again' in capsys.readouterr().out
+
+
+def test_transliterate():
+    assert transliterate('ሰላም') == 'selam'
+    assert transliterate('ጥሩ') == 'tru'
+    assert transliterate('ፘፙፚ') == 'myaryafya'
+    assert transliterate('ok ፩፪') == 'ok 12'
+
+
+def test_has_geez_ignores_combining_marks():
+    assert has_geez('ሰላም')
+    assert has_geez('ፚ')
+    assert not has_geez('፝፞፟')
+    assert not has_geez('hello')
+
+
+def test_normalize_text_strips_punctuation_by_default():
+    assert normalize_text("Great APP!!") == "great app  "
+    assert normalize_text("Great APP!!", keep_punctuation=True) == "great app!!"
+
+
+def test_normalize_texts_matches_normalize_text():
+    texts = pd.Series(["Slow, SLOW app.", "ሰላም።"])
+    assert list(normalize_texts(texts)) == [normalize_text(t) for t in texts]
@@ -0,0 +1,44 @@
+import numpy as np
+
+from src.matcher import KeywordMatcher
+from src.theme_index import ThemeIndex, assign_themes, theme_labels
+from tests.test_sentiment import scored_reviews
+
+GROUPS = {'Login': ['login'], 'Speed': ['slow'], 'Unused': []}
+
+
+def test_bitmask_column_decodes_to_matching_themes():
+    matcher = KeywordMatcher(GROUPS)
+    df = assign_themes(scored_reviews(), matcher)
+    assert df['themes'].dtype == np.uint8
+    labels = theme_labels(df, matcher)
+    assert labels.tolist() == [matcher.match(text) for text in df['review']]
+
+
+def test_lookup_matches_dataframe_filter():
+    df = scored_reviews()
+    df.loc[4, 'review'] = 'slow login'
+    index = ThemeIndex.build(df, KeywordMatcher(GROUPS))
+
+    assert index.lookup(theme='Login') == ['r1', 'r4']
+    assert index.lookup(theme='Login', bank='B', sentiment='negative') == ['r4']
+    assert index.lookup(keyword='SLOW', month='2025-01') == ['r4']
+    assert index.lookup(theme='Speed', bank='A') == []
+    assert index.lookup(1, bank='B') == ['r4']
+    assert index.counts('bank').to_dict() == {'A': 4, 'B': 4}
+
+
+def test_theme_without_keywords_gets_empty_postings():
+    index = ThemeIndex.build(scored_reviews(), KeywordMatcher(GROUPS))
+    assert index.lookup(theme='Unused') == []
+    assert index.lookup(theme='Unknown theme') == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = ThemeIndex.build(scored_reviews(), KeywordMatcher(GROUPS))
+    index.save(tmp_path / 'index.npz')
+    loaded = ThemeIndex.load(tmp_path / 'index.npz')
+
+    for keys in [{'theme': 'Login'}, {'bank': 'A', 'sentiment': 'positive'},
+                 {'theme': 'Unused'}, {}]:
+        assert loaded.lookup(**keys) == index.lookup(**keys)
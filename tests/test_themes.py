@@ -0,0 +1,59 @@
+import pandas as pd
+
+from src.themes import (analyze_themes_by_bank, extract_keywords,
+                        extract_keywords_by_bank, group_into_themes)
+
+REVIEWS = {
+    'A': ["Login fails every time", "cannot login after the update",
+          "transfer was slow today", "great app, fast transfer",
+          "login with fingerprint please", "app crashes on login"],
+    'B': ["Customer service never answers", "very slow transfer",
+          "slow slow slow app", "transfer failed, money deducted",
+          "customer support was helpful", "the app keeps crashing"],
+}
+
+
+def bank_reviews():
+    rows = [(bank, review) for bank, reviews in REVIEWS.items() for review in reviews]
+    return pd.DataFrame({
+        'review_id': [f"r{i}" for i in range(len(rows))],
+        'bank': [bank for bank, _ in rows],
+        'review': [review for _, review in rows],
+    })
+
+
+def test_shared_matrix_matches_per_bank_vectorizer():
+    # TfidfVectorizer breaks ties at the max_features cut-off arbitrarily,
+    # so compare full vocabularies and a cut-off without ties
+    for top_n in (1000, 1):
+        keywords = extract_keywords_by_bank(bank_reviews(), top_n=top_n)
+        assert list(keywords) == ['A', 'B']
+        for bank, reviews in REVIEWS.items():
+            assert list(keywords[bank]) == list(extract_keywords(reviews, top_n=top_n))
+
+    assert extract_keywords_by_bank(bank_reviews(), top_n=1)['B'] == ['slow']
+
+
+def test_other_languages_do_not_contribute_keywords():
+    df = bank_reviews()
+    df['lang'] = 'en'
+    df.loc[df['bank'] == 'B', 'lang'] = 'am'
+    df.loc[0, 'review'] = "ጥሩ አገልግሎት"
+    df.loc[0, 'lang'] = 'am'
+
+    keywords = extract_keywords_by_bank(df, top_n=50)
+    assert len(keywords['B']) == 0
+    assert 'fails' not in keywords['A'] and 'login' in keywords['A']
+
+
+def test_keywords_are_grouped_by_taxonomy():
+    themes = group_into_themes(['login', 'transfer slow', 'crash'])
+    assert 'login' in themes['Login & Account Access']
+    assert all(len(words) <= 5 for words in themes.values())
+
+
+def test_analysis_has_themes_and_examples_per_bank():
+    bank_themes = analyze_themes_by_bank(bank_reviews())
+    assert list(bank_themes) == ['A', 'B']
+    for result in bank_themes.values():
+        assert set(result['examples']) == set(result['themes'])
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregate_store import AggregateStore
+from src.trends import TrendStore, daily_totals, rolling_trends
+from tests.test_sentiment import scored_reviews
+
+
+def random_reviews(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = rng.choice(['positive', 'neutral', 'negative', 'unscored'], n)
+    scores = rng.uniform(-1, 1, n)
+    return pd.DataFrame({
+        'review_id': [f"r{i}" for i in range(n)],
+        'bank': rng.choice(['A', 'B'], n),
+        'rating': rng.integers(1, 6, n),
+        'date': (pd.Timestamp('2025-01-01')
+                 + pd.to_timedelta(rng.integers(0, 60, n), unit='D')).strftime('%Y-%m-%d'),
+        'sentiment_label': labels,
+        'sentiment_score': np.where(labels == 'unscored', np.nan, scores),
+    })
+
+
+def test_daily_window_matches_direct_filter():
+    df = random_reviews()
+    trends = rolling_trends(daily_totals(df), 'D', 7).set_index(['bank', 'period'])
+    dates = pd.to_datetime(df['date'])
+
+    for (bank, period), row in trends.sample(20, random_state=0).iterrows():
+        window = df[(df['bank'] == bank) & (dates > period - pd.Timedelta(days=7))
+                    & (dates <= period)]
+        scored = window['sentiment_score'].notna()
+        assert row['reviews'] == len(window)
+        assert row['score_mean'] == pytest.approx(window['sentiment_score'].mean())
+        assert row['negative_share'] == pytest.approx(
+            (window['sentiment_label'] == 'negative').sum() / scored.sum())
+
+
+def test_weekly_periods_start_on_monday():
+    trends = rolling_trends(daily_totals(random_reviews()), 'W', 4)
+    assert (trends['period'].dt.dayofweek == 0).all()
+    assert trends.groupby('bank')['reviews'].max().max() <= 300
+
+
+def test_shares_are_over_scored_reviews():
+    trends = rolling_trends(daily_totals(scored_reviews()), 'D', 1).set_index('bank')
+    assert trends.loc['A', 'reviews'] == 4
+    assert trends.loc['A', 'negative_share'] == pytest.approx(1 / 3)
+    assert trends.loc['B', 'negative_share'] == pytest.approx(2 / 3)
+
+
+def test_incremental_updates_match_a_full_rebuild():
+    df = random_reviews().sort_values('date', ignore_index=True)
+    incremental = TrendStore(AggregateStore())
+    for start in range(0, len(df), 60):
+        incremental.add_reviews(df.iloc[start:start + 60])
+
+    full = TrendStore(AggregateStore())
+    full.store.add_reviews(df)
+    full.update()
+
+    for freq, windows in full.windows.items():
+        for window in windows:
+            pd.testing.assert_frame_equal(incremental.trends(freq=freq, window=window),
+                                          full.trends(freq=freq, window=window))